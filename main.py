@@ -1,9 +1,15 @@
 import os
+import sys
 import json
 import argparse
 from pathlib import Path
 from typing import Optional
 
+if __name__ == "__main__" and "--profile-startup" in sys.argv:
+    # Checked before the project imports below so they show up in the report
+    from src.services.startup_profile import run_profiled
+    sys.exit(run_profiled(__file__, [a for a in sys.argv[1:] if a != "--profile-startup"]))
+
 from dotenv import load_dotenv
 
 from src.services.session_manager import SessionManager
@@ -85,8 +91,10 @@ def parse_args():
     parser.add_argument("--interactive", action="store_true", help="Prompt for student profile inputs")
     parser.add_argument("--no-summary", action="store_true", help="Disable LLM summarization")
     parser.add_argument("--refine", type=str, default=None, help="Refinement feedback to adjust profile")
+    parser.add_argument("--refine-loop", action="store_true", help="Keep prompting for refinement feedback after the first run")
     parser.add_argument("--save-profile", type=str, help="Path to save profile JSON")
     parser.add_argument("--load-profile", type=str, help="Load profile from JSON path")
+    parser.add_argument("--profile-startup", action="store_true", help="Run, then report the slowest imports")
     return parser.parse_args()
 
 def google_connectivity_check():
@@ -158,8 +166,10 @@ def main():
         # Example: to enable inside corporate network set PROXY_URL or HTTP_PROXY before running.
         # PowerShell:  $env:PROXY_URL = 'http://blrproxy.ad.infosys.com:80'
         pass
-    # Proactive connectivity check (non-fatal)
-    google_connectivity_check()
+    # Proactive connectivity check (non-fatal). It costs an SDK import and a model round trip,
+    # so --no-summary runs skip it unless CONNECTIVITY_CHECK=1 asks for it explicitly.
+    if not args.no_summary or os.getenv("CONNECTIVITY_CHECK") == "1":
+        google_connectivity_check()
     config = load_config()
     if args.no_summary:
         config.setdefault("orchestrator", {})["summarizer"] = False
@@ -198,14 +208,17 @@ def main():
     if args.refine:
         profile = session.refine_profile(profile, args.refine)
     orchestrator = Orchestrator(config, data_store)
-    result = orchestrator.run(profile)
+    # Passing the session lets a refined turn reuse agents whose inputs did not change
+    result = orchestrator.run(profile, session=session)
     session.add_turn(profile, result)
     if result.get("cached"):
         pass
     pass
     for agent_name, payload in result["agents"].items():
         pass
-    if "summary" in result:
+    # With orchestrator.deferred_summary the summary is still being generated here
+    summary = orchestrator.wait_for_summary(result)
+    if summary:
         pass
         # Indicate which backend was used for clarity
         backend = getattr(orchestrator.genai, "backend", None)
@@ -213,6 +226,17 @@ def main():
             pass
         else:
             pass
+    # Keep refining in one session; agents whose inputs did not change are reused
+    while args.refine_loop:
+        feedback = input("Refinement feedback (blank to finish): ").strip()
+        if not feedback:
+            break
+        profile = session.refine_profile(profile, feedback)
+        result = orchestrator.run(profile, session=session)
+        session.add_turn(profile, result)
+        summary = orchestrator.wait_for_summary(result)
+        if summary:
+            pass
     if args.save_profile:
         try:
             save_path = _resolve_workspace_path(args.save_profile)
@@ -225,6 +249,8 @@ def main():
         pass
     # Show simple session length
     pass
+    # Exports are written in the background; let them land before the process exits
+    orchestrator.flush_exports(timeout=10)
 
 if __name__ == "__main__":
     main()
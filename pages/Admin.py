@@ -1,6 +1,7 @@
 import streamlit as st
+import csv
+import io
 import json
-import pandas as pd
 from datetime import datetime
 from pathlib import Path
 
@@ -52,18 +53,21 @@ for record in history:
         "Aid Options": num_aid,
     })
 
-df = pd.DataFrame(records)
+
+def _mean(column: str) -> float:
+    return sum(r[column] for r in records) / len(records)
+
 
 # Stats overview
 col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.metric("📊 Total Requests", len(history))
 with col2:
-    st.metric("🎓 Avg Programs/Request", f"{df['Programs'].mean():.1f}")
+    st.metric("🎓 Avg Programs/Request", f"{_mean('Programs'):.1f}")
 with col3:
-    st.metric("💼 Avg Careers/Request", f"{df['Careers'].mean():.1f}")
+    st.metric("💼 Avg Careers/Request", f"{_mean('Careers'):.1f}")
 with col4:
-    st.metric("💰 Avg Aid/Request", f"{df['Aid Options'].mean():.1f}")
+    st.metric("💰 Avg Aid/Request", f"{_mean('Aid Options'):.1f}")
 
 st.markdown("---")
 
@@ -95,8 +99,8 @@ if filter_level:
 
 # Display filtered table
 st.subheader(f"📋 Request History ({len(filtered_records)} records)")
-filtered_df = pd.DataFrame(filtered_records)
-st.dataframe(filtered_df, use_container_width=True, hide_index=True)
+# Plain records: st.dataframe converts them itself, so the page doesn't import pandas up front
+st.dataframe(filtered_records, use_container_width=True, hide_index=True)
 
 # Detailed view
 st.markdown("---")
@@ -161,10 +165,13 @@ with col1:
 
 with col2:
     if st.button("📊 Download Summary as CSV"):
-        csv = df.to_csv(index=False)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(records[0]), lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(records)
         st.download_button(
             label="⬇️ Download CSV",
-            data=csv,
+            data=buffer.getvalue(),
             file_name=f"request_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv"
         )
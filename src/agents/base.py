@@ -1,5 +1,24 @@
+import asyncio
+import contextvars
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Set by the orchestrator for streaming runs: receives (agent_name, item) as agents produce partial output
+partial_listener: contextvars.ContextVar[Optional[Callable[[str, Any], None]]] = contextvars.ContextVar(
+    "partial_listener", default=None
+)
+
+
+def normalize_value(value: Any) -> Any:
+    """Order- and case-insensitive form of a profile value, used for cache keys."""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, (list, tuple, set)):
+        items = {repr(v): v for v in (normalize_value(v) for v in value) if v not in ("", None)}
+        return [items[k] for k in sorted(items)]
+    if isinstance(value, dict):
+        return {str(k): normalize_value(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    return value
 
 class AgentContext:
     def __init__(self, config: Dict[str, Any], data_store: Dict[str, Any], vector_store: Any = None, genai_client: Any = None):
@@ -11,6 +30,12 @@ class AgentContext:
 class BaseAgent(ABC):
     name: str = "base"
     description: str = ""
+    # Upstream agents whose payloads this agent reads; the orchestrator schedules it after them
+    consumes: Tuple[str, ...] = ()
+    # Profile keys this agent hands to downstream agents via ``contribute``
+    provides: Tuple[str, ...] = ()
+    # Profile fields this agent's output depends on (keys the per-agent cache); None = whole profile
+    cache_fields: Optional[Tuple[str, ...]] = None
 
     def __init__(self, context: AgentContext):
         self.context = context
@@ -19,3 +44,53 @@ class BaseAgent(ABC):
     def handle(self, profile: Any) -> Dict[str, Any]:
         """Process the student profile and return structured info."""
         raise NotImplementedError
+
+    async def ahandle(self, profile: Any) -> Dict[str, Any]:
+        """Async entry point; by default runs ``handle`` in a worker thread.
+
+        The thread sees the caller's context variables (usage scope, partial
+        listener). LLM-bound agents override this to await ``aask_llm`` instead.
+        """
+        return await asyncio.to_thread(self.handle, profile)
+
+    def ask_llm(self, prompt: Optional[str]) -> Optional[str]:
+        """LLM answer to ``prompt``; None without a prompt or client, or when the call fails."""
+        client = self.context.genai_client
+        if prompt is None or not client:
+            return None
+        try:
+            return client.summarize(prompt)
+        except Exception:
+            return None
+
+    async def aask_llm(self, prompt: Optional[str]) -> Optional[str]:
+        """Async ``ask_llm``: awaits ``GenAIClient.asummarize`` instead of holding a thread."""
+        client = self.context.genai_client
+        if prompt is None or not client:
+            return None
+        try:
+            return await client.asummarize(prompt)
+        except Exception:
+            return None
+
+    def emit_partial(self, item: Any) -> None:
+        """Report one item of output early (e.g. the first recommendation) to a streaming caller."""
+        listener = partial_listener.get()
+        if listener is not None:
+            try:
+                listener(self.name, item)
+            except Exception:
+                pass
+
+    def contribute(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Map this agent's payload onto the profile keys declared in ``provides``."""
+        return {}
+
+    def cache_projection(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalized subset of the profile that determines this agent's output."""
+        fields = self.cache_fields if self.cache_fields is not None else tuple(sorted(profile))
+        return {field: normalize_value(profile.get(field)) for field in fields}
+
+    def fallback(self, profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fast non-LLM output used when the agent overruns its time budget (None = no fallback)."""
+        return None
@@ -1,13 +1,69 @@
-import json
 import logging
-from typing import Dict, Any, List
-from .base import BaseAgent
+from typing import Dict, Any, List, Optional
+from .base import BaseAgent, normalize_value
+from src.services.context_cache import CacheablePrompt
+from src.services.json_stream import parse_json_array
 
 logger = logging.getLogger(__name__)
 
+# Fixed career-counselling instructions, placed ahead of the per-student part of the prompt
+CAREER_INSTRUCTIONS = """You are an expert career counselor specializing in Singapore's job market and education pathways.
+
+YOUR TASK AS A CAREER COUNSELOR:
+You will be given a student profile. Analyze it and suggest 5 career paths that:
+1. Align with their interests and strengths
+2. Are realistic given their education level
+3. Consider Singapore's job market (demand, growth, opportunities)
+4. Leverage Singapore's Smart Nation, FinTech hub, and tech sector strengths
+
+For each career path, provide:
+- **Career Title**: Specific job role (e.g., "AI Engineer" not just "Tech")
+- **Why It Fits**: 2-3 sentences explaining how their interests and strengths align
+- **Singapore Demand**: Current job market reality (high/medium demand, growing/stable)
+- **Typical Path**: How they get there (what degree → entry role → senior role)
+- **Salary Expectations**: Realistic Singapore salary ranges (starting → 5 years experience)
+- **Key Skills Needed**: 3-4 specific skills they should develop
+- **Companies/Sectors**: Where they'd work (specific Singapore companies, sectors, or government agencies)
+
+SINGAPORE CONTEXT TO CONSIDER:
+- Smart Nation initiatives (AI, data, digital transformation)
+- Financial hub status (banking, insurance, FinTech)
+- Regional MNC headquarters (Google, Meta, Microsoft, JP Morgan)
+- Tech unicorns (Grab, Sea Group, Shopee)
+- Government agencies (GovTech, MAS, DSTA, A*STAR)
+- Startups ecosystem
+- Healthcare, logistics, education sectors undergoing digital transformation
+
+IMPORTANT:
+- Be SPECIFIC. Don't say "good career prospects" - say "High demand: 500+ job openings monthly on LinkedIn for Data Scientists in Singapore"
+- Mention ACTUAL companies/agencies where possible
+- Give REALISTIC salary ranges (Singapore context: fresh grad vs 5 years)
+- Explain WHY their strengths matter for each career
+
+Return ONLY valid JSON array:
+[
+  {
+    "title": "Specific Job Title",
+    "fit_reasoning": "Why this career matches their interests and strengths specifically",
+    "singapore_demand": "High/Medium demand explanation with context",
+    "career_path": "Degree → Entry role → Mid-level → Senior progression",
+    "salary_range": {
+      "starting": "S$X,XXX - S$X,XXX/month",
+      "five_years": "S$X,XXX - S$X,XXX/month"
+    },
+    "key_skills": ["skill1", "skill2", "skill3", "skill4"],
+    "where_to_work": "Specific companies/sectors in Singapore",
+    "growth_potential": "Career advancement opportunities and trends"
+  }
+]
+"""
+
 class CareerGuidanceAgent(BaseAgent):
     name = "career_guidance"
     description = "Uses AI reasoning to provide personalized career guidance based on student profile and Singapore's job market"
+    consumes = ("institutional_data",)
+    # Budget never reaches the career prompt, so budget changes reuse cached guidance
+    cache_fields = ("interests", "strengths", "target_level", "constraints")
 
     def __init__(self, context):
         super().__init__(context)
@@ -15,60 +71,86 @@ class CareerGuidanceAgent(BaseAgent):
 
     def handle(self, profile: Any) -> Dict[str, Any]:
         """Provide intelligent career guidance using LLM reasoning"""
-        
+        request = self._prepare(profile)
+        if "result" in request:
+            return request["result"]
+        return self._finish(request, self.ask_llm(request["prompt"]))
+    
+    async def ahandle(self, profile: Any) -> Dict[str, Any]:
+        """Async handler - same as ``handle`` but the LLM call does not hold a thread"""
+        request = self._prepare(profile)
+        if "result" in request:
+            return request["result"]
+        return self._finish(request, await self.aask_llm(request["prompt"]))
+    
+    def _prepare(self, profile: Any) -> Dict[str, Any]:
+        """Career prompt for ``profile``, or the final ``result`` when no LLM call is needed"""
         interests = profile.get("interests", []) if isinstance(profile, dict) else (profile.interests or [])
         strengths = profile.get("strengths", []) if isinstance(profile, dict) else (profile.strengths or [])
         target_level = profile.get("target_level", "degree") if isinstance(profile, dict) else profile.target_level
         constraints = profile.get("constraints", []) if isinstance(profile, dict) else (profile.constraints or [])
         
-        # Get programs they're considering (if institutional_data ran before)
+        # Programs they're considering (filled in by the orchestrator from institutional_data)
         program_suggestions = profile.get("program_suggestions", [])
         
-        pass", interests, strengths)
-        
         if not interests:
-            return {
+            return {"result": {
                 "career_suggestions": [],
                 "message": "No interests provided for career guidance"
-            }
-        
-        # Use LLM to reason about career paths
-        career_paths = self._generate_career_insights(
-            interests, 
-            strengths, 
-            target_level,
-            constraints,
-            program_suggestions
-        )
+            }}
         
+        return {
+            "interests": interests,
+            "prompt": self._build_career_prompt(
+                interests, strengths, target_level, constraints, program_suggestions
+            ),
+        }
+    
+    def _finish(self, request: Dict[str, Any], response: Optional[str]) -> Dict[str, Any]:
+        """Payload from the LLM's answer (keyword-mapped careers when there is none)"""
+        career_paths = self._parse_career_response(response, request["interests"])
         return {
             "career_suggestions": career_paths[:5],
             "data_source": "ai_career_counseling",
             "reasoning_quality": "contextual_understanding"
         }
     
-    def _generate_career_insights(
+    def fallback(self, profile: Any) -> Dict[str, Any]:
+        """Keyword-mapped careers without the LLM step (used when over the time budget)"""
+        interests = profile.get("interests", []) if isinstance(profile, dict) else (profile.interests or [])
+        return {
+            "career_suggestions": self._fallback_career_suggestions(interests)[:5],
+            "data_source": "fallback_basic"
+        }
+
+    def cache_projection(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Profile fields plus the upstream program titles that end up in the prompt"""
+        projection = super().cache_projection(profile)
+        programs = profile.get("program_suggestions", [])[:3]
+        projection["programs"] = normalize_value([
+            p.get("title") or p.get("program", {}).get("program", "") for p in programs
+        ])
+        return projection
+
+    def _build_career_prompt(
         self,
         interests: List[str],
         strengths: List[str],
         target_level: str,
         constraints: List[str],
         program_suggestions: List[Dict]
-    ) -> List[Dict]:
-        """Use LLM to provide career counselor-level insights"""
-        
-        if not self.genai_client:
-            pass
-            return self._fallback_career_suggestions(interests)
-        
+    ) -> str:
+        """Career counselor prompt (shared instructions, then the profile and programs under consideration)"""
         # Build context about programs if available
         programs_context = ""
         if program_suggestions:
-            programs_list = [p.get("program", {}).get("program", "") for p in program_suggestions[:3]]
+            programs_list = [
+                p.get("title") or p.get("program", {}).get("program", "")
+                for p in program_suggestions[:3]
+            ]
             programs_context = f"\nStudent is considering these programs: {', '.join(programs_list)}"
         
-        career_prompt = f"""You are an expert career counselor specializing in Singapore's job market and education pathways.
-
+        suffix = f"""
 STUDENT PROFILE:
 - Interests: {', '.join(interests)}
 - Strengths: {', '.join(strengths)}
@@ -76,77 +158,15 @@ STUDENT PROFILE:
 - Constraints: {', '.join(constraints) if constraints else 'None'}
 {programs_context}
 
-YOUR TASK AS A CAREER COUNSELOR:
-Analyze this student's profile and suggest 5 career paths that:
-1. Align with their interests and strengths
-2. Are realistic given their education level
-3. Consider Singapore's job market (demand, growth, opportunities)
-4. Leverage Singapore's Smart Nation, FinTech hub, and tech sector strengths
-
-For each career path, provide:
-- **Career Title**: Specific job role (e.g., "AI Engineer" not just "Tech")
-- **Why It Fits**: 2-3 sentences explaining how their interests and strengths align
-- **Singapore Demand**: Current job market reality (high/medium demand, growing/stable)
-- **Typical Path**: How they get there (what degree → entry role → senior role)
-- **Salary Expectations**: Realistic Singapore salary ranges (starting → 5 years experience)
-- **Key Skills Needed**: 3-4 specific skills they should develop
-- **Companies/Sectors**: Where they'd work (specific Singapore companies, sectors, or government agencies)
-
-SINGAPORE CONTEXT TO CONSIDER:
-- Smart Nation initiatives (AI, data, digital transformation)
-- Financial hub status (banking, insurance, FinTech)
-- Regional MNC headquarters (Google, Meta, Microsoft, JP Morgan)
-- Tech unicorns (Grab, Sea Group, Shopee)
-- Government agencies (GovTech, MAS, DSTA, A*STAR)
-- Startups ecosystem
-- Healthcare, logistics, education sectors undergoing digital transformation
-
-IMPORTANT:
-- Be SPECIFIC. Don't say "good career prospects" - say "High demand: 500+ job openings monthly on LinkedIn for Data Scientists in Singapore"
-- Mention ACTUAL companies/agencies where possible
-- Give REALISTIC salary ranges (Singapore context: fresh grad vs 5 years)
-- Explain WHY their strengths matter for each career
-
-Return ONLY valid JSON array:
-[
-  {{
-    "title": "Specific Job Title",
-    "fit_reasoning": "Why this career matches their interests and strengths specifically",
-    "singapore_demand": "High/Medium demand explanation with context",
-    "career_path": "Degree → Entry role → Mid-level → Senior progression",
-    "salary_range": {{
-      "starting": "S$X,XXX - S$X,XXX/month",
-      "five_years": "S$X,XXX - S$X,XXX/month"
-    }},
-    "key_skills": ["skill1", "skill2", "skill3", "skill4"],
-    "where_to_work": "Specific companies/sectors in Singapore",
-    "growth_potential": "Career advancement opportunities and trends"
-  }}
-]
-
 JSON only, no explanations outside JSON:"""
-
-        try:
-            pass
-            
-            response = self.genai_client.summarize(career_prompt)
-            
-            if not response:
-                pass
-                return self._fallback_career_suggestions(interests)
-            
-            # Clean JSON response
-            response = response.strip()
-            if response.startswith("```"):
-                lines = response.split("\n")
-                response = "\n".join([l for l in lines if not l.strip().startswith("```")])
-            response = response.replace("```json", "").replace("```", "").strip()
-            
-            career_paths = json.loads(response)
-            
-            # Format for UI
-            formatted = []
-            for career in career_paths:
+        return CacheablePrompt(CAREER_INSTRUCTIONS, suffix)
+    
+    def _parse_career_response(self, response: Optional[str], interests: List[str]) -> List[Dict]:
+        """Turn the LLM's JSON answer into UI-ready career paths (keyword fallback on failure)"""
+        # Fences and trailing text are ignored; a truncated answer keeps its complete entries
+        formatted = []
+        for career in parse_json_array(response):
+            try:
                 formatted.append({
                     "title": career["title"],
                     "description": career["fit_reasoning"],
@@ -160,17 +180,9 @@ JSON only, no explanations outside JSON:"""
                     "career_path": career.get("career_path", ""),
                     "reasoning_type": "ai_career_counseling"
                 })
-            
-            pass)
-            return formatted
-            
-        except json.JSONDecodeError:
-            pass
-            pass
-            return self._fallback_career_suggestions(interests)
-        except Exception:
-            pass
-            return self._fallback_career_suggestions(interests)
+            except (KeyError, TypeError, AttributeError):
+                continue  # skip a malformed entry, keep the rest
+        return formatted or self._fallback_career_suggestions(interests)
     
     def _fallback_career_suggestions(self, interests: List[str]) -> List[Dict]:
         """Simple fallback if LLM fails"""
@@ -1,10 +1,54 @@
 import json
 import logging
 import os
-from typing import Dict, Any, List
-from .base import BaseAgent
+from typing import Dict, Any, List, Optional
+from .base import BaseAgent, normalize_value
+from src.services.context_cache import CacheablePrompt
+from src.services.json_stream import parse_json_array
 
 logger = logging.getLogger(__name__)
+
+# Prompt prefix common to all students (profile and options follow it)
+AID_INSTRUCTIONS = """You are an expert financial aid counselor in Singapore, helping students understand and access education funding.
+
+YOUR TASK AS A FINANCIAL AID COUNSELOR:
+You will be given a student profile and the financial aid options they are eligible for. Analyze these options and recommend the best ones for this student. For each recommendation:
+
+1. **Priority Ranking**: Which should they apply for FIRST (highest impact, easiest to get)
+2. **Why It Fits**: Explain why this aid option matches their situation
+3. **Expected Benefit**: How much money this saves them (be specific)
+4. **Application Strategy**: Practical advice on applying
+5. **Combination Strategy**: Can they stack this with other aid?
+
+IMPORTANT CONSIDERATIONS:
+- Budget category indicates financial need level
+- Some aid can be combined (e.g., MOE Bursary + University Bursary)
+- Some aid is automatic (like MOE Tuition Grant for citizens)
+- Some require extensive applications (scholarships)
+- Bond requirements matter for career planning
+- Loans should be last resort, mention alternatives first
+
+PRIORITIZATION RULES:
+1. Free money (grants/bursaries) > Loans
+2. Automatic/easy to get > Complex applications
+3. No bond > Bond requirements
+4. Higher amounts > Lower amounts (when effort is similar)
+5. Need-based for tight budget, merit-based for others
+
+Return ONLY valid JSON array, sorted by priority (most important first):
+[
+  {
+    "name": "Aid option name",
+    "priority": "High/Medium/Low",
+    "fit_reasoning": "Why this matches their situation specifically",
+    "expected_benefit": "Specific amount saved or received (S$X,XXX)",
+    "application_difficulty": "Easy/Moderate/Challenging",
+    "application_advice": "Practical steps to apply successfully",
+    "combination_strategy": "Can stack with [other aid names] for total of S$X,XXX",
+    "important_notes": "Any critical information (deadlines, bond, requirements)"
+  }
+]
+"""
 class FinancialAidAgent(BaseAgent):
     name = "financial_aid"
     description = "Uses AI reasoning with curated financial aid database to provide personalized scholarship and funding recommendations"
@@ -22,14 +66,27 @@ class FinancialAidAgent(BaseAgent):
             with open(aid_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 self.aid_options = data['financial_aid_options']
-            pass)
+            pass
         except Exception:
             pass
             self.aid_options = []
 
     def handle(self, profile: Any) -> Dict[str, Any]:
         """Provide intelligent financial aid recommendations using LLM reasoning"""
-        
+        request = self._prepare(profile)
+        if "result" in request:
+            return request["result"]
+        return self._finish(request, self.ask_llm(request["prompt"]))
+    
+    async def ahandle(self, profile: Any) -> Dict[str, Any]:
+        """Async handler - same as ``handle`` but the LLM call does not hold a thread"""
+        request = self._prepare(profile)
+        if "result" in request:
+            return request["result"]
+        return self._finish(request, await self.aask_llm(request["prompt"]))
+    
+    def _prepare(self, profile: Any) -> Dict[str, Any]:
+        """Aid prompt for ``profile``'s eligible options, or the final ``result`` when no LLM call is needed"""
         budget_category = profile.get("budget_category", "moderate") if isinstance(profile, dict) else profile.budget_category
         interests = profile.get("interests", []) if isinstance(profile, dict) else (profile.interests or [])
         target_level = profile.get("target_level", "degree") if isinstance(profile, dict) else profile.target_level
@@ -38,45 +95,65 @@ class FinancialAidAgent(BaseAgent):
         # Extract citizenship if available from constraints/profile
         citizenship = self._extract_citizenship(constraints, profile)
         
-        pass",
-            budget_category,
-            citizenship,
-            target_level,
-        )
-        
         if not self.aid_options:
-            return {
+            return {"result": {
                 "aid_options": [],
                 "message": "Financial aid database not available"
-            }
+            }}
         
         # Filter aid options by eligibility
         eligible_options = self._filter_by_eligibility(citizenship, target_level, budget_category)
         
         if not eligible_options:
-            return {
+            return {"result": {
                 "aid_options": [],
                 "message": "No matching financial aid options found for your profile"
-            }
-        
-        pass)
-        
-        # Use LLM to reason about which options best fit the student
-        recommendations = self._generate_aid_recommendations(
-            eligible_options,
-            budget_category,
-            citizenship,
-            target_level,
-            interests,
-            constraints
-        )
+            }}
         
+        # The LLM reasons about which options best fit the student
+        return {
+            "eligible_options": eligible_options,
+            "budget_category": budget_category,
+            "prompt": self._build_aid_prompt(
+                eligible_options, budget_category, citizenship, target_level, interests, constraints
+            ),
+        }
+    
+    def _finish(self, request: Dict[str, Any], response: Optional[str]) -> Dict[str, Any]:
+        """Payload from the LLM's answer (rule-based ranking when there is none)"""
+        eligible_options = request["eligible_options"]
+        recommendations = self._parse_aid_response(response, eligible_options, request["budget_category"])
         return {
             "aid_options": recommendations[:6],  # Top 6 recommendations
             "data_source": "ai_financial_counseling",
             "total_eligible": len(eligible_options)
         }
     
+    def fallback(self, profile: Any) -> Dict[str, Any]:
+        """Rule-based aid ranking without the LLM step (used when over the time budget)"""
+        budget_category = profile.get("budget_category", "moderate") if isinstance(profile, dict) else profile.budget_category
+        target_level = profile.get("target_level", "degree") if isinstance(profile, dict) else profile.target_level
+        constraints = profile.get("constraints", []) if isinstance(profile, dict) else (profile.constraints or [])
+        citizenship = self._extract_citizenship(constraints, profile)
+        
+        eligible_options = self._filter_by_eligibility(citizenship, target_level, budget_category)
+        return {
+            "aid_options": self._fallback_ranking(eligible_options, budget_category)[:6],
+            "data_source": "fallback_simple_ranking",
+            "total_eligible": len(eligible_options)
+        }
+    
+    def cache_projection(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Eligibility inputs plus interests and constraints (the aid prompt quotes the constraints verbatim)"""
+        constraints = profile.get("constraints") or []
+        return {
+            "budget_category": normalize_value(profile.get("budget_category")),
+            "citizenship": self._extract_citizenship(constraints, profile),
+            "target_level": normalize_value(profile.get("target_level")),
+            "interests": normalize_value(profile.get("interests") or []),
+            "constraints": normalize_value(constraints),
+        }
+    
     def _extract_citizenship(self, constraints: List[str], profile: Dict) -> str:
         """Extract citizenship status from profile"""
         # Check if citizenship mentioned in constraints
@@ -119,7 +196,7 @@ class FinancialAidAgent(BaseAgent):
         
         return eligible
     
-    def _generate_aid_recommendations(
+    def _build_aid_prompt(
         self,
         eligible_options: List[Dict],
         budget_category: str,
@@ -127,13 +204,8 @@ class FinancialAidAgent(BaseAgent):
         target_level: str,
         interests: List[str],
         constraints: List[str]
-    ) -> List[Dict]:
-        """Use LLM to provide counselor-level insights about financial aid"""
-        
-        if not self.genai_client:
-            pass
-            return self._fallback_ranking(eligible_options, budget_category)
-        
+    ) -> str:
+        """Financial aid counselor prompt (shared instructions, then the profile and eligible options)"""
         # Prepare aid options for LLM
         aid_summaries = []
         for aid in eligible_options:
@@ -148,8 +220,7 @@ class FinancialAidAgent(BaseAgent):
                 "singapore_context": aid.get("singapore_context", "")
             })
         
-        aid_prompt = f"""You are an expert financial aid counselor in Singapore, helping students understand and access education funding.
-
+        suffix = f"""
 STUDENT PROFILE:
 - Budget Category: {budget_category}
 - Citizenship: {citizenship}
@@ -160,67 +231,20 @@ STUDENT PROFILE:
 AVAILABLE FINANCIAL AID OPTIONS:
 {json.dumps(aid_summaries, indent=2)}
 
-YOUR TASK AS A FINANCIAL AID COUNSELOR:
-Analyze these financial aid options and recommend the best ones for this student. For each recommendation:
-
-1. **Priority Ranking**: Which should they apply for FIRST (highest impact, easiest to get)
-2. **Why It Fits**: Explain why this aid option matches their situation
-3. **Expected Benefit**: How much money this saves them (be specific)
-4. **Application Strategy**: Practical advice on applying
-5. **Combination Strategy**: Can they stack this with other aid?
-
-IMPORTANT CONSIDERATIONS:
-- Budget category indicates financial need level
-- Some aid can be combined (e.g., MOE Bursary + University Bursary)
-- Some aid is automatic (like MOE Tuition Grant for citizens)
-- Some require extensive applications (scholarships)
-- Bond requirements matter for career planning
-- Loans should be last resort, mention alternatives first
-
-PRIORITIZATION RULES:
-1. Free money (grants/bursaries) > Loans
-2. Automatic/easy to get > Complex applications
-3. No bond > Bond requirements
-4. Higher amounts > Lower amounts (when effort is similar)
-5. Need-based for tight budget, merit-based for others
-
-Return ONLY valid JSON array, sorted by priority (most important first):
-[
-  {{
-    "name": "Aid option name",
-    "priority": "High/Medium/Low",
-    "fit_reasoning": "Why this matches their situation specifically",
-    "expected_benefit": "Specific amount saved or received (S$X,XXX)",
-    "application_difficulty": "Easy/Moderate/Challenging",
-    "application_advice": "Practical steps to apply successfully",
-    "combination_strategy": "Can stack with [other aid names] for total of S$X,XXX",
-    "important_notes": "Any critical information (deadlines, bond, requirements)"
-  }}
-]
-
 JSON only, no explanations outside JSON:"""
-
-        try:
-            pass
-            
-            response = self.genai_client.summarize(aid_prompt)
-            
-            if not response:
-                pass
-                return self._fallback_ranking(eligible_options, budget_category)
-            
-            # Clean JSON response
-            response = response.strip()
-            if response.startswith("```"):
-                lines = response.split("\n")
-                response = "\n".join([l for l in lines if not l.strip().startswith("```")])
-            response = response.replace("```json", "").replace("```", "").strip()
-            
-            recommendations = json.loads(response)
-            
-            # Enrich with full aid data
-            formatted = []
-            for rec in recommendations:
+        return CacheablePrompt(AID_INSTRUCTIONS, suffix)
+    
+    def _parse_aid_response(
+        self,
+        response: Optional[str],
+        eligible_options: List[Dict],
+        budget_category: str
+    ) -> List[Dict]:
+        """Turn the LLM's JSON answer into UI-ready aid options (rule-based ranking on failure)"""
+        # Fences and trailing text are ignored; a truncated answer keeps its complete entries
+        formatted = []
+        for rec in parse_json_array(response):
+            try:
                 # Find the full aid data
                 full_aid = next((a for a in eligible_options if a["name"] == rec["name"]), None)
                 if not full_aid:
@@ -242,17 +266,9 @@ JSON only, no explanations outside JSON:"""
                     "bond_requirement": full_aid.get("bond_requirement", "None"),
                     "reasoning_type": "ai_financial_counseling"
                 })
-            
-            pass)
-            return formatted
-            
-        except json.JSONDecodeError:
-            pass
-            pass
-            return self._fallback_ranking(eligible_options, budget_category)
-        except Exception:
-            pass
-            return self._fallback_ranking(eligible_options, budget_category)
+            except (KeyError, TypeError, AttributeError):
+                continue  # skip a malformed entry, keep the rest
+        return formatted or self._fallback_ranking(eligible_options, budget_category)
     
     def _fallback_ranking(self, eligible_options: List[Dict], budget_category: str) -> List[Dict]:
         """Simple ranking if LLM fails"""
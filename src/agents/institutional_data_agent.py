@@ -1,13 +1,56 @@
+import asyncio
 import json
 import os
-from typing import Dict, Any, List
-from .base import BaseAgent
+from typing import Dict, Any, List, Optional
+from .base import BaseAgent, partial_listener
+from src.services.context_cache import CacheablePrompt
+from src.services.json_stream import iter_json_array, parse_json_array
+
+# Instructions shared by every counselor prompt; sent first so the provider can cache them
+COUNSELOR_INSTRUCTIONS = """You are an expert education counselor in Singapore with deep knowledge of the local education system, job market, and Smart Nation initiatives.
+
+YOUR TASK AS AN EDUCATION COUNSELOR:
+You will be given a student profile and a list of programs. Analyze each program and provide counselor-level insights. For each program, reason about:
+
+1. **Fit Analysis**: How well does this program match the student's interests and strengths?
+2. **Career Alignment**: Does this lead to careers the student would find fulfilling?
+3. **Singapore Context**: How does this program position the student in Singapore's job market and Smart Nation goals?
+4. **Financial Fit**: Consider the budget category and available tuition options
+5. **Requirements Match**: Can this student reasonably meet the admission requirements given their profile?
+6. **Unique Value**: What makes this program special for THIS PARTICULAR STUDENT?
+
+Return a JSON array of recommendations, sorted by overall fit (best first):
+
+[
+  {
+    "program_name": "exact program name",
+    "institution": "institution name",
+    "fit_score": 0.0-1.0,
+    "counselor_reasoning": "2-3 sentences explaining WHY this matches the student's unique situation. Be specific about their interests and strengths.",
+    "career_insights": "What career paths this opens and why they align with student's goals",
+    "singapore_advantage": "How this program positions student in Singapore's context",
+    "financial_note": "Brief note about affordability based on budget category",
+    "what_student_should_know": "Important information about requirements, challenges, or opportunities",
+    "url": "program url"
+  }
+]
+
+BE SPECIFIC. Avoid generic statements like "this program is good". Instead: "Your strength in analytical thinking aligns perfectly with this program's emphasis on data-driven decision making, and your interest in AI finds direct application in..."
+
+Consider Singapore-specific factors:
+- Smart Nation AI/FinTech initiatives
+- Local job market demand (tech sector, financial hub status)
+- Government schemes (SkillsFuture, MOE grants)
+- Regional MNC presence
+"""
 
 
 
 class InstitutionalDataAgent(BaseAgent):
     name = "institutional_data"
     description = "Uses AI reasoning with curated program database to provide intelligent, personalized program recommendations"
+    provides = ("program_suggestions",)
+    cache_fields = ("interests", "strengths", "target_level", "constraints", "budget_category")
 
     def __init__(self, context):
         super().__init__(context)
@@ -94,58 +137,91 @@ class InstitutionalDataAgent(BaseAgent):
 
     def handle(self, profile: Any) -> Dict[str, Any]:
         """Main handler - uses vector search + LLM reasoning for recommendations"""
+        request = self._prepare(profile)
+        if "result" in request:
+            return request["result"]
+        return self._finish(request, self._ask_counselor(request))
+    
+    async def ahandle(self, profile: Any) -> Dict[str, Any]:
+        """Async handler - same as ``handle`` but the LLM call does not hold a thread"""
+        # Query embedding may be a (short) Vertex call - keep it off the event loop
+        request = await asyncio.to_thread(self._prepare, profile)
+        if "result" in request:
+            return request["result"]
+        return self._finish(request, await self.aask_llm(request["prompt"]))
+    
+    def _prepare(self, profile: Any) -> Dict[str, Any]:
+        """Counselor prompt for the programs matching ``profile``, or the final ``result`` when no LLM call is needed"""
         interests = profile.get("interests", []) if isinstance(profile, dict) else (profile.interests or [])
         strengths = profile.get("strengths", []) if isinstance(profile, dict) else (profile.strengths or [])
         target_level = profile.get("target_level", "degree") if isinstance(profile, dict) else profile.target_level
         constraints = profile.get("constraints", []) if isinstance(profile, dict) else (profile.constraints or [])
         budget_category = profile.get("budget_category", "moderate") if isinstance(profile, dict) else "moderate"
         
-        pass
-        pass
-        
-        
-        
-        
-        pass
-        
         # Check if programs are loaded
         if not self.vector_store._items:
             pass
-            return {
+            return {"result": {
                 "programs": [],
                 "data_source": "error",
                 "message": "Program database failed to load. Check logs for singapore_programs.json."
-            }
+            }}
         
         # Step 1: Semantic search to find relevant programs
         relevant_programs = self._semantic_search_programs(interests, strengths, target_level, constraints)
         
         if not relevant_programs:
             pass
-            return {
+            return {"result": {
                 "programs": [],
                 "data_source": "curated_database",
                 "message": "No programs match the specified criteria"
-            }
-        
-        pass
+            }}
         
-        # Step 2: Use LLM to REASON about fit and provide counselor-level insights
-        recommendations = self._generate_ai_counselor_insights(
-            relevant_programs, 
-            interests, 
-            strengths, 
-            target_level,
-            constraints,
-            budget_category
+        # Step 2: the LLM REASONS about fit and provides counselor-level insights
+        programs_for_analysis = self._programs_for_analysis(relevant_programs)
+        return {
+            "program_results": relevant_programs,
+            "programs_for_analysis": programs_for_analysis,
+            "target_level": target_level,
+            "prompt": self._build_counselor_prompt(
+                programs_for_analysis, interests, strengths, target_level, constraints, budget_category
+            ),
+        }
+    
+    def _finish(self, request: Dict[str, Any], response: Optional[str]) -> Dict[str, Any]:
+        """Payload from the LLM's answer (semantic ranking when there is none)"""
+        program_results = request["program_results"]
+        recommendations = self._parse_counselor_response(
+            response, request["programs_for_analysis"], request["target_level"], program_results
         )
-        
         return {
             "programs": recommendations[:5],  # UI expects "programs"
             "data_source": "ai_counselor_reasoning" if recommendations else "fallback_simple_ranking",
-            "total_programs_analyzed": len(relevant_programs)
+            "total_programs_analyzed": len(program_results)
         }
     
+    def fallback(self, profile: Any) -> Dict[str, Any]:
+        """Semantic-search ranking without the LLM step (used when over the time budget)"""
+        interests = profile.get("interests", []) if isinstance(profile, dict) else (profile.interests or [])
+        strengths = profile.get("strengths", []) if isinstance(profile, dict) else (profile.strengths or [])
+        target_level = profile.get("target_level", "degree") if isinstance(profile, dict) else profile.target_level
+        constraints = profile.get("constraints", []) if isinstance(profile, dict) else (profile.constraints or [])
+        
+        if not self.vector_store._items:
+            return {"programs": [], "data_source": "error"}
+        
+        relevant_programs = self._semantic_search_programs(interests, strengths, target_level, constraints)
+        return {
+            "programs": self._fallback_simple_ranking(relevant_programs)[:5],
+            "data_source": "fallback_simple_ranking",
+            "total_programs_analyzed": len(relevant_programs)
+        }
+
+    def contribute(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Expose ranked programs to downstream agents (career guidance)"""
+        return {"program_suggestions": payload.get("programs", [])}
+
     def _semantic_search_programs(
         self, 
         interests: List[str], 
@@ -196,26 +272,36 @@ class InstitutionalDataAgent(BaseAgent):
         
         return filtered_results[:8]  # Top 8 for LLM analysis
     
-    def _generate_ai_counselor_insights(
-        self,
-        program_results: List[Dict],
-        interests: List[str],
-        strengths: List[str],
-        target_level: str,
-        constraints: List[str],
-        budget_category: str
-    ) -> List[Dict]:
-        """
-        Use LLM to reason like an education counselor.
-        This is where REAL AI intelligence happens - understanding context, 
-        reasoning about fit, providing insights.
-        """
+    def _ask_counselor(self, request: Dict[str, Any]) -> Optional[str]:
+        """Blocking LLM call for ``request``, streamed when a caller consumes partial results"""
+        # Streaming trades the client's hedging and mid-call model failover for early output,
+        # so it is only worth it when someone is consuming partial results
+        if partial_listener.get() is not None and hasattr(self.genai_client, "summarize_stream"):
+            return self._stream_counselor_response(request)
+        return self.ask_llm(request["prompt"])
+    
+    def _stream_counselor_response(self, request: Dict[str, Any]) -> Optional[str]:
+        """Stream the LLM's answer, reporting each recommendation as soon as it is complete"""
+        received: List[str] = []
         
-        if not self.genai_client:
-            pass
-            return self._fallback_simple_ranking(program_results)
+        def chunks():
+            for chunk in self.genai_client.summarize_stream(request["prompt"]):
+                received.append(chunk)
+                yield chunk
         
-        # Prepare comprehensive program data for LLM
+        try:
+            for rec in iter_json_array(chunks()):
+                item = self._format_recommendation(rec, request["programs_for_analysis"], request["target_level"])
+                if item is not None:
+                    # The UI can show the best match while the rest is still being generated
+                    self.emit_partial(item)
+        except Exception:
+            pass
+        # A stream cut short keeps the recommendations that did arrive
+        return "".join(received)
+    
+    def _programs_for_analysis(self, program_results: List[Dict]) -> List[Dict]:
+        """Prepare comprehensive program data for LLM"""
         programs_for_analysis = []
         for result in program_results:
             prog_data = result['program']['full_data']
@@ -233,10 +319,19 @@ class InstitutionalDataAgent(BaseAgent):
                 "url": prog_data['url'],
                 "semantic_match_score": result['score']
             })
-        
-        # Build counselor-level reasoning prompt
-        counselor_prompt = f"""You are an expert education counselor in Singapore with deep knowledge of the local education system, job market, and Smart Nation initiatives.
-
+        return programs_for_analysis
+    
+    def _build_counselor_prompt(
+        self,
+        programs_for_analysis: List[Dict],
+        interests: List[str],
+        strengths: List[str],
+        target_level: str,
+        constraints: List[str],
+        budget_category: str
+    ) -> str:
+        """Build counselor-level reasoning prompt: shared instructions first, then this student's data"""
+        suffix = f"""
 STUDENT PROFILE:
 - Interests: {', '.join(interests)}
 - Strengths: {', '.join(strengths)}
@@ -247,92 +342,50 @@ STUDENT PROFILE:
 AVAILABLE PROGRAMS (already pre-filtered by semantic relevance):
 {json.dumps(programs_for_analysis, indent=2)}
 
-YOUR TASK AS AN EDUCATION COUNSELOR:
-Analyze each program and provide counselor-level insights. For each program, reason about:
-
-1. **Fit Analysis**: How well does this program match the student's interests and strengths?
-2. **Career Alignment**: Does this lead to careers the student would find fulfilling?
-3. **Singapore Context**: How does this program position the student in Singapore's job market and Smart Nation goals?
-4. **Financial Fit**: Consider the budget category and available tuition options
-5. **Requirements Match**: Can this student reasonably meet the admission requirements given their profile?
-6. **Unique Value**: What makes this program special for THIS PARTICULAR STUDENT?
-
-Return a JSON array of recommendations, sorted by overall fit (best first):
-
-[
-  {{
-    "program_name": "exact program name",
-    "institution": "institution name",
-    "fit_score": 0.0-1.0,
-    "counselor_reasoning": "2-3 sentences explaining WHY this matches the student's unique situation. Be specific about their interests and strengths.",
-    "career_insights": "What career paths this opens and why they align with student's goals",
-    "singapore_advantage": "How this program positions student in Singapore's context",
-    "financial_note": "Brief note about affordability based on budget category",
-    "what_student_should_know": "Important information about requirements, challenges, or opportunities",
-    "url": "program url"
-  }}
-]
-
-BE SPECIFIC. Avoid generic statements like "this program is good". Instead: "Your strength in analytical thinking aligns perfectly with this program's emphasis on data-driven decision making, and your interest in AI finds direct application in..."
-
-Consider Singapore-specific factors:
-- Smart Nation AI/FinTech initiatives
-- Local job market demand (tech sector, financial hub status)
-- Government schemes (SkillsFuture, MOE grants)
-- Regional MNC presence
-
 Return ONLY valid JSON array, no explanations outside the JSON:"""
-
+        return CacheablePrompt(COUNSELOR_INSTRUCTIONS, suffix)
+    
+    def _parse_counselor_response(
+        self,
+        response: Optional[str],
+        programs_for_analysis: List[Dict],
+        target_level: str,
+        program_results: List[Dict]
+    ) -> List[Dict]:
+        """Turn the LLM's JSON answer into UI-ready recommendations (semantic ranking on failure)"""
+        # Fences and trailing text are ignored; a truncated answer keeps its complete recommendations
+        formatted = []
+        for rec in parse_json_array(response):
+            item = self._format_recommendation(rec, programs_for_analysis, target_level)
+            if item is not None:
+                formatted.append(item)
+        return formatted or self._fallback_simple_ranking(program_results)
+    
+    def _format_recommendation(
+        self, rec: Any, programs_for_analysis: List[Dict], target_level: str
+    ) -> Optional[Dict]:
+        """One LLM recommendation in the UI's flat format (None if it is malformed)"""
         try:
-            pass
-            
-            response = self.genai_client.summarize(counselor_prompt)
-            
-            if not response:
-                pass
-                return self._fallback_simple_ranking(program_results)
-            
-            # Clean JSON response
-            response = response.strip()
-            if response.startswith("```"):
-                lines = response.split("\n")
-                response = "\n".join([l for l in lines if not l.strip().startswith("```")])
-            response = response.replace("```json", "").replace("```", "").strip()
-            
-            recommendations = json.loads(response)
-            
-            # Format for UI - flat structure
-            formatted = []
-            for rec in recommendations:
-                # Find full program data
-                full_prog = next((p for p in programs_for_analysis if p['program_name'] == rec['program_name']), None)
-                
-                formatted.append({
-                    "title": rec['program_name'],
-                    "institution": rec['institution'],
-                    "level": target_level,
-                    "duration": full_prog.get('duration', 'N/A') if full_prog else 'N/A',
-                    "field": full_prog.get('field', '') if full_prog else '',
-                    "fit_reasoning": rec['counselor_reasoning'],
-                    "career_alignment": rec.get('career_insights', ''),
-                    "singapore_context": rec.get('singapore_advantage', ''),
-                    "financial_fit": rec.get('financial_note', ''),
-                    "academic_requirements": full_prog.get('academic_requirements', '') if full_prog else '',
-                    "tuition_fees": full_prog.get('tuition_fees', {}) if full_prog else {},
-                    "career_outcomes": full_prog.get('career_outcomes', {}) if full_prog else {},
-                    "reasoning_type": "ai_counselor_reasoning"
-                })
+            # Find full program data
+            full_prog = next((p for p in programs_for_analysis if p['program_name'] == rec['program_name']), None)
             
-            pass
-            return formatted
-            
-        except json.JSONDecodeError:
-            pass
-            pass
-            return self._fallback_simple_ranking(program_results)
-        except Exception:
-            pass
-            return self._fallback_simple_ranking(program_results)
+            return {
+                "title": rec['program_name'],
+                "institution": rec['institution'],
+                "level": target_level,
+                "duration": full_prog.get('duration', 'N/A') if full_prog else 'N/A',
+                "field": full_prog.get('field', '') if full_prog else '',
+                "fit_reasoning": rec['counselor_reasoning'],
+                "career_alignment": rec.get('career_insights', ''),
+                "singapore_context": rec.get('singapore_advantage', ''),
+                "financial_fit": rec.get('financial_note', ''),
+                "academic_requirements": full_prog.get('academic_requirements', '') if full_prog else '',
+                "tuition_fees": full_prog.get('tuition_fees', {}) if full_prog else {},
+                "career_outcomes": full_prog.get('career_outcomes', {}) if full_prog else {},
+                "reasoning_type": "ai_counselor_reasoning"
+            }
+        except (KeyError, TypeError, AttributeError):
+            return None
     
     def _fallback_simple_ranking(self, program_results: List[Dict]) -> List[Dict]:
         """Fallback if LLM reasoning fails - just return by semantic match score"""
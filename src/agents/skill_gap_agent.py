@@ -36,6 +36,8 @@ _SKILL_MATRIX = {
 class SkillGapAgent(BaseAgent):
     name = "skill_gap"
     description = "Identifies missing skills from real program requirements and suggests resources"
+    consumes = ("web_search",)
+    cache_fields = ("interests", "strengths", "web_search_data")
 
     def handle(self, profile: Any) -> Dict[str, Any]:
         interests: List[str] = profile.get("interests", []) if isinstance(profile, dict) else (profile.interests or [])
@@ -48,7 +50,7 @@ class SkillGapAgent(BaseAgent):
         
         # Extract skill requirements from web search results
         if web_search_data:
-            pass} web search results for skill requirements")
+            pass
             all_required_skills = set()
             
             for result in web_search_data[:5]:
@@ -16,6 +16,10 @@ class WebSearchAgent(BaseAgent):
     
     Uses Google Custom Search JSON API which respects robots.txt and site preferences.
     """
+    name = "web_search"
+    description = "Searches Singapore university websites for supplementary course information"
+    provides = ("web_search_context", "web_search_data")
+    cache_fields = ("interests", "target_level")
     
     def __init__(self, context):
         super().__init__(context)
@@ -149,7 +153,7 @@ class WebSearchAgent(BaseAgent):
             return results
             
         except Exception as e:
-            self.pass}")
+            pass
             return []
     
     def _deduplicate_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -205,7 +209,7 @@ Keep it practical and actionable."""
             return response.strip() if response else ""
             
         except Exception as e:
-            self.pass}")
+            pass
             return ""
     
     def handle(self, profile: Dict[str, Any]) -> Dict[str, Any]:
@@ -213,3 +217,12 @@ Keep it practical and actionable."""
         BaseAgent abstract method implementation - delegates to run()
         """
         return self.run(profile)
+
+    def contribute(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Supplementary context for downstream agents (only when the search returned results)"""
+        if not payload.get("search_results"):
+            return {}
+        return {
+            "web_search_context": payload.get("llm_summary", ""),
+            "web_search_data": payload.get("search_results", []),
+        }
@@ -0,0 +1,77 @@
+"""
+Dependency graph over the enabled agents.
+
+Agents declare the upstream agents they read (``consumes``) and the profile keys
+they hand to downstream agents (``provides``). The orchestrator builds an
+AgentGraph from those declarations and starts every agent as soon as its
+dependencies have finished.
+"""
+from typing import Any, Dict, List, Sequence
+
+
+class AgentGraph:
+    """DAG of agents keyed by agent name, in enabled order."""
+
+    def __init__(self, agents: Sequence[Any]):
+        self.agents: Dict[str, Any] = {agent.name: agent for agent in agents}
+        self.order: List[str] = [agent.name for agent in agents]
+        # Dependencies on agents that are not enabled are dropped, so an agent still runs standalone
+        self.dependencies: Dict[str, List[str]] = {
+            name: [dep for dep in getattr(agent, "consumes", ()) if dep in self.agents and dep != name]
+            for name, agent in self.agents.items()
+        }
+        self.dependents: Dict[str, List[str]] = {name: [] for name in self.order}
+        for name in self.order:
+            for dep in self.dependencies[name]:
+                self.dependents[dep].append(name)
+        self._levels = self._compute_levels()
+
+    def _compute_levels(self) -> List[List[str]]:
+        """Group agents into waves; every agent in a wave only depends on earlier waves."""
+        level_of: Dict[str, int] = {}
+        levels: List[List[str]] = []
+        remaining = list(self.order)
+        while remaining:
+            wave = [name for name in remaining if all(dep in level_of for dep in self.dependencies[name])]
+            if not wave:
+                raise ValueError(f"Agent dependency cycle detected among: {', '.join(remaining)}")
+            for name in wave:
+                level_of[name] = len(levels)
+            levels.append(wave)
+            remaining = [name for name in remaining if name not in level_of]
+        return levels
+
+    def levels(self) -> List[List[str]]:
+        return [list(wave) for wave in self._levels]
+
+    def topological_order(self) -> List[str]:
+        return [name for wave in self._levels for name in wave]
+
+    def ready(self, finished: Sequence[str]) -> List[str]:
+        """Agents whose dependencies are all in ``finished`` (excluding finished ones)."""
+        done = set(finished)
+        return [
+            name for name in self.order
+            if name not in done and all(dep in done for dep in self.dependencies[name])
+        ]
+
+    def describe(self) -> Dict[str, Any]:
+        """Debug view of the graph: nodes with their declarations, edges and execution waves."""
+        level_of = {name: idx for idx, wave in enumerate(self._levels) for name in wave}
+        nodes = []
+        for name in self.order:
+            agent = self.agents[name]
+            nodes.append({
+                "name": name,
+                "consumes": list(getattr(agent, "consumes", ())),
+                "provides": list(getattr(agent, "provides", ())),
+                "depends_on": list(self.dependencies[name]),
+                "level": level_of[name],
+            })
+        edges = [[dep, name] for name in self.order for dep in self.dependencies[name]]
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "levels": self.levels(),
+            "critical_path_length": len(self._levels),
+        }
@@ -0,0 +1,133 @@
+"""
+Circuit breakers for LLM models.
+
+Each model in the fallback chain gets a breaker. After ``failure_threshold``
+consecutive failures (errors or empty responses) the breaker opens and calls skip
+that model. Once the backoff elapses a single probe call is let through
+(half-open): success closes the breaker, failure reopens it with the backoff
+doubled up to ``max_reset_seconds``. A regional outage then costs one probe per
+backoff window instead of a timeout on every request.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker with exponential backoff."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 2,
+        reset_seconds: float = 30.0,
+        max_reset_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = reset_seconds
+        self.max_reset_seconds = max(reset_seconds, max_reset_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._backoff = reset_seconds
+        self._open_until = 0.0
+        self._probe_started: Optional[float] = None
+        self._opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to this model now (half-open admits one probe at a time)."""
+        with self._lock:
+            now = self._clock()
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and now >= self._open_until:
+                self._state = HALF_OPEN
+                self._probe_started = None
+            if self._state == HALF_OPEN:
+                # A probe that never reported back (e.g. abandoned thread) is retried after a backoff
+                if self._probe_started is None or now - self._probe_started >= self._backoff:
+                    self._probe_started = now
+                    return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._backoff = self.reset_seconds
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._state == HALF_OPEN:
+                self._backoff = min(self._backoff * 2, self.max_reset_seconds)
+                self._trip(now)
+                return
+            self._failures += 1
+            if self._state == CLOSED and self._failures >= self.failure_threshold:
+                self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._open_until = now + self._backoff
+        self._probe_started = None
+        self._opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "backoff_seconds": self._backoff,
+                "retry_in_seconds": round(max(0.0, self._open_until - self._clock()), 2) if self._state == OPEN else 0.0,
+                "opened": self._opened,
+                "rejected": self._rejected,
+            }
+
+
+class BreakerRegistry:
+    """Breakers created on demand per key (e.g. ``("vertex", model)``) with shared settings."""
+
+    def __init__(self, **settings: Any):
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._breakers: Dict[Hashable, CircuitBreaker] = {}
+
+    def get(self, key: Hashable) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(**self._settings)
+            return breaker
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {"/".join(str(part) for part in key) if isinstance(key, tuple) else str(key): b.stats()
+                for key, b in breakers.items()}
+
+
+_registries: Dict[str, BreakerRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def shared_breakers(name: str, **settings: Any) -> BreakerRegistry:
+    """Process-wide registry for ``name``; the first caller's settings apply."""
+    with _registries_lock:
+        registry = _registries.get(name)
+        if registry is None:
+            registry = _registries[name] = BreakerRegistry(**settings)
+        return registry
@@ -0,0 +1,169 @@
+"""
+Process-wide concurrency limiter for outbound LLM calls.
+
+Threads (``slot``) and coroutines (``aslot``) draw from the same pool of slots,
+so agent threads, deferred summaries and ``Orchestrator.arun`` callers share one
+cap on in-flight requests. Waiters are served first-come first-served, and the
+time spent queueing for a slot is recorded.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Iterator, AsyncIterator, Optional
+
+
+class ConcurrencyLimiter:
+    """FIFO semaphore usable from both threads and asyncio tasks, with queue-wait stats."""
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # Each waiter is a threading.Event (thread) or an _AsyncWaiter (coroutine)
+        self._waiters: Deque[Any] = deque()
+        self._acquired = 0
+        self._queued = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._peak_waiting = 0
+
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self._acquired += 1
+            if waited > 0:
+                self._queued += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def _try_acquire(self, waiter: Any) -> bool:
+        """Take a slot now, or enqueue ``waiter``; call with the lock held."""
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return True
+        self._waiters.append(waiter)
+        self._peak_waiting = max(self._peak_waiting, len(self._waiters))
+        return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        start = time.monotonic()
+        event = threading.Event()
+        with self._lock:
+            acquired_now = self._try_acquire(event)
+        if not acquired_now and not event.wait(timeout):
+            with self._lock:
+                try:
+                    self._waiters.remove(event)
+                except ValueError:
+                    # Granted between the timeout and taking the lock: keep the slot
+                    pass
+                else:
+                    return False
+        self._record_wait(time.monotonic() - start if not acquired_now else 0.0)
+        return True
+
+    async def aacquire(self) -> None:
+        start = time.monotonic()
+        waiter = _AsyncWaiter(asyncio.get_running_loop())
+        with self._lock:
+            granted = self._try_acquire(waiter)
+        if not granted:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                    handed_over = waiter.granted
+                if handed_over:
+                    # The slot was handed over as we were cancelled; pass it on
+                    self.release()
+                raise
+        self._record_wait(time.monotonic() - start if not granted else 0.0)
+
+    @staticmethod
+    def _hand_over(waiter: Any) -> bool:
+        """Wake ``waiter`` with a slot; False if it already gave up (cancelled coroutine)."""
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return True
+        if not waiter.future.done() and not waiter.loop.is_closed():
+            waiter.granted = True
+            waiter.loop.call_soon_threadsafe(_grant, waiter.future)
+            return True
+        return False
+
+    def release(self) -> None:
+        with self._lock:
+            # Over the limit after a shrink: retire the slot instead of handing it on
+            if self._in_flight <= self.max_in_flight:
+                while self._waiters:
+                    # The slot transfers directly to the next waiter; in_flight is unchanged
+                    if self._hand_over(self._waiters.popleft()):
+                        return
+            self._in_flight -= 1
+
+    def set_limit(self, max_in_flight: int) -> None:
+        """Resize the pool; growth admits queued waiters, shrinkage takes effect as calls finish."""
+        with self._lock:
+            self.max_in_flight = max(1, int(max_in_flight))
+            while self._waiters and self._in_flight < self.max_in_flight:
+                if self._hand_over(self._waiters.popleft()):
+                    self._in_flight += 1
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        await self.aacquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "peak_waiting": self._peak_waiting,
+                "acquired": self._acquired,
+                "queued": self._queued,
+                "avg_wait_ms": round(self._wait_total / self._acquired * 1000, 2) if self._acquired else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+            }
+
+
+class _AsyncWaiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _grant(future: "asyncio.Future") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def shared_limiter(name: str, max_in_flight: int) -> ConcurrencyLimiter:
+    """Process-wide limiter for ``name``; the first caller's limit applies."""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = ConcurrencyLimiter(max_in_flight)
+        return limiter
@@ -0,0 +1,151 @@
+"""
+Provider-side caching of static prompt prefixes.
+
+The agents' counselor prompts are a large constant block of instructions, output
+schema and Singapore context, followed by a short per-request part (profile and
+candidates). Agents build a ``CacheablePrompt``: it behaves as the full prompt
+string everywhere (response cache keys, replay cassettes, token estimates) but
+also carries the two parts. ``GenAIClient`` then registers the prefix once per
+model as Vertex / Gemini cached content and sends only the suffix with each
+request. The provider bills the cached tokens at a reduced rate and skips
+re-processing them before the first output token.
+
+Prefixes below the provider's minimum cacheable size are sent inline as the
+start of the full prompt, where the provider's implicit prefix caching can
+still reuse them.
+
+``ContextCache`` tracks those cache handles per (backend, model, prefix) and
+recreates them before they expire. It remembers prefixes the provider refused (e.g. below its
+minimum size) so they are not retried on every call. With ``provider: local``
+nothing is created remotely and hits are only simulated. Tests and offline runs
+use this mode.
+"""
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .llm_usage import estimate_tokens
+
+AUTO = "auto"
+LOCAL = "local"
+
+
+class CacheablePrompt(str):
+    """Full prompt text that remembers its static ``prefix`` and per-call ``suffix``."""
+
+    prefix: str
+    suffix: str
+
+    def __new__(cls, prefix: str, suffix: str) -> "CacheablePrompt":
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix = prefix
+        prompt.suffix = suffix
+        return prompt
+
+
+class ContextCache:
+    """Cached-content handles per (backend, model, prefix), refreshed before they expire."""
+
+    def __init__(
+        self,
+        provider: str = AUTO,
+        ttl_seconds: float = 3600,
+        min_prefix_tokens: int = 1024,
+        retry_seconds: float = 600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.min_prefix_tokens = max(0, int(min_prefix_tokens))
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        # key -> (handle, usable_until); a None handle marks a prefix the provider refused
+        self._entries: Dict[Hashable, tuple] = {}
+        self._hits = 0
+        self._created = 0
+        self._failed = 0
+        self._too_small = 0
+        self._cached_tokens = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["ContextCache"]:
+        """Build from ``genai.context_cache`` (None when the provider is ``off`` or unset)."""
+        cfg = cfg or {}
+        provider = cfg.get("provider") or "off"
+        if provider not in (AUTO, LOCAL):
+            return None
+        return cls(
+            provider=provider,
+            ttl_seconds=cfg.get("ttl_seconds", 3600),
+            min_prefix_tokens=cfg.get("min_prefix_tokens", 1024),
+            retry_seconds=cfg.get("retry_seconds", 600),
+        )
+
+    @property
+    def simulated(self) -> bool:
+        return self.provider == LOCAL
+
+    def handle_for(self, backend: str, model: str, prefix: str, create: Callable[[str, float], Any]) -> Optional[Any]:
+        """Cached-content handle for ``prefix`` on ``model``, creating it via ``create(prefix, ttl)``.
+
+        Returns None when the prefix should be sent inline (too small, or creation failed).
+        """
+        tokens = estimate_tokens(prefix)
+        if tokens < self.min_prefix_tokens:
+            with self._lock:
+                self._too_small += 1
+            return None
+        key = (backend, model, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+        handle = self._current(key, tokens)
+        if handle is not None or self._refused(key):
+            return handle
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # One creation per prefix; concurrent callers wait for it rather than creating duplicates
+        with key_lock:
+            handle = self._current(key, tokens)
+            if handle is not None or self._refused(key):
+                return handle
+            try:
+                handle = object() if self.simulated else create(prefix, self.ttl_seconds)
+            except Exception:
+                handle = None
+            now = self._clock()
+            with self._lock:
+                if handle is None:
+                    self._failed += 1
+                    self._entries[key] = (None, now + self.retry_seconds)
+                    return None
+                self._created += 1
+                # Refresh a little before the provider drops the content
+                self._entries[key] = (handle, now + self.ttl_seconds * 0.9)
+        return handle
+
+    def _current(self, key: Hashable, tokens: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is None or self._clock() >= entry[1]:
+                return None
+            self._hits += 1
+            self._cached_tokens += tokens
+            return entry[0]
+
+    def _refused(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] is None and self._clock() < entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "provider": self.provider,
+                "prefixes": sum(1 for handle, _ in self._entries.values() if handle is not None),
+                "hits": self._hits,
+                "created": self._created,
+                "failed": self._failed,
+                "too_small": self._too_small,
+                "cached_prefix_tokens": self._cached_tokens,
+            }
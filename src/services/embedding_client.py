@@ -1,25 +1,34 @@
 from typing import List, Optional
 import hashlib, os
 
-try:
-    from vertexai.preview.language_models import TextEmbeddingModel  # type: ignore
-    _VERTEX_AVAILABLE = True
-except Exception:
-    _VERTEX_AVAILABLE = False
-
 import numpy as np
 
+
+def _text_embedding_model():
+    """Vertex ``TextEmbeddingModel`` class, imported only when embeddings are enabled (None if unavailable)."""
+    try:
+        from vertexai.preview.language_models import TextEmbeddingModel  # type: ignore
+    except Exception:
+        return None
+    return TextEmbeddingModel
+
 class EmbeddingClient:
     def __init__(self, model_name: str = "text-embedding-004"):
         self.model_name = model_name
         self._model = None
         # Allow tests or constrained environments to disable Vertex embeddings
-        if _VERTEX_AVAILABLE and not self._env_disabled():
+        model_cls = None if self._env_disabled() else _text_embedding_model()
+        if model_cls is not None:
             try:
-                self._model = TextEmbeddingModel.from_pretrained(model_name)
+                self._model = model_cls.from_pretrained(model_name)
             except Exception:
                 self._model = None
 
+    @property
+    def is_semantic(self) -> bool:
+        """False when embeddings come from the hash fallback (no real model loaded)."""
+        return self._model is not None
+
     def embed(self, texts: List[str]) -> List[List[float]]:
         if self._model:
             try:
@@ -0,0 +1,82 @@
+"""
+Background writer for export files.
+
+Summary exports are not needed to answer a request, so they are queued to a
+single daemon thread instead of being written on the request path. Pending
+writes are flushed at interpreter exit (bounded by a timeout).
+"""
+import atexit
+import os
+import queue
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class ExportWriter:
+    """Writes (or appends to) text files on a background thread, in submission order."""
+
+    def __init__(self, flush_timeout: float = 5.0):
+        self._queue: queue.Queue[Tuple[str, str, str]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._written = 0
+        self._failed = 0
+        atexit.register(self.flush, flush_timeout)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="export-writer", daemon=True)
+                self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            path, text, mode = self._queue.get()
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(path, mode, encoding="utf-8") as f:
+                    f.write(text)
+                self._written += 1
+            except Exception:
+                self._failed += 1
+            finally:
+                self._queue.task_done()
+
+    def write_text(self, path: str, text: str) -> None:
+        """Queue ``text`` to be written to ``path``; returns immediately."""
+        self._ensure_started()
+        self._queue.put((path, text, "w"))
+
+    def append_text(self, path: str, text: str) -> None:
+        """Queue ``text`` to be appended to ``path`` (e.g. a JSONL log line)."""
+        self._ensure_started()
+        self._queue.put((path, text, "a"))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued writes are done; returns False if ``timeout`` ran out first."""
+        done = threading.Event()
+
+        def wait_all():
+            self._queue.join()
+            done.set()
+
+        threading.Thread(target=wait_all, name="export-flush", daemon=True).start()
+        return done.wait(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": self._queue.unfinished_tasks, "written": self._written, "failed": self._failed}
+
+
+_default_writer: Optional[ExportWriter] = None
+_default_lock = threading.Lock()
+
+
+def default_writer() -> ExportWriter:
+    """Process-wide writer shared by every Orchestrator instance."""
+    global _default_writer
+    with _default_lock:
+        if _default_writer is None:
+            _default_writer = ExportWriter()
+        return _default_writer
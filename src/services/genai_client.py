@@ -1,52 +1,321 @@
 import os
+import hashlib
 import logging
-from typing import Optional
+import threading
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-# Gemini API (API key mode)
-try:
-    from google import genai  # type: ignore
-except ImportError:
-    genai = None
+from .circuit_breaker import OPEN, shared_breakers
+from .concurrency import shared_limiter
+from .context_cache import CacheablePrompt, ContextCache
+from .hedging import Hedger
+from .llm_cache import LLMResponseCache
+from .llm_replay import ReplayBackend
+from .llm_usage import CallRecord, current_agent, default_tracker, estimate_tokens, usage_counts
+from .rate_limit import AIMDController, RetryPolicy, TokenBucket, is_throttle, shared
 
-# Vertex AI Generative Models (service account / ADC mode)
-try:
-    from vertexai import init as vertexai_init  # type: ignore
-    from vertexai.generative_models import GenerativeModel  # type: ignore
-except ImportError:
-    vertexai_init = None
-    GenerativeModel = None
+# The SDKs take seconds to import, so they are loaded on first use by a backend rather
+# than at module import (``python main.py --profile-startup`` shows the difference).
+# None after loading means the library is not installed.
+_UNLOADED: Any = object()
+genai: Any = _UNLOADED  # Gemini API (API key mode)
+vertexai_init: Any = _UNLOADED  # Vertex AI (service account / ADC mode)
+GenerativeModel: Any = _UNLOADED
+_sdk_lock = threading.Lock()
 
 
-    logger = logging.getLogger(__name__)
+def _vertex_enabled() -> bool:
+    """Whether to attempt Vertex AI on the first call; ``USE_VERTEX=0`` opts out.
+
+    Vertex is tried by default because Cloud Run, GKE and GCE supply credentials through the
+    metadata server with no environment variables to check. Key-less local runs can set
+    ``USE_VERTEX=0`` to skip the SDK import and the failing ``vertexai.init``.
+    """
+    return os.getenv("USE_VERTEX", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _vertex_sdk() -> Tuple[Any, Any]:
+    """(vertexai.init, GenerativeModel), imported on first call; (None, None) when unavailable."""
+    global vertexai_init, GenerativeModel
+    with _sdk_lock:
+        if vertexai_init is _UNLOADED or GenerativeModel is _UNLOADED:
+            try:
+                from vertexai import init as _init  # type: ignore
+                from vertexai.generative_models import GenerativeModel as _model  # type: ignore
+            except ImportError:
+                _init = _model = None
+            # Keep anything already assigned (tests patch these globals)
+            if vertexai_init is _UNLOADED:
+                vertexai_init = _init
+            if GenerativeModel is _UNLOADED:
+                GenerativeModel = _model
+        return vertexai_init, GenerativeModel
+
+
+def _genai_sdk() -> Any:
+    """The ``google.genai`` module, imported on first call; None when unavailable."""
+    global genai
+    with _sdk_lock:
+        if genai is _UNLOADED:
+            try:
+                from google import genai as _genai  # type: ignore
+            except ImportError:
+                _genai = None
+            genai = _genai
+        return genai
+
+
+logger = logging.getLogger(__name__)
+
+
+# SDK clients are pooled for the life of the process so every GenAIClient (and every
+# session sharing one) reuses the same HTTP/gRPC connections
+_client_pool: Dict[tuple, Any] = {}
+_client_pool_lock = threading.Lock()
+
+
+# The call being accounted for; lets the fallback and SDK helpers add hops and usage to it
+_current_call: "contextvars.ContextVar[Optional[CallRecord]]" = contextvars.ContextVar("llm_call", default=None)
+
+
+def _pooled(key: tuple, factory):
+    with _client_pool_lock:
+        client = _client_pool.get(key)
+        if client is None:
+            client = factory()
+            _client_pool[key] = client
+        return client
 
 
 class GenAIClient:
     """Flexible client that prefers service account (Vertex AI) if available, else Gemini API key.
 
-    Precedence:
-    1. If GOOGLE_APPLICATION_CREDENTIALS is set & vertexai library available -> use Vertex AI GenerativeModel.
+    Precedence (resolved on the first call, which is when the SDK is imported):
+    1. If vertexai library available & vertexai.init succeeds -> use Vertex AI GenerativeModel
+       (``USE_VERTEX=0`` skips this step).
     2. Else if GOOGLE_API_KEY is set & google.genai available -> use genai.Client.
     3. Else -> no client (summaries disabled).
+
+    In replay mode (``genai.replay`` / LLM_REPLAY=replay) answers come from a recorded
+    cassette instead and no SDK client is created.
     """
 
-    def __init__(self, model: str):
+    def __init__(self, model: str, options: Optional[Dict[str, Any]] = None):
+        options = options or {}
         self.model = model
         self._client = None         # primary backend client (vertex preferred)
         self._gemini_client = None  # secondary gemini client if API key provided
         self.backend = None         # active backend used for first attempt ("vertex" | "gemini" | None)
         self._debug = os.getenv("LLM_DEBUG", "0") in ("1", "true", "True")
         self.resolved_model = None  # actual model that produced content
+        # One client is shared by concurrent sessions; guards the model/client switch on fallback
+        self._lock = threading.Lock()
+        # Extra generation settings passed to the SDK (and part of the response cache key)
+        self.generation_config: Dict[str, Any] = dict(options.get("generation_config") or {})
+        # Optional prompt-level response cache (``genai.response_cache`` in config.yaml)
+        self._response_cache = LLMResponseCache.from_config(options.get("response_cache") or {})
+        # Process-wide cap on in-flight LLM requests (threads and coroutines share it)
+        self._limiter = shared_limiter("genai", options.get("max_concurrency", 8))
+        # Quota pacing (token bucket), retries for 429/5xx only, and AIMD sizing of the
+        # limiter above; bucket and controller are per process like the quota itself
+        rate_cfg = options.get("rate_limit") or {}
+        rpm = rate_cfg.get("requests_per_minute")
+        self._bucket = shared(
+            "genai-bucket", lambda: TokenBucket(rpm / 60.0, burst=rate_cfg.get("burst", 10))
+        ) if rpm else None
+        retry_cfg = options.get("retry") or {}
+        self._retry = RetryPolicy(
+            max_retries=retry_cfg.get("max_retries", 3),
+            base_delay=retry_cfg.get("base_delay_seconds", 0.5),
+            max_delay=retry_cfg.get("max_delay_seconds", 8.0),
+        )
+        aimd_cfg = options.get("adaptive_concurrency") or {}
+        self._aimd = shared("genai-aimd", lambda: AIMDController(
+            self._limiter,
+            min_limit=aimd_cfg.get("min_concurrency", 1),
+            max_limit=aimd_cfg.get("max_concurrency", options.get("max_concurrency", 8)),
+        )) if aimd_cfg.get("enabled", False) else None
+        # Per-model health shared by the whole process: known-bad models are skipped
+        breaker_cfg = options.get("circuit_breaker") or {}
+        self._breakers = shared_breakers(
+            "genai",
+            failure_threshold=breaker_cfg.get("failure_threshold", 2),
+            reset_seconds=breaker_cfg.get("reset_seconds", 30),
+            max_reset_seconds=breaker_cfg.get("max_reset_seconds", 300),
+        )
+        # Opt-in hedging: duplicate a slow call to the same or the next healthy model
+        hedge_cfg = options.get("hedging") or {}
+        self._hedger = Hedger.from_config(hedge_cfg)
+        self._hedge_target_mode = hedge_cfg.get("target", "alternate")
+        self._vertex_scope = None  # (project, location) that pooled Vertex handles belong to
+        # Static prompt prefixes (CacheablePrompt) sent once as provider cached content;
+        # one registry per process since the cached content lives in the project
+        self._context_cache = shared(
+            "genai-context-cache", lambda: ContextCache.from_config(options.get("context_cache") or {})
+        )
+        # Per-call tokens / latency / fallback hops, aggregated per agent and model
+        self._usage = default_tracker()
+        # Offline record/replay (``genai.replay`` or LLM_REPLAY); replaying needs no SDK or credentials
+        self._replay = ReplayBackend.from_config(options.get("replay") or {})
+        if self._replay is not None and not self._replay.recording:
+            self._client = self._replay
+            self.backend = "replay"
+
+        # The backend SDK is imported and initialised on the first call, not here (see _connect)
+        self._connect_lock = threading.Lock()
+        self._connected = False
+        if self._debug:
+            pass
+
+    @staticmethod
+    def _extract_text(resp) -> Optional[str]:
+        """Pull the text out of an SDK response (direct ``.text`` or first candidate part)."""
+        if resp is None:
+            return None
+        try:
+            # Newer SDK: direct text
+            if hasattr(resp, "text") and resp.text:
+                return resp.text
+        except Exception:
+            pass
+        if getattr(resp, "candidates", None):
+            try:
+                for c in resp.candidates:
+                    content = getattr(c, "content", None)
+                    if content and getattr(content, "parts", None):
+                        for p in content.parts:
+                            pt = getattr(p, "text", None)
+                            if pt:
+                                return pt
+            except Exception:
+                pass
+        return None
+
+    @staticmethod
+    def _alt_models() -> List[str]:
+        """Alternate Vertex models tried (in order) when the primary fails or returns empty."""
+        alt_models_env = os.getenv("ALT_MODELS")
+        if alt_models_env:
+            return [m.strip() for m in alt_models_env.split(",") if m.strip()]
+        return [
+            "gemini-2.5-flash-lite",
+            "gemini-1.5-flash-002",
+            "gemini-1.5-flash-001",
+            "gemini-1.5-pro-002",
+        ]
+
+    def _model_handle(self, model: str):
+        """Pooled Vertex GenerativeModel for ``model``."""
+        _, model_cls = _vertex_sdk()
+        return _pooled((model_cls, self._vertex_scope, model), lambda: model_cls(model))
+
+    def model_health(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state per backend/model."""
+        return self._breakers.stats()
+
+    def hedge_stats(self) -> Optional[Dict[str, Any]]:
+        """Hedge rate and backup win rate (None when hedging is off)."""
+        return self._hedger.stats() if self._hedger is not None else None
 
-        svc_creds = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    def replay_stats(self) -> Optional[Dict[str, Any]]:
+        """Cassette hits/misses or recordings (None unless record/replay is on)."""
+        return self._replay.stats() if self._replay is not None else None
+
+    def _record(self, prompt: str, text: Optional[str], started: float) -> None:
+        if text and self._replay is not None and self._replay.recording:
+            self._replay.record(prompt, text, time.monotonic() - started, self.resolved_model)
+
+    def usage_stats(self) -> Dict[str, Any]:
+        """Calls, tokens, latency and fallback hops per agent and per model."""
+        return self._usage.stats()
+
+    @contextmanager
+    def _traced(self):
+        """Account for one call: yields its CallRecord and records it when the block exits."""
+        call = CallRecord(current_agent.get(), self.backend)
+        token = _current_call.set(call)
+        started = time.monotonic()
+        try:
+            yield call
+        except (GeneratorExit, asyncio.CancelledError):
+            call.outcome = "cancelled"
+            raise
+        except BaseException:
+            call.outcome = "error"
+            raise
+        finally:
+            call.latency_seconds = time.monotonic() - started
+            try:
+                _current_call.reset(token)
+            except ValueError:
+                pass  # a stream closed from another context
+            self._usage.record(call)
+
+    def _settle(self, call: CallRecord, prompt: str, text: Optional[str], model: str, cached: bool = False) -> None:
+        """Fill in the answering model and outcome; estimate tokens the SDK didn't report."""
+        if cached:
+            call.model = model
+            call.outcome = "cached"
+            return
+        call.model = call.attempts[-1] if call.attempts else model
+        if not text:
+            call.outcome = "empty"
+            return
+        if not call.prompt_tokens and not call.output_tokens:
+            call.prompt_tokens = estimate_tokens(prompt)
+            call.output_tokens = estimate_tokens(text)
+            call.estimated = True
+
+    @staticmethod
+    def _note_attempt(model: str) -> None:
+        call = _current_call.get()
+        if call is not None:
+            call.attempts.append(model)
+
+    @staticmethod
+    def _note_usage(response) -> None:
+        call = _current_call.get()
+        if call is not None:
+            call.add_usage(usage_counts(response))
+
+    def limiter_stats(self) -> Dict[str, Any]:
+        """In-flight / queue-wait counters of the process-wide request limiter."""
+        return self._limiter.stats()
+
+    def _connect(self) -> None:
+        """Pick and initialise the backend once, on the first call.
+
+        Importing the SDKs and ``vertexai.init`` cost seconds, so constructing a client
+        (and with it the Orchestrator / UI at startup) stays cheap. A backend that is
+        already set (replay, or one attached by tests) is kept as is.
+        """
+        if self._connected:
+            return
+        with self._connect_lock:
+            if self._connected:
+                return
+            if self.backend is None:
+                self._init_backend()
+            self._connected = True
+
+    def _init_backend(self) -> None:
         api_key = os.getenv("GOOGLE_API_KEY")
         project_id = os.getenv("GOOGLE_PROJECT_ID") or os.getenv("PROJECT_ID") or os.getenv("GCP_PROJECT") or "gagenteducation"
         location = os.getenv("GOOGLE_LOCATION") or "us-central1"
         
         # Attempt Vertex AI (works on Cloud Run with ADC, or with service account)
-        if vertexai_init and GenerativeModel:
+        use_vertex = _vertex_enabled()
+        if not use_vertex:
+            logger.info("Vertex AI skipped (USE_VERTEX=%s)", os.getenv("USE_VERTEX"))
+        if self.backend is None and use_vertex and all(_vertex_sdk()):
             try:
-                vertexai_init(project=project_id, location=location)
-                self._client = GenerativeModel(self.model)
+                _pooled(("vertex-init", project_id, location),
+                        lambda: vertexai_init(project=project_id, location=location) or True)
+                self._vertex_scope = (project_id, location)
+                self._client = self._model_handle(self.model)
                 self.backend = "vertex"
                 # Vertex succeeded, skip Gemini API
             except Exception:
@@ -54,10 +323,11 @@ class GenAIClient:
                 self.backend = None
         
         # Fallback to Gemini API key mode (only if Vertex failed AND API key present)
-        if not self.backend and api_key and genai:
+        if not self.backend and api_key and _genai_sdk():
             try:
                 pass
-                self._gemini_client = genai.Client(api_key=api_key)
+                key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+                self._gemini_client = _pooled((genai.Client, key_hash), lambda: genai.Client(api_key=api_key))
                 self._client = self._gemini_client
                 self.backend = "gemini"
                 pass
@@ -69,117 +339,497 @@ class GenAIClient:
         if self.backend is None and self._gemini_client is not None:
             self._client = self._gemini_client
             self.backend = "gemini"
-        if self._debug:
-            pass
 
-    def summarize(self, prompt: str) -> Optional[str]:
-        if not self._client and not self._gemini_client:
-            pass
+    def _active(self):
+        """Consistent (client, model) snapshot for one call."""
+        self._connect()
+        with self._lock:
+            return self._client, self.model
+
+    def _promote(self, failed_client, client, model: str) -> None:
+        """Make ``model`` the primary after it answered, unless another call already switched."""
+        with self._lock:
+            self.resolved_model = model
+            if self._client is failed_client:
+                self._client = client
+                self.model = model
+
+    def _resolved(self, model: str) -> None:
+        with self._lock:
+            self.resolved_model = model
+
+    def _vertex_kwargs(self) -> Dict[str, Any]:
+        return {"generation_config": self.generation_config} if self.generation_config else {}
+
+    def _gemini_kwargs(self) -> Dict[str, Any]:
+        return {"config": self.generation_config} if self.generation_config else {}
+
+    def context_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Prefix cache hits / creations (None when context caching is off)."""
+        return self._context_cache.stats() if self._context_cache is not None else None
+
+    def _vertex_request(self, handle, name: str, prompt: str):
+        """(model handle, contents) for one Vertex call; a CacheablePrompt's prefix goes via cached content."""
+        if self._context_cache is None or not isinstance(prompt, CacheablePrompt):
+            return handle, prompt
+        cached = self._context_cache.handle_for(
+            "vertex", name, prompt.prefix, lambda prefix, ttl: self._create_vertex_cache(name, prefix, ttl)
+        )
+        if cached is None or self._context_cache.simulated:
+            return handle, prompt
+        return cached, prompt.suffix
+
+    @staticmethod
+    def _create_vertex_cache(name: str, prefix: str, ttl: float):
+        import datetime
+        from vertexai.preview import caching  # type: ignore
+        from vertexai.preview.generative_models import GenerativeModel as PreviewModel  # type: ignore
+        content = caching.CachedContent.create(
+            model_name=name, contents=[prefix], ttl=datetime.timedelta(seconds=ttl)
+        )
+        return PreviewModel.from_cached_content(cached_content=content)
+
+    def _gemini_request(self, gemini, model: str, prompt: str):
+        """(contents, kwargs) for one Gemini call; a CacheablePrompt's prefix goes via cached content."""
+        if self._context_cache is None or not isinstance(prompt, CacheablePrompt):
+            return prompt, self._gemini_kwargs()
+        cache_name = self._context_cache.handle_for(
+            "gemini", model, prompt.prefix,
+            lambda prefix, ttl: gemini.caches.create(
+                model=model, config={"contents": [prefix], "ttl": f"{int(ttl)}s"}
+            ).name,
+        )
+        if cache_name is None or self._context_cache.simulated:
+            return prompt, self._gemini_kwargs()
+        return prompt.suffix, {"config": {**self.generation_config, "cached_content": cache_name}}
+
+    async def _aprepare(self, prepare, *args):
+        """Run ``_vertex_request`` / ``_gemini_request`` off the loop when it may create cached content."""
+        if self._context_cache is not None and not self._context_cache.simulated and isinstance(args[-1], CacheablePrompt):
+            return await asyncio.to_thread(prepare, *args)
+        return prepare(*args)
+
+    def _cache_lookup(self, prompt: str, model: str, use_cache: bool):
+        """Returns (cache_key, cached_text); the key is None when responses aren't cached."""
+        # Replayed answers are neither served from nor written to the cache: a benchmark
+        # has to pay the cassette's simulated latency on every call, repeats included
+        if self._response_cache is None or self.backend == "replay":
+            return None, None
+        key = self._response_cache.make_key(self.backend, model, self.generation_config, prompt)
+        # A recording run has to reach the model for every prompt
+        if not use_cache or (self._replay is not None and self._replay.recording):
+            # Bypass the read but still refresh the entry with the new answer
+            self._response_cache.record_bypass()
+            return key, None
+        return key, self._response_cache.get(key)
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Response cache counters (None when the cache is disabled)."""
+        return self._response_cache.stats() if self._response_cache is not None else None
+
+    def summarize(self, prompt: str, use_cache: bool = True) -> Optional[str]:
+        """Generate text for ``prompt``; ``use_cache=False`` skips the response cache lookup."""
+        client, model = self._active()
+        if not client and not self._gemini_client:
             return None
-        pass
-        
+        with self._traced() as call:
+            key, cached = self._cache_lookup(prompt, model, use_cache)
+            if cached is not None:
+                self._settle(call, prompt, cached, model, cached=True)
+                return cached
+            self._limiter.acquire()
+            started = time.monotonic()
+            if self._hedger is not None:
+                text = self._hedger.run(
+                    lambda: self._release_after(self._summarize, prompt, client, model),
+                    lambda: self._hedge_backup(prompt, client, model),
+                    can_hedge=self._hedge_slot,
+                    on_hedge_done=self._limiter.release,
+                )
+            else:
+                text = self._release_after(self._summarize, prompt, client, model)
+            self._record(prompt, text, started)
+            self._settle(call, prompt, text, model)
+        if text and key is not None:
+            self._response_cache.set(key, text)
+        return text
+
+    def summarize_stream(self, prompt: str, use_cache: bool = True) -> Iterator[str]:
+        """Yield the answer for ``prompt`` in chunks as the model produces them.
+
+        Models are tried in the usual fallback order, but a model is only abandoned
+        if it fails before its first chunk; once text has been yielded the stream is
+        committed to that model. A stream that breaks midway ends early and is not
+        cached. A response cache hit is yielded as a single chunk.
+        """
+        client, model = self._active()
+        if not client and not self._gemini_client:
+            return
+        parts: List[str] = []
+        complete = False
+        with self._traced() as call:
+            key, cached = self._cache_lookup(prompt, model, use_cache)
+            if cached is not None:
+                self._settle(call, prompt, cached, model, cached=True)
+                yield cached
+                return
+            with self._limiter.slot():
+                started = time.monotonic()
+                if self.backend == "replay":
+                    text = self._replay.respond(prompt)
+                    self._settle(call, prompt, text, model)
+                    if text:
+                        yield text
+                    return
+                for breaker_key, name, open_stream in self._stream_sources(prompt, client, model):
+                    breaker = self._breakers.get(breaker_key)
+                    if not breaker.allow():
+                        continue
+                    self._note_attempt(name)
+                    handle = None
+                    first = None
+                    usage = None
+                    try:
+                        handle, stream = self._call(open_stream)
+                        chunks = iter(stream)
+                        for chunk in chunks:
+                            usage = usage_counts(chunk) or usage
+                            first = self._extract_text(chunk)
+                            if first:
+                                break
+                    except Exception:
+                        first = None
+                    if not first:
+                        breaker.record_failure()
+                        continue
+                    breaker.record_success()
+                    if breaker_key[0] == "vertex":
+                        self._adopt(client, model, name, handle)
+                    else:
+                        self._resolved(name)
+                    parts.append(first)
+                    yield first
+                    try:
+                        for chunk in chunks:
+                            # Streamed usage_metadata is cumulative; the last chunk has the totals
+                            usage = usage_counts(chunk) or usage
+                            text = self._extract_text(chunk)
+                            if text:
+                                parts.append(text)
+                                yield text
+                        complete = True
+                    except Exception:
+                        pass
+                    call.add_usage(usage)
+                    break
+                if complete:
+                    self._record(prompt, "".join(parts), started)
+            self._settle(call, prompt, "".join(parts), model)
+            if parts and not complete:
+                call.outcome = "partial"
+        if complete and key is not None:
+            self._response_cache.set(key, "".join(parts))
+
+    def _stream_sources(self, prompt: str, client, model: str) -> List[Tuple[tuple, str, Callable[[], Any]]]:
+        """(breaker key, model, opener) per streaming attempt; an opener returns (handle, stream)."""
+        sources: List[Tuple[tuple, str, Callable[[], Any]]] = []
+        if self.backend == "vertex":
+            for name in self._vertex_candidates(model):
+                def open_vertex(name=name):
+                    handle = client if name == model else self._model_handle(name)
+                    target, contents = self._vertex_request(handle, name, prompt)
+                    return handle, target.generate_content(contents, stream=True, **self._vertex_kwargs())
+                sources.append((("vertex", name), name, open_vertex))
+        gemini = client if self.backend == "gemini" else self._gemini_client
+        if gemini is not None:
+            def open_gemini():
+                contents, kwargs = self._gemini_request(gemini, model, prompt)
+                return gemini, gemini.models.generate_content_stream(model=model, contents=contents, **kwargs)
+            sources.append((("gemini", model), model, open_gemini))
+        return sources
+
+    def _call(self, request):
+        """Send one SDK request: paced by the token bucket, retried with backoff if retryable."""
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                self._bucket.acquire()
+            try:
+                response = request()
+            except Exception as exc:
+                if self._aimd is not None and is_throttle(exc):
+                    self._aimd.on_throttle()
+                if not self._retry.should_retry(exc, attempt):
+                    raise
+                time.sleep(self._retry.delay(attempt))
+                attempt += 1
+                continue
+            if self._aimd is not None:
+                self._aimd.on_success()
+            self._note_usage(response)
+            return response
+
+    async def _acall(self, request):
+        """Async ``_call``; ``request`` returns the awaitable to send."""
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                await self._bucket.aacquire()
+            try:
+                response = await request()
+            except Exception as exc:
+                if self._aimd is not None and is_throttle(exc):
+                    self._aimd.on_throttle()
+                if not self._retry.should_retry(exc, attempt):
+                    raise
+                await asyncio.sleep(self._retry.delay(attempt))
+                attempt += 1
+                continue
+            if self._aimd is not None:
+                self._aimd.on_success()
+            self._note_usage(response)
+            return response
+
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Retry counters, token bucket pacing and the adaptive concurrency limit."""
+        return {
+            "retry": self._retry.stats(),
+            "bucket": self._bucket.stats() if self._bucket is not None else None,
+            "adaptive_concurrency": self._aimd.stats() if self._aimd is not None else None,
+        }
+
+    def _vertex_candidates(self, model: str) -> List[str]:
+        """Primary model first, then the alternates, in fallback order."""
+        return [model] + [alt for alt in self._alt_models() if alt != model]
+
+    def _adopt(self, client, model: str, name: str, handle, promote: bool = True) -> None:
+        """Record which model answered; an alternate that answered as a fallback becomes the primary."""
+        if name == model or not promote:
+            self._resolved(name)
+        else:
+            self._promote(client, handle, name)
+
+    def _try_vertex(self, prompt: str, client, model: str, name: str, promote: bool = True) -> Optional[str]:
+        """One call to Vertex model ``name`` unless its breaker is open; records the outcome.
+
+        ``promote=False`` (hedge backups) reports the answer without making ``name`` the primary:
+        winning a race against one slow call says nothing about the configured model's health.
+        """
+        breaker = self._breakers.get(("vertex", name))
+        if not breaker.allow():
+            return None
+        self._note_attempt(name)
+        handle = None
+        try:
+            handle = client if name == model else self._model_handle(name)
+            target, contents = self._vertex_request(handle, name, prompt)
+            text_out = self._extract_text(
+                self._call(lambda: target.generate_content(contents, **self._vertex_kwargs()))
+            )
+        except Exception:
+            text_out = None
+        if not text_out:
+            breaker.record_failure()
+            return None
+        breaker.record_success()
+        self._adopt(client, model, name, handle, promote)
+        return text_out
+
+    async def _atry_vertex(self, prompt: str, client, model: str, name: str, promote: bool = True) -> Optional[str]:
+        breaker = self._breakers.get(("vertex", name))
+        if not breaker.allow():
+            return None
+        self._note_attempt(name)
+        handle = None
+        try:
+            handle = client if name == model else self._model_handle(name)
+            target, contents = await self._aprepare(self._vertex_request, handle, name, prompt)
+            text_out = self._extract_text(
+                await self._acall(lambda: target.generate_content_async(contents, **self._vertex_kwargs()))
+            )
+        except Exception:
+            text_out = None
+        if not text_out:
+            breaker.record_failure()
+            return None
+        breaker.record_success()
+        self._adopt(client, model, name, handle, promote)
+        return text_out
+
+    def _hedge_target(self, model: str) -> Optional[str]:
+        """Vertex model the backup request goes to (None = repeat the full call)."""
+        if self.backend != "vertex":
+            return None
+        if self._hedge_target_mode == "alternate":
+            for name in self._vertex_candidates(model)[1:]:
+                if self._breakers.get(("vertex", name)).state != OPEN:
+                    return name
+        return model
+
+    def _hedge_backup(self, prompt: str, client, model: str) -> Optional[str]:
+        target = self._hedge_target(model)
+        if target is None:
+            return self._summarize(prompt, client, model)
+        return self._try_vertex(prompt, client, model, target, promote=False)
+
+    async def _ahedge_backup(self, prompt: str, client, model: str) -> Optional[str]:
+        target = self._hedge_target(model)
+        if target is None:
+            return await self._asummarize(prompt, client, model)
+        return await self._atry_vertex(prompt, client, model, target, promote=False)
+
+    def _release_after(self, fn: Callable[..., Optional[str]], *args: Any) -> Optional[str]:
+        """Run ``fn`` and then give back the limiter slot it was started under.
+
+        The primary releases its own slot: when a hedge backup wins, the abandoned primary
+        request is still in flight and keeps counting against the cap until it returns.
+        """
+        try:
+            return fn(*args)
+        finally:
+            self._limiter.release()
+
+    def _hedge_slot(self) -> bool:
+        # The duplicate request only goes out if it doesn't have to queue for quota
+        return self._limiter.acquire(timeout=0)
+
+    def _summarize(self, prompt: str, client, model: str) -> Optional[str]:
         try:
+            if self.backend == "replay":
+                self._note_attempt(model)
+                return self._replay.respond(prompt)
             if self.backend == "vertex":
-                pass
+                # Models whose breaker is open are skipped, so an outage doesn't cost a
+                # failed call per alternate on every request
+                for name in self._vertex_candidates(model):
+                    text_out = self._try_vertex(prompt, client, model, name)
+                    if text_out:
+                        return text_out
+                # fall through to gemini if available
+            if (self.backend == "vertex" or self.backend is None) and self._gemini_client:
+                breaker = self._breakers.get(("gemini", model))
+                if not breaker.allow():
+                    return None
+                self._note_attempt(model)
                 try:
-                    resp = self._client.generate_content(prompt)
+                    contents, kwargs = self._gemini_request(self._gemini_client, model, prompt)
+                    gresp = self._call(lambda: self._gemini_client.models.generate_content(
+                        model=model, contents=contents, **kwargs
+                    ))
+                    txt = getattr(gresp, "text", None)
                 except Exception:
-                    if self._debug:
-                        pass
-                    resp = None
-                text_out = None
-                if resp is not None:
-                    # Newer SDK: direct text
-                    if hasattr(resp, "text") and resp.text:
-                        text_out = resp.text
-                    elif getattr(resp, "candidates", None):
-                        try:
-                            for c in resp.candidates:
-                                content = getattr(c, "content", None)
-                                if content and getattr(content, "parts", None):
-                                    for p in content.parts:
-                                        pt = getattr(p, "text", None)
-                                        if pt:
-                                            text_out = pt
-                                            break
-                                    if text_out:
-                                        break
-                        except Exception:
-                            if self._debug:
-                                pass
-                if text_out:
-                    self.resolved_model = self.model
-                    return text_out
-                # Attempt alternate Vertex models (404 or empty response) before Gemini fallback
-                alt_models_env = os.getenv("ALT_MODELS")
-                if alt_models_env:
-                    alt_models = [m.strip() for m in alt_models_env.split(",") if m.strip()]
+                    txt = None
+                if txt:
+                    breaker.record_success()
+                    self._resolved(model)
+                    return txt
+                breaker.record_failure()
+                return None
+            elif self.backend == "gemini":
+                breaker = self._breakers.get(("gemini", model))
+                if not breaker.allow():
+                    return None
+                self._note_attempt(model)
+                try:
+                    contents, kwargs = self._gemini_request(client, model, prompt)
+                    resp = self._call(lambda: client.models.generate_content(
+                        model=model, contents=contents, **kwargs
+                    ))
+                    txt = getattr(resp, "text", None)
+                except Exception:
+                    txt = None
+                if txt:
+                    breaker.record_success()
                 else:
-                    alt_models = [
-                        "gemini-2.5-flash-lite",
-                        "gemini-1.5-flash-002",
-                        "gemini-1.5-flash-001",
-                        "gemini-1.5-pro-002",
-                    ]
-                tried = []
-                if self._debug:
-                    pass
-                for alt in alt_models:
-                    if alt == self.model:
-                        continue
-                    tried.append(alt)
-                    try:
-                        from vertexai.generative_models import GenerativeModel as _GM
-                        alt_client = _GM(alt)
-                        alt_resp = alt_client.generate_content(prompt)
-                        # Each alt_resp attempt leverage same parsing
-                        candidate_text = None
-                        if hasattr(alt_resp, "text") and alt_resp.text:
-                            candidate_text = alt_resp.text
-                        elif getattr(alt_resp, "candidates", None):
-                            for c in alt_resp.candidates:
-                                content = getattr(c, "content", None)
-                                if content and getattr(content, "parts", None):
-                                    for p in content.parts:
-                                        pt = getattr(p, "text", None)
-                                        if pt:
-                                            candidate_text = pt
-                                            break
-                                    if candidate_text:
-                                        break
-                        if candidate_text:
-                            if self._debug:
-                                pass
-                            self.resolved_model = alt
-                            # Switch primary client to this working model for future calls
-                            self._client = alt_client
-                            self.model = alt
-                            return candidate_text
-                    except Exception:
-                        if self._debug:
-                            pass
-                if self._debug:
-                    pass
-                # fall through to gemini if available
+                    breaker.record_failure()
+                return txt
+            else:
+                return None
+        except Exception:
+            return None
+
+    async def asummarize(self, prompt: str, use_cache: bool = True) -> Optional[str]:
+        """Async counterpart of ``summarize`` using the SDKs' native async calls.
+
+        Same backend precedence, alternate-model fallback and response cache, but no
+        thread is held while the request is in flight.
+        """
+        if not self._connected:
+            # First call: keep the SDK import and init off the event loop
+            await asyncio.to_thread(self._connect)
+        client, model = self._active()
+        if not client and not self._gemini_client:
+            return None
+        with self._traced() as call:
+            key, cached = self._cache_lookup(prompt, model, use_cache)
+            if cached is not None:
+                self._settle(call, prompt, cached, model, cached=True)
+                return cached
+            async with self._limiter.aslot():
+                started = time.monotonic()
+                if self._hedger is not None:
+                    text = await self._hedger.arun(
+                        lambda: self._asummarize(prompt, client, model),
+                        lambda: self._ahedge_backup(prompt, client, model),
+                        can_hedge=self._hedge_slot,
+                        on_hedge_done=self._limiter.release,
+                    )
+                else:
+                    text = await self._asummarize(prompt, client, model)
+                self._record(prompt, text, started)
+            self._settle(call, prompt, text, model)
+        if text and key is not None:
+            self._response_cache.set(key, text)
+        return text
+
+    async def _asummarize(self, prompt: str, client, model: str) -> Optional[str]:
+        try:
+            if self.backend == "replay":
+                self._note_attempt(model)
+                return await self._replay.arespond(prompt)
+            if self.backend == "vertex":
+                for name in self._vertex_candidates(model):
+                    text_out = await self._atry_vertex(prompt, client, model, name)
+                    if text_out:
+                        return text_out
             if (self.backend == "vertex" or self.backend is None) and self._gemini_client:
+                breaker = self._breakers.get(("gemini", model))
+                if not breaker.allow():
+                    return None
+                self._note_attempt(model)
                 try:
-                    gresp = self._gemini_client.models.generate_content(model=self.model, contents=prompt)
+                    contents, kwargs = await self._aprepare(self._gemini_request, self._gemini_client, model, prompt)
+                    gresp = await self._acall(lambda: self._gemini_client.aio.models.generate_content(
+                        model=model, contents=contents, **kwargs
+                    ))
                     txt = getattr(gresp, "text", None)
-                    if txt:
-                        if self._debug:
-                            pass
-                        self.resolved_model = self.model
-                        return txt
                 except Exception:
-                    if self._debug:
-                        pass
+                    txt = None
+                if txt:
+                    breaker.record_success()
+                    self._resolved(model)
+                    return txt
+                breaker.record_failure()
                 return None
             elif self.backend == "gemini":
-                resp = self._client.models.generate_content(model=self.model, contents=prompt)
-                txt = getattr(resp, "text", None)
+                breaker = self._breakers.get(("gemini", model))
+                if not breaker.allow():
+                    return None
+                self._note_attempt(model)
+                try:
+                    contents, kwargs = await self._aprepare(self._gemini_request, client, model, prompt)
+                    resp = await self._acall(lambda: client.aio.models.generate_content(
+                        model=model, contents=contents, **kwargs
+                    ))
+                    txt = getattr(resp, "text", None)
+                except Exception:
+                    txt = None
+                if txt:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
                 return txt
             else:
                 return None
         except Exception:
-            pass
             return None
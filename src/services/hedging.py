@@ -0,0 +1,224 @@
+"""
+Hedged requests for tail latency.
+
+If the primary LLM call has not answered within a threshold, a duplicate
+(backup) call is issued and whichever returns a usable answer first wins. The
+threshold is either fixed or the rolling percentile (p95 by default) of recent
+primary latencies, so only the slowest few percent of calls are duplicated.
+Hedge and win rates are tracked to weigh the latency gain against quota cost.
+"""
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Rolling window of call latencies (seconds)."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=max(1, int(window)))
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))
+        return samples[index]
+
+
+def _spawn(fn: Callable[[], Any]) -> Future:
+    """Run ``fn`` on a daemon thread; a losing call is left to finish on its own.
+
+    The caller's context variables (calling agent, call accounting) carry over.
+    """
+    future: Future = Future()
+    context = contextvars.copy_context()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(fn))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=target, name="llm-hedge", daemon=True).start()
+    return future
+
+
+class Hedger:
+    """Races a backup call against a slow primary once the hedge threshold passes."""
+
+    def __init__(
+        self,
+        delay_seconds: Optional[float] = None,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+        min_delay_seconds: float = 0.05,
+    ):
+        self.delay_seconds = delay_seconds
+        self.percentile = percentile
+        self.min_samples = max(1, int(min_samples))
+        self.min_delay_seconds = min_delay_seconds
+        self.latency = LatencyTracker(window)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["Hedger"]:
+        """Build from ``genai.hedging`` (None unless enabled)."""
+        if not cfg or not cfg.get("enabled", False):
+            return None
+        return cls(
+            delay_seconds=cfg.get("delay_seconds"),
+            percentile=cfg.get("percentile", 0.95),
+            min_samples=cfg.get("min_samples", 20),
+            window=cfg.get("window", 200),
+        )
+
+    def threshold(self) -> Optional[float]:
+        """Seconds to wait before hedging; None while the rolling window is still warming up."""
+        if self.delay_seconds is not None:
+            return self.delay_seconds
+        if len(self.latency) < self.min_samples:
+            return None
+        return max(self.min_delay_seconds, self.latency.percentile(self.percentile))
+
+    def _count(self, hedged: bool = False, hedge_won: bool = False) -> None:
+        with self._lock:
+            self._requests += 1
+            self._hedged += int(hedged)
+            self._hedge_wins += int(hedge_won)
+
+    def run(
+        self,
+        primary: Callable[[], Optional[str]],
+        backup: Callable[[], Optional[str]],
+        can_hedge: Callable[[], bool] = lambda: True,
+        on_hedge_done: Callable[[], None] = lambda: None,
+    ) -> Optional[str]:
+        """Blocking race. ``can_hedge`` is asked before issuing the backup (e.g. a free quota slot);
+        ``on_hedge_done`` runs once the backup call has finished."""
+        start = time.monotonic()
+        threshold = self.threshold()
+        if threshold is None:
+            result = primary()
+            self.latency.record(time.monotonic() - start)
+            self._count()
+            return result
+        first = _spawn(primary)
+        done, _ = wait([first], timeout=threshold)
+        if done or not can_hedge():
+            result = first.result()
+            self.latency.record(time.monotonic() - start)
+            self._count()
+            return result
+
+        def run_backup():
+            try:
+                return backup()
+            finally:
+                on_hedge_done()
+
+        second = _spawn(run_backup)
+        pending = {first, second}
+        result = None
+        winner = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    value = future.result()
+                except Exception:
+                    value = None
+                if value and winner is None:
+                    result, winner = value, future
+            if winner is not None:
+                break
+        # When the backup wins this is a lower bound on the primary's latency
+        self.latency.record(time.monotonic() - start)
+        self._count(hedged=True, hedge_won=winner is second)
+        return result
+
+    async def arun(
+        self,
+        primary: Callable[[], Awaitable[Optional[str]]],
+        backup: Callable[[], Awaitable[Optional[str]]],
+        can_hedge: Callable[[], bool] = lambda: True,
+        on_hedge_done: Callable[[], None] = lambda: None,
+    ) -> Optional[str]:
+        """Async race; the losing task is cancelled."""
+        start = time.monotonic()
+        threshold = self.threshold()
+        if threshold is None:
+            result = await primary()
+            self.latency.record(time.monotonic() - start)
+            self._count()
+            return result
+        first = asyncio.ensure_future(primary())
+        done, _ = await asyncio.wait([first], timeout=threshold)
+        if done or not can_hedge():
+            result = await first
+            self.latency.record(time.monotonic() - start)
+            self._count()
+            return result
+
+        async def run_backup():
+            try:
+                return await backup()
+            finally:
+                on_hedge_done()
+
+        second = asyncio.ensure_future(run_backup())
+        pending = {first, second}
+        result = None
+        winner = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    value = task.result()
+                except Exception:
+                    value = None
+                if value and winner is None:
+                    result, winner = value, task
+            if winner is not None:
+                break
+        for task in pending:
+            task.cancel()
+        # When the backup wins this is a lower bound on the primary's latency
+        self.latency.record(time.monotonic() - start)
+        self._count(hedged=True, hedge_won=winner is second)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        threshold = self.threshold()
+        p95 = self.latency.percentile(0.95)
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "hedged": self._hedged,
+                "hedge_rate": round(self._hedged / self._requests, 4) if self._requests else 0.0,
+                "hedge_wins": self._hedge_wins,
+                "win_rate": round(self._hedge_wins / self._hedged, 4) if self._hedged else 0.0,
+                "threshold_ms": round(threshold * 1000, 1) if threshold is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
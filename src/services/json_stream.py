@@ -0,0 +1,112 @@
+"""
+Incremental parsing of JSON arrays in LLM responses.
+
+Agents ask the model for a JSON array of recommendations, but what comes back is
+often wrapped in a code fence, followed by a sentence of commentary, or cut off
+mid-element when the output hits its token limit. ``JSONArrayStream`` takes the
+response chunk by chunk and yields each top-level element as soon as its closing
+bracket arrives. Text before the opening ``[`` and after the closing ``]`` is
+ignored. A malformed element is skipped, and a truncated array keeps every
+element that was completed before the cut.
+"""
+import json
+from typing import Any, Iterable, Iterator, List, Optional
+
+
+class JSONArrayStream:
+    """Feed response text in chunks; get back the array elements completed so far."""
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0                     # scan position in _buf
+        self._start: Optional[int] = None  # start of the element being read, in _buf
+        self._depth = 0                    # nesting inside the current element
+        self._in_string = False
+        self._escape = False
+        self.started = False
+        self.complete = False
+        self.parsed = 0
+        self.skipped = 0
+
+    @property
+    def truncated(self) -> bool:
+        """The array was opened but its closing bracket has not arrived."""
+        return self.started and not self.complete
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume ``chunk``; returns the elements it completed (possibly none)."""
+        if self.complete or not chunk:
+            return []
+        out: List[Any] = []
+        buf = self._buf + chunk
+        i = self._pos
+        while i < len(buf) and not self.complete:
+            ch = buf[i]
+            if not self.started:
+                # Skip fences / preamble up to the opening bracket
+                if ch == "[":
+                    self.started = True
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        self._emit(buf[self._start:i + 1], out)
+            elif ch == '"':
+                if self._start is None:
+                    self._start = i
+                self._in_string = True
+            elif ch in "{[":
+                if self._start is None:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the array itself; anything after it is commentary
+                    if self._start is not None:
+                        self._emit(buf[self._start:i], out)
+                    self.complete = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._emit(buf[self._start:i + 1], out)
+            elif ch == "," and self._depth == 0:
+                if self._start is not None:
+                    self._emit(buf[self._start:i], out)
+            elif self._start is None and not ch.isspace():
+                self._start = i  # bare number / true / false / null
+            i += 1
+        # Keep only the unfinished element so the buffer doesn't grow with the response
+        keep = self._start if self._start is not None else i
+        self._buf = buf[keep:]
+        self._pos = i - keep
+        if self._start is not None:
+            self._start = 0
+        return out
+
+    def _emit(self, text: str, out: List[Any]) -> None:
+        self._start = None
+        text = text.strip()
+        if not text:
+            return
+        try:
+            out.append(json.loads(text))
+            self.parsed += 1
+        except ValueError:
+            self.skipped += 1
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """Yield array elements from a streamed response as each one completes."""
+    parser = JSONArrayStream()
+    # Drain the whole stream even after the array closes, so the response still completes (and is cached)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+
+
+def parse_json_array(text: Optional[str]) -> List[Any]:
+    """Elements of the JSON array in ``text``: fences and trailing text are ignored, a truncated array keeps its valid prefix."""
+    return JSONArrayStream().feed(text or "")
@@ -0,0 +1,108 @@
+"""
+Prompt-level LLM response cache.
+
+Agents build deterministic prompts from the same profile fields and catalog
+entries, so identical prompts recur across UI sessions and evaluation runs.
+Responses are keyed by backend, model, generation settings and a hash of the
+prompt, kept in an in-memory LRU and optionally backed by the SQLite store
+shared with other processes on the host.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from .persistent_cache import PersistentResultCache
+from .result_cache import ResultCache
+
+
+class LLMResponseCache:
+    """Two-tier (memory, then disk) cache of LLM response text."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600,
+        max_entries: int = 2048,
+        max_bytes: int = 32 * 1024 * 1024,
+        path: Optional[str] = None,
+        disk_max_entries: int = 20000,
+        disk_max_bytes: int = 128 * 1024 * 1024,
+    ):
+        self._memory = ResultCache(ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
+        self._disk: Optional[PersistentResultCache] = None
+        if path:
+            try:
+                self._disk = PersistentResultCache(
+                    path,
+                    ttl_seconds=ttl_seconds,
+                    max_entries=disk_max_entries,
+                    max_bytes=disk_max_bytes,
+                    table="llm",
+                )
+            except Exception:
+                self._disk = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["LLMResponseCache"]:
+        """Build from the ``genai.response_cache`` config block (None when disabled)."""
+        if not cfg or not cfg.get("enabled", False):
+            return None
+        return cls(
+            ttl_seconds=cfg.get("ttl_seconds", 3600),
+            max_entries=cfg.get("max_entries", 2048),
+            max_bytes=int(cfg.get("max_mb", 32) * 1024 * 1024),
+            path=cfg.get("path") if cfg.get("persistent", False) else None,
+            disk_max_entries=cfg.get("disk_max_entries", 20000),
+            disk_max_bytes=int(cfg.get("disk_max_mb", 128) * 1024 * 1024),
+        )
+
+    @staticmethod
+    def make_key(backend: Optional[str], model: str, settings: Dict[str, Any], prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        raw = json.dumps([backend, model, settings, prompt_hash], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        text = self._memory.get(key)
+        if text is None and self._disk is not None:
+            text = self._disk.get(key)
+            if text is not None:
+                self._memory.set(key, text)
+        with self._lock:
+            if text is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        self._memory.set(key, text)
+        if self._disk is not None:
+            self._disk.set(key, text)
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._bypassed += 1
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats: Dict[str, Any] = {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "bypassed": self._bypassed,
+            }
+        stats["memory"] = self._memory.stats()
+        if self._disk is not None:
+            stats["persistent"] = self._disk.stats()
+        return stats
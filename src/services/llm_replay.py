@@ -0,0 +1,196 @@
+"""
+Record/replay backend for LLM calls.
+
+In ``record`` mode calls go to the real backend as usual and every answer is
+appended to a cassette: a JSONL file with one entry per prompt hash. In
+``replay`` mode ``GenAIClient`` needs no credentials or network. It serves the
+cassette's answers after a simulated latency, so agent prompts, JSON parsing,
+the limiter and the summary all run as they would in production. This makes it
+possible to benchmark and load-test the full pipeline offline.
+
+The mode comes from ``LLM_REPLAY`` (``record`` | ``replay``) and ``LLM_CASSETTE``,
+or from ``genai.replay`` in config.yaml; the environment wins.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .export_writer import default_writer
+
+RECORD = "record"
+REPLAY = "replay"
+DEFAULT_CASSETTE = os.path.join(".orchestrator_cache", "llm_cassette.jsonl")
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class LatencyModel:
+    """Simulated response time for replayed calls.
+
+    ``recorded`` replays each entry's measured latency, ``fixed`` always waits
+    ``ms``, ``lognormal`` samples around ``median_ms`` (long right tail, like
+    real LLM latencies) and ``none`` answers immediately. ``scale`` multiplies
+    the result, e.g. 0.1 for a fast smoke run.
+    """
+
+    def __init__(
+        self,
+        distribution: str = "recorded",
+        ms: float = 0.0,
+        median_ms: float = 800.0,
+        sigma: float = 0.5,
+        scale: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        self.distribution = distribution
+        self.ms = ms
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "LatencyModel":
+        cfg = cfg or {}
+        return cls(
+            distribution=cfg.get("distribution", "recorded"),
+            ms=cfg.get("ms", 0.0),
+            median_ms=cfg.get("median_ms", 800.0),
+            sigma=cfg.get("sigma", 0.5),
+            scale=cfg.get("scale", 1.0),
+            seed=cfg.get("seed"),
+        )
+
+    def sample(self, recorded_ms: Optional[float] = None) -> float:
+        """Seconds to wait before answering."""
+        if self.distribution == "none":
+            return 0.0
+        if self.distribution == "fixed":
+            ms = self.ms
+        elif self.distribution == "recorded" and recorded_ms is not None:
+            ms = recorded_ms
+        else:
+            # lognormal, or a recorded entry without a measurement
+            with self._lock:
+                ms = self._random.lognormvariate(math.log(max(self.median_ms, 1e-3)), self.sigma)
+        return max(0.0, ms * self.scale / 1000.0)
+
+
+class ReplayBackend:
+    """A cassette of recorded answers keyed by prompt hash, in record or replay mode."""
+
+    def __init__(self, mode: str, path: str = DEFAULT_CASSETTE, latency: Optional[LatencyModel] = None):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"unknown replay mode: {mode!r}")
+        self.mode = mode
+        self.path = path
+        self.latency = latency or LatencyModel()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load(path)
+        self._hits = 0
+        self._misses = 0
+        self._recorded = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["ReplayBackend"]:
+        """Build from ``genai.replay`` plus ``LLM_REPLAY`` / ``LLM_CASSETTE`` (None when off)."""
+        cfg = cfg or {}
+        mode = os.getenv("LLM_REPLAY") or cfg.get("mode")
+        if mode not in (RECORD, REPLAY):
+            return None
+        path = os.getenv("LLM_CASSETTE") or cfg.get("cassette") or DEFAULT_CASSETTE
+        # One instance per cassette so every client in the process records to (and counts) the same file
+        with _backends_lock:
+            backend = _backends.get((mode, path))
+            if backend is None:
+                backend = _backends[(mode, path)] = cls(mode, path, LatencyModel.from_config(cfg.get("latency")))
+            return backend
+
+    @staticmethod
+    def _load(path: str) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a line cut short by an interrupted recording
+                    if entry.get("key") and entry.get("text"):
+                        # Later recordings of the same prompt replace earlier ones
+                        entries[entry["key"]] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    def _lookup(self, prompt: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(prompt_key(prompt))
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return entry
+
+    def respond(self, prompt: str) -> Optional[str]:
+        """Recorded answer for ``prompt`` after the simulated latency (None if it was never recorded)."""
+        entry = self._lookup(prompt)
+        if entry is None:
+            return None
+        delay = self.latency.sample(entry.get("latency_ms"))
+        if delay > 0:
+            time.sleep(delay)
+        return entry["text"]
+
+    async def arespond(self, prompt: str) -> Optional[str]:
+        entry = self._lookup(prompt)
+        if entry is None:
+            return None
+        delay = self.latency.sample(entry.get("latency_ms"))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return entry["text"]
+
+    def record(self, prompt: str, text: str, seconds: float, model: Optional[str] = None) -> None:
+        """Add a real answer to the cassette (appended on the background export writer)."""
+        entry = {
+            "key": prompt_key(prompt),
+            "model": model,
+            "latency_ms": round(seconds * 1000, 1),
+            "text": text,
+        }
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            self._recorded += 1
+        default_writer().append_text(self.path, json.dumps(entry) + "\n")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "cassette": self.path,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "recorded": self._recorded,
+            }
+
+
+_backends: Dict[tuple, ReplayBackend] = {}
+_backends_lock = threading.Lock()
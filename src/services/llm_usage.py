@@ -0,0 +1,183 @@
+"""
+Token and latency accounting for LLM calls.
+
+Every ``GenAIClient`` call produces one ``CallRecord``. It holds the calling agent,
+backend, answering model, prompt and output tokens, latency, fallback hops and
+outcome. Token counts come from the SDK's ``usage_metadata``. When that is
+missing they are estimated from the text, and the record is flagged. Records are
+aggregated per agent and per model, so the most expensive or slowest prompts are
+easy to spot.
+
+The calling agent is carried in a context variable: the orchestrator wraps each
+agent (and the summary) in ``agent_scope(name)``, and nothing has to be threaded
+through the agents' own code.
+"""
+import contextvars
+import math
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+current_agent: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar("llm_agent", default=None)
+
+
+@contextmanager
+def agent_scope(name: str) -> Iterator[None]:
+    """Attribute LLM calls made inside the block (and threads/tasks it spawns with the context) to ``name``."""
+    token = current_agent.set(name)
+    try:
+        yield
+    finally:
+        current_agent.reset(token)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count (~4 characters per token for English prose)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def usage_counts(response: Any) -> Optional[Tuple[int, int]]:
+    """(prompt_tokens, output_tokens) from a Vertex / Gemini response's ``usage_metadata``."""
+    meta = getattr(response, "usage_metadata", None)
+    if meta is None:
+        return None
+    prompt = getattr(meta, "prompt_token_count", None)
+    output = getattr(meta, "candidates_token_count", None)
+    if prompt is None and output is None:
+        return None
+    return int(prompt or 0), int(output or 0)
+
+
+class CallRecord:
+    """One ``summarize`` call, filled in as the request goes through fallbacks."""
+
+    __slots__ = (
+        "agent", "backend", "model", "attempts", "prompt_tokens", "output_tokens",
+        "estimated", "latency_seconds", "outcome",
+    )
+
+    def __init__(self, agent: Optional[str], backend: Optional[str]):
+        self.agent = agent
+        self.backend = backend
+        self.model: Optional[str] = None
+        self.attempts: List[str] = []  # models tried, in order
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.estimated = False
+        self.latency_seconds = 0.0
+        self.outcome = "ok"
+
+    @property
+    def hops(self) -> int:
+        """Fallbacks taken beyond the first model tried."""
+        return max(0, len(self.attempts) - 1)
+
+    def add_usage(self, counts: Optional[Tuple[int, int]]) -> None:
+        if counts is not None:
+            self.prompt_tokens += counts[0]
+            self.output_tokens += counts[1]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "agent": self.agent,
+            "backend": self.backend,
+            "model": self.model,
+            "attempts": list(self.attempts),
+            "hops": self.hops,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated": self.estimated,
+            "latency_ms": round(self.latency_seconds * 1000, 1),
+            "outcome": self.outcome,
+        }
+
+
+class _Totals:
+    __slots__ = ("calls", "outcomes", "prompt_tokens", "output_tokens", "estimated", "latency", "max_latency", "hops")
+
+    def __init__(self):
+        self.calls = 0
+        self.outcomes: Dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.estimated = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.hops = 0
+
+    def add(self, record: CallRecord) -> None:
+        self.calls += 1
+        self.outcomes[record.outcome] = self.outcomes.get(record.outcome, 0) + 1
+        self.prompt_tokens += record.prompt_tokens
+        self.output_tokens += record.output_tokens
+        self.estimated += int(record.estimated)
+        self.latency += record.latency_seconds
+        self.max_latency = max(self.max_latency, record.latency_seconds)
+        self.hops += record.hops
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "outcomes": dict(self.outcomes),
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated_calls": self.estimated,
+            "avg_latency_ms": round(self.latency / self.calls * 1000, 1) if self.calls else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "fallback_hops": self.hops,
+        }
+
+
+class UsageTracker:
+    """Thread-safe per-agent / per-model aggregates plus a window of recent records."""
+
+    def __init__(self, recent: int = 200):
+        self._lock = threading.Lock()
+        self._recent: Deque[CallRecord] = deque(maxlen=max(1, int(recent)))
+        self._totals = _Totals()
+        self._by_agent: Dict[str, _Totals] = {}
+        self._by_model: Dict[str, _Totals] = {}
+
+    def record(self, record: CallRecord) -> None:
+        with self._lock:
+            self._recent.append(record)
+            self._totals.add(record)
+            self._by_agent.setdefault(record.agent or "(none)", _Totals()).add(record)
+            if record.model:
+                self._by_model.setdefault(record.model, _Totals()).add(record)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._recent)
+        if limit is not None:
+            records = records[-limit:]
+        return [r.as_dict() for r in records]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "totals": self._totals.as_dict(),
+                "by_agent": {name: t.as_dict() for name, t in self._by_agent.items()},
+                "by_model": {name: t.as_dict() for name, t in self._by_model.items()},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._totals = _Totals()
+            self._by_agent.clear()
+            self._by_model.clear()
+
+
+_default_tracker: Optional[UsageTracker] = None
+_default_lock = threading.Lock()
+
+
+def default_tracker() -> UsageTracker:
+    """Process-wide tracker shared by every GenAIClient."""
+    global _default_tracker
+    with _default_lock:
+        if _default_tracker is None:
+            _default_tracker = UsageTracker()
+        return _default_tracker
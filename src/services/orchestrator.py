@@ -1,14 +1,25 @@
-from typing import Dict, Any, List, Tuple
-import time, json, hashlib, os
-from src.agents.base import AgentContext
+from typing import Dict, Any, List, Callable, Iterable, Iterator, Optional, Tuple, Union
+import asyncio, contextvars, time, json, hashlib, os, queue, threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from src.agents.base import AgentContext, partial_listener
 from src.services.vector_store import VectorStore
 from src.agents.institutional_data_agent import InstitutionalDataAgent
 from src.agents.career_guidance_agent import CareerGuidanceAgent
 from src.agents.financial_aid_agent import FinancialAidAgent
+from src.agents.web_search_agent import WebSearchAgent
+from src.agents.skill_gap_agent import SkillGapAgent
 # Removed: AdmissionAdvisorAgent (deleted)
 from src.models.profile import StudentProfile
 from .genai_client import GenAIClient
 from .prompt_loader import load_prompt
+from .agent_graph import AgentGraph
+from .result_cache import ResultCache
+from .persistent_cache import PersistentResultCache
+from .single_flight import SingleFlight
+from .session_manager import SessionManager
+from .export_writer import default_writer
+from .semantic_cache import SemanticCache
+from .llm_usage import agent_scope
 
 
 
@@ -23,7 +34,7 @@ class Orchestrator:
         chosen_model = env_model if env_model else config_model
         if env_model and env_model != config_model:
             pass
-        self.genai = GenAIClient(model=chosen_model)
+        self.genai = GenAIClient(model=chosen_model, options=config.get("genai", {}))
         
         # Optional vector store
         vector_store = None
@@ -37,17 +48,78 @@ class Orchestrator:
         self.context = AgentContext(config, data_store, vector_store=vector_store, genai_client=self.genai)
         self.agents = self._initialize_agents()
         
-        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
-        self._cache_ttl = config.get("orchestrator", {}).get("cache_ttl_seconds", 120)
+        orch_cfg = config.get("orchestrator", {})
+        self._cache_ttl = orch_cfg.get("cache_ttl_seconds", 120)
+        # Bounded LRU so long-lived instances don't grow with every distinct profile
+        self._cache = ResultCache(
+            ttl_seconds=self._cache_ttl,
+            max_entries=orch_cfg.get("cache_max_entries", 256),
+            max_bytes=int(orch_cfg.get("cache_max_mb", 64) * 1024 * 1024),
+            sweep_interval=orch_cfg.get("cache_sweep_seconds", 60),
+        )
+        # Optional disk tier shared by every process on the host (Streamlit reruns, CLI runs)
+        self._disk_cache = None
+        disk_cfg = orch_cfg.get("persistent_cache", {}) or {}
+        if disk_cfg.get("enabled", False):
+            try:
+                self._disk_cache = PersistentResultCache(
+                    path=disk_cfg.get("path", os.path.join(".orchestrator_cache", "results.sqlite3")),
+                    ttl_seconds=disk_cfg.get("ttl_seconds", 86400),
+                    max_entries=disk_cfg.get("max_entries", 10000),
+                    max_bytes=int(disk_cfg.get("max_mb", 256) * 1024 * 1024),
+                )
+            except Exception:
+                self._disk_cache = None
+        # Per-agent results keyed on each agent's projected inputs, so a profile tweak
+        # only recomputes the agents that actually read the changed field
+        self._agent_cache = None
+        if orch_cfg.get("agent_cache", True):
+            self._agent_cache = ResultCache(
+                ttl_seconds=orch_cfg.get("agent_cache_ttl_seconds", self._cache_ttl),
+                max_entries=orch_cfg.get("agent_cache_max_entries", 1024),
+                max_bytes=int(orch_cfg.get("cache_max_mb", 64) * 1024 * 1024),
+                sweep_interval=orch_cfg.get("cache_sweep_seconds", 60),
+            )
+        # Near-duplicate reuse: similar interests/strengths share an agent's earlier output
+        self._semantic_cache = None
+        try:
+            self._semantic_cache = SemanticCache.from_config(orch_cfg.get("semantic_cache", {}) or {})
+        except Exception:
+            self._semantic_cache = None
+        # Default parallelism for run_many batches (bounded by the LLM quota in practice)
+        self._batch_concurrency = max(1, int(orch_cfg.get("batch_concurrency", 8)))
+        # Request time budget: agents that overrun their share return fallback output marked degraded
+        self._deadline = orch_cfg.get("deadline_seconds") or None
+        self._agent_budget = orch_cfg.get("agent_budget_seconds") or None
+        self._summary_budget = orch_cfg.get("summary_budget_seconds", 8)
+        self._fallback_reserve = orch_cfg.get("fallback_reserve_seconds", 0.5)
+        # Identical profiles submitted concurrently share one pipeline run
+        self._inflight = SingleFlight()
+        # Agents are independent LLM round trips, so by default they run side by side
+        self._concurrent = config.get("orchestrator", {}).get("concurrent_agents", True)
+        self._max_workers = max(1, int(config.get("orchestrator", {}).get("max_workers", 4)))
+        # Agents run on a bounded pool shared by every request: calls abandoned at the deadline keep a
+        # worker until they return, so under load new agents queue (and fall back) instead of piling up threads
+        pool_size = orch_cfg.get("agent_pool_size") or self._max_workers * self._batch_concurrency
+        self._agent_pool = ThreadPoolExecutor(max_workers=max(1, int(pool_size)), thread_name_prefix="agent")
+        self._fallback_pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="agent-fallback")
+        # Return agent results without waiting for the summary; it arrives via result["summary_future"]
+        self._defer_summary = orch_cfg.get("deferred_summary", False)
+        self._summary_tasks: set = set()  # deferred summaries started by arun, kept alive until done
+        # run_iter streams the summary as ("summary_chunk", text) events while it is generated
+        self._stream_summary = orch_cfg.get("stream_summary", False)
         self._export_dir = "exports"
         os.makedirs(self._export_dir, exist_ok=True)
+        self._exports = default_writer()
 
     def _initialize_agents(self) -> List:
-        # Only core 3 agents remain
+        # Core 3 agents plus the optional web_search -> skill_gap chain
         mapping = {
             "institutional_data": InstitutionalDataAgent,
             "career_guidance": CareerGuidanceAgent,
             "financial_aid": FinancialAidAgent,
+            "web_search": WebSearchAgent,
+            "skill_gap": SkillGapAgent,
         }
         enabled = self.config.get("agents", {}).get("enabled", [])
         agents = []
@@ -59,66 +131,700 @@ class Orchestrator:
                 pass
         return agents
 
+    def agent_graph(self) -> AgentGraph:
+        """Dependency graph of the agents that will run for a request."""
+        web_search_enabled = self.config.get("orchestrator", {}).get("enable_web_search", False)
+        # Web search is supplementary context only; it stays off unless explicitly enabled
+        scheduled = [a for a in self.agents if a.name != "web_search" or web_search_enabled]
+        return AgentGraph(scheduled)
+
+    def describe_agent_graph(self) -> Dict[str, Any]:
+        """Debug view of the agent DAG (nodes, edges and parallel execution waves)."""
+        return self.agent_graph().describe()
+
     def _profile_key(self, profile: StudentProfile) -> str:
         raw = json.dumps(profile.model_dump(), sort_keys=True)
         return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
-    def run(self, profile: StudentProfile) -> Dict[str, Any]:
+    def _cached_result(self, key: str):
+        cached = self._cache.get(key)
+        if cached is None and self._disk_cache is not None:
+            cached = self._disk_cache.get(key)
+            if cached is not None:
+                self._cache.set(key, cached)
+        return cached
+
+    def run(self, profile: StudentProfile, session: Optional[SessionManager] = None) -> Dict[str, Any]:
+        """Run every enabled agent (and the summary) for ``profile``.
+
+        With a ``session``, agents whose inputs are unchanged since the session's
+        previous turn reuse that turn's output instead of running again.
+        """
+        key = self._profile_key(profile)
+        cached = self._cached_result(key)
+        if cached is None:
+            # Later callers for the same profile wait on the in-flight run instead of repeating it
+            results, shared = self._inflight.do(key, lambda: self._run_pipeline(profile, key, session=session))
+            if not shared:
+                return results
+            cached = results
+        cached_copy = dict(cached)
+        cached_copy["cached"] = True
+        return cached_copy
+
+    def run_iter(
+        self, profile: StudentProfile, session: Optional[SessionManager] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """Stream a run: yield ``(agent_name, payload)`` as each agent finishes, then ``("summary", text)``.
+
+        Agents that stream their LLM output report early items as
+        ``("agent_partial", (agent_name, item))`` before their full payload. With
+        ``orchestrator.stream_summary`` the summary is also streamed as
+        ``("summary_chunk", text)`` events before the final ``("summary", text)``.
+        Cached and coalesced results are replayed in enabled order.
+        """
         key = self._profile_key(profile)
-        now = time.time()
-        if key in self._cache:
-            ts, cached = self._cache[key]
-            if now - ts < self._cache_ttl:
-                cached_copy = dict(cached)
-                cached_copy["cached"] = True
-                return cached_copy
+        events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        done_marker = object()
+        
+        def produce():
+            try:
+                cached = self._cached_result(key)
+                if cached is None:
+                    cached, _ = self._inflight.do(
+                        key,
+                        lambda: self._run_pipeline(
+                            profile, key, on_event=lambda n, p: events.put((n, p)), session=session
+                        ),
+                    )
+                events.put((done_marker, cached))
+            except BaseException as exc:
+                events.put((done_marker, exc))
+        
+        threading.Thread(target=produce, name="orchestrator-stream", daemon=True).start()
+        emitted = set()
+        while True:
+            name, payload = events.get()
+            if name is done_marker:
+                break
+            emitted.add(name)
+            yield name, payload
+        if isinstance(payload, BaseException):
+            raise payload
+        # Replay whatever did not stream live (cache hit, or another caller ran the pipeline)
+        for name, agent_payload in payload.get("agents", {}).items():
+            if name not in emitted:
+                yield name, agent_payload
+        if "summary" not in emitted:
+            summary = self.wait_for_summary(payload)
+            if summary:
+                yield "summary", summary
+
+    def run_many(
+        self,
+        profiles: Iterable[StudentProfile],
+        max_concurrency: Optional[int] = None,
+        as_completed_order: bool = False,
+    ) -> Union[List[Dict[str, Any]], Iterator[Tuple[int, Dict[str, Any]]]]:
+        """Run a batch of profiles in parallel.
+
+        Identical profiles are computed once; every profile in the batch shares the
+        orchestrator's result and per-agent caches. Returns results in input order, or
+        with ``as_completed_order=True`` an iterator of ``(index, result)`` as they finish.
+        Each result carries ``latency_ms``, the wall time of that profile's own run.
+        """
+        profiles = list(profiles)
+        # Deduplicate on the cache key; duplicates receive the first occurrence's result
+        indices_by_key: Dict[str, List[int]] = {}
+        for idx, profile in enumerate(profiles):
+            indices_by_key.setdefault(self._profile_key(profile), []).append(idx)
+        
+        workers = max(1, min(max_concurrency or self._batch_concurrency, len(indices_by_key) or 1))
+        
+        def run_one(profile: StudentProfile) -> Dict[str, Any]:
+            start = time.perf_counter()
+            try:
+                # Copied so the timing doesn't leak into the cached result
+                result = dict(self.run(profile))
+            except Exception as e:
+                result = {"student": profile.model_dump(), "agents": {}, "error": str(e)}
+            result["latency_ms"] = int((time.perf_counter() - start) * 1000)
+            return result
+        
+        def stream() -> Iterator[Tuple[int, Dict[str, Any]]]:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+                futures = {
+                    pool.submit(run_one, profiles[indices[0]]): indices
+                    for indices in indices_by_key.values()
+                }
+                for future in as_completed(futures):
+                    result = future.result()
+                    first, *duplicates = futures[future]
+                    yield first, result
+                    for idx in duplicates:
+                        duplicate = dict(result)
+                        duplicate["cached"] = True
+                        yield idx, duplicate
+        
+        if as_completed_order:
+            return stream()
+        ordered: List[Optional[Dict[str, Any]]] = [None] * len(profiles)
+        for idx, result in stream():
+            ordered[idx] = result
+        return ordered
+
+    async def arun(self, profile: StudentProfile, session: Optional[SessionManager] = None) -> Dict[str, Any]:
+        """Async counterpart of ``run`` for callers that already own an event loop.
+
+        Agents are awaited through ``BaseAgent.ahandle``, so LLM-bound agents don't
+        tie up a thread each while their request is outstanding.
+        """
+        key = self._profile_key(profile)
+        cached = self._cached_result(key)
+        if cached is None:
+            results, shared = await self._inflight.ado(key, lambda: self._arun_pipeline(profile, key, session))
+            if not shared:
+                return results
+            cached = results
+        cached_copy = dict(cached)
+        cached_copy["cached"] = True
+        return cached_copy
+
+    def _run_pipeline(
+        self,
+        profile: StudentProfile,
+        key: str,
+        on_event: Optional[Callable[[str, Any], None]] = None,
+        session: Optional[SessionManager] = None,
+    ) -> Dict[str, Any]:
+        # A run that finished just before this one joined the in-flight table is already cached
+        cached = self._cache.get(key) if key in self._cache else None
+        if cached is not None:
+            cached_copy = dict(cached)
+            cached_copy["cached"] = True
+            return cached_copy
+        
+        request_deadline = time.monotonic() + self._deadline if self._deadline else None
         
         # Convert profile to dict for agents
         profile_dict = profile.model_dump()
         
         results: Dict[str, Any] = {"student": profile_dict, "agents": {}}
         
-        # Step 1: OPTIONAL web search (for supplementary context only, not primary data)
-        # Programs agent now uses curated database with semantic search + LLM reasoning
-        web_search_results = None
-        web_search_enabled = self.config.get("orchestrator", {}).get("enable_web_search", False)
+        # Agents run as a dependency graph: each one starts as soon as the agents it
+        # consumes have finished (e.g. career_guidance waits for institutional_data)
+        graph = self.agent_graph()
+        # Streaming callers also get agents' early items as ("agent_partial", (agent_name, item))
+        listener = partial_listener.set(
+            (lambda name, item: on_event("agent_partial", (name, item))) if on_event is not None else None
+        )
+        try:
+            agent_results = self._execute_graph(
+                graph, profile_dict, on_result=on_event, deadline=request_deadline, session=session
+            )
+        finally:
+            partial_listener.reset(listener)
+        # Merge in enabled order so the payload shape does not depend on completion order
+        for name in graph.order:
+            results["agents"][name] = agent_results[name]
+        degraded = [name for name in graph.order if agent_results[name].get("degraded")]
         
-        if web_search_enabled:
-            pass
-            for agent in self.agents:
-                if agent.name == "web_search":
-                    try:
-                        web_search_results = agent.handle(profile_dict)
-                        results["agents"]["web_search"] = web_search_results
-                        
-                        # Add as supplementary context (optional)
-                        if web_search_results and web_search_results.get("search_results"):
-                            profile_dict["web_search_context"] = web_search_results.get("llm_summary", "")
-                    except Exception as e:
-                        results["agents"]["web_search"] = {"error": str(e)}
-                    break
-        else:
-            pass
+        summarize = self.config.get("orchestrator", {}).get("summarizer", False)
+        streaming = (
+            on_event is not None and self._stream_summary and hasattr(self.genai, "summarize_stream")
+        )
+        # A streaming caller already has the agent results, so there is nothing to gain by deferring
+        if summarize and self._defer_summary and not streaming:
+            # Agents are done: hand them back now and finish the summary in the background
+            if degraded:
+                results["degraded"] = list(degraded)
+            results["summary_future"] = self._spawn(self._finish_summary, dict(results), key, degraded)
+            return results
+        if summarize:
+            if streaming:
+                summary, on_time = self._stream_summary_within(results, request_deadline, on_event)
+            else:
+                summary, on_time = self._summarize_within(results, request_deadline)
+            if not on_time:
+                degraded.append("summary")
+            if summary:
+                results["summary"] = summary
+                if on_event is not None:
+                    on_event("summary", summary)
+                self._export_summary(results)
+        return self._store_result(key, results, degraded)
+
+    def _finish_summary(self, results: Dict[str, Any], key: str, degraded: List[str]) -> str:
+        """Deferred summary: summarize, export and cache the completed result; returns the summary."""
+        deadline = time.monotonic() + self._summary_budget if self._deadline else None
+        summary, on_time = self._summarize_within(results, deadline)
+        if not on_time:
+            degraded = degraded + ["summary"]
+        results["summary"] = summary
+        self._export_summary(results)
+        self._store_result(key, results, degraded)
+        return summary
+
+    def _store_result(self, key: str, results: Dict[str, Any], degraded: List[str]) -> Dict[str, Any]:
+        if degraded:
+            # Degraded output is only a stand-in; don't pin it in the cache for the TTL
+            results["degraded"] = degraded
+            return results
+        self._cache.set(key, results)
+        if self._disk_cache is not None:
+            self._disk_cache.set(key, results)
+        return results
+
+    @staticmethod
+    def wait_for_summary(result: Dict[str, Any], timeout: Optional[float] = None) -> Optional[str]:
+        """Summary text of a result, blocking on a deferred summary if it is still running."""
+        future = result.get("summary_future")
+        if future is not None:
+            return future.result(timeout=timeout)
+        return result.get("summary")
+
+    @staticmethod
+    async def await_summary(result: Dict[str, Any]) -> Optional[str]:
+        """Async ``wait_for_summary``; works for results from ``run`` and ``arun`` alike."""
+        future = result.get("summary_future")
+        if future is not None:
+            return await asyncio.wrap_future(future)
+        return result.get("summary")
+
+    def _future_from_task(self, task: "asyncio.Task") -> Future:
+        """Concurrent Future settled with ``task``'s outcome (the task stays referenced until then)."""
+        future: Future = Future()
+        self._summary_tasks.add(task)
+
+        def settle(done: "asyncio.Task") -> None:
+            self._summary_tasks.discard(done)
+            if done.cancelled():
+                future.cancel()
+            elif done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result())
+
+        task.add_done_callback(settle)
+        return future
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size of the result cache tiers."""
+        stats = self._cache.stats()
+        if self._disk_cache is not None:
+            stats["persistent"] = self._disk_cache.stats()
+        if self._agent_cache is not None:
+            stats["agents"] = self._agent_cache.stats()
+        stats["single_flight"] = self._inflight.stats()
+        if self._semantic_cache is not None:
+            stats["semantic"] = self._semantic_cache.stats()
+        llm_stats = self.genai.cache_stats() if hasattr(self.genai, "cache_stats") else None
+        if llm_stats is not None:
+            stats["llm"] = llm_stats
+        return stats
+
+    def llm_usage(self) -> Dict[str, Any]:
+        """LLM calls, tokens, latency and fallback hops aggregated per agent and per model."""
+        return self.genai.usage_stats() if hasattr(self.genai, "usage_stats") else {}
+
+    def _execute_graph(
+        self,
+        graph: AgentGraph,
+        profile_dict: Dict[str, Any],
+        on_result: Optional[Callable[[str, Any], None]] = None,
+        deadline: Optional[float] = None,
+        session: Optional[SessionManager] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run every agent in ``graph`` once its dependencies are done, with maximum parallelism.
+
+        ``on_result(name, payload)`` is called on the scheduling thread as each agent completes.
+        With a ``deadline`` (time.monotonic), agents that overrun their budget are abandoned and
+        replaced by their fallback output.
+        """
+        finished: Dict[str, Dict[str, Any]] = {}
+        
+        def record(name: str, payload: Dict[str, Any]) -> None:
+            finished[name] = payload
+            if on_result is not None:
+                on_result(name, payload)
+        
+        limit = min(self._max_workers, len(graph.order)) if self._concurrent else 1
+        if limit <= 1 and deadline is None:
+            for name in graph.topological_order():
+                view = self._agent_view(graph, name, profile_dict, finished)
+                record(name, self._run_agent(graph.agents[name], view, session))
+            return finished
+        
+        running: Dict[Future, Tuple[str, Optional[float], Dict[str, Any]]] = {}
         
-        # Step 2: Run all agents (they use curated data + LLM reasoning, not web search parsing)
-        for agent in self.agents:
-            if agent.name == "web_search":
-                continue  # Already handled above if enabled
+        def launch_ready():
+            in_flight = {entry[0] for entry in running.values()}
+            for name in graph.ready(list(finished)):
+                if name in in_flight or len(running) >= limit:
+                    continue
+                view = self._agent_view(graph, name, profile_dict, finished)
+                agent_deadline = self._agent_deadline(deadline)
+                if agent_deadline is not None and agent_deadline <= time.monotonic():
+                    record(name, self._degraded_payload(graph.agents[name], view))
+                    continue
+                future = self._submit(self._agent_pool, self._run_agent, graph.agents[name], view, session)
+                running[future] = (name, agent_deadline, view)
+        
+        launch_ready()
+        while running:
+            deadlines = [entry[1] for entry in running.values() if entry[1] is not None]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(running.pop(future)[0], future.result())
+            now = time.monotonic()
+            for future, (name, agent_deadline, view) in list(running.items()):
+                if agent_deadline is not None and now >= agent_deadline:
+                    # A queued agent is dropped; a running one is abandoned but still fills the agent cache
+                    future.cancel()
+                    del running[future]
+                    record(name, self._degraded_payload(graph.agents[name], view))
+            launch_ready()
+        return finished
+
+    @staticmethod
+    def _submit(pool: ThreadPoolExecutor, fn: Callable[..., Any], *args: Any) -> Future:
+        """Run ``fn`` on ``pool`` in a copy of the caller's context (partial-output listener, LLM scope)."""
+        return pool.submit(contextvars.copy_context().run, fn, *args)
+
+    @staticmethod
+    def _spawn(fn: Callable[..., Any], *args: Any) -> Future:
+        """Run ``fn`` on a daemon thread; unlike a pool worker, an overrunning call can be abandoned.
+
+        The caller's context variables (partial-output listener, LLM accounting scope) carry over.
+        """
+        future: Future = Future()
+        context = contextvars.copy_context()
+        
+        def target():
+            if not future.set_running_or_notify_cancel():
+                return
             try:
-                results["agents"][agent.name] = agent.handle(profile_dict)
-            except Exception as e:
-                results["agents"][agent.name] = {"error": str(e)}
+                future.set_result(context.run(fn, *args))
+            except BaseException as exc:
+                future.set_exception(exc)
         
+        threading.Thread(target=target, name="agent", daemon=True).start()
+        return future
+
+    def _agent_deadline(self, request_deadline: Optional[float]) -> Optional[float]:
+        """Latest time an agent started now may run before falling back."""
+        if request_deadline is None:
+            return None
+        end = request_deadline
         if self.config.get("orchestrator", {}).get("summarizer", False):
-            summary = self._summarize(results)
+            end -= self._summary_budget
+        if self._agent_budget:
+            end = min(end, time.monotonic() + self._agent_budget)
+        # Leave time to build the fallback so the request as a whole stays within budget
+        return end - self._fallback_reserve
+
+    def _degraded_payload(self, agent, profile_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Agent's fast non-LLM output, marked as degraded."""
+        reason = "Time budget exceeded; showing fallback results"
+        payload = None
+        fallback = getattr(agent, "fallback", None)
+        if fallback is not None:
+            # Fallbacks may still do I/O (e.g. an embedding lookup); cap them at the reserved time
+            future = self._submit(self._fallback_pool, fallback, profile_dict)
+            try:
+                payload = future.result(timeout=self._fallback_reserve)
+            except Exception:
+                future.cancel()
+                payload = None
+        payload = dict(payload) if payload else {"error": reason}
+        payload["degraded"] = True
+        payload["degraded_reason"] = reason
+        return payload
+
+    def _summarize_within(self, results: Dict[str, Any], deadline: Optional[float]) -> Tuple[str, bool]:
+        """Summary bounded by the request deadline; returns (summary, finished_in_time)."""
+        if deadline is None:
+            return self._summarize(results), True
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            future = self._spawn(self._summarize, results)
+            done, _ = wait([future], timeout=remaining)
+            if done:
+                return future.result(), True
+        return "(LLM summary unavailable - fill in manually)", False
+
+    def _stream_summary_within(
+        self,
+        results: Dict[str, Any],
+        deadline: Optional[float],
+        on_event: Callable[[str, Any], None],
+    ) -> Tuple[str, bool]:
+        """Streamed ``_summarize_within``: each chunk goes to ``on_event("summary_chunk", text)``.
+
+        A stream cut off by the deadline keeps the text received so far.
+        """
+        chunks: "queue.Queue[Any]" = queue.Queue()
+        end = object()
+        stop = threading.Event()
+        
+        def pump():
+            try:
+                with agent_scope("summary"):
+                    for chunk in self.genai.summarize_stream(self._summary_prompt(results)):
+                        if stop.is_set():
+                            break  # closes the stream and frees its request slot
+                        chunks.put(chunk)
+            finally:
+                chunks.put(end)
+        
+        self._spawn(pump)
+        parts: List[str] = []
+        on_time = True
+        while True:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            try:
+                if timeout is not None and timeout <= 0:
+                    raise queue.Empty
+                chunk = chunks.get(timeout=timeout)
+            except queue.Empty:
+                stop.set()
+                on_time = False
+                break
+            if chunk is end:
+                break
+            parts.append(chunk)
+            on_event("summary_chunk", chunk)
+        return "".join(parts) or "(LLM summary unavailable - fill in manually)", on_time
+
+    def _agent_view(
+        self,
+        graph: AgentGraph,
+        name: str,
+        profile_dict: Dict[str, Any],
+        finished: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Fresh profile dict for one agent, enriched with what its upstream agents provide."""
+        view = dict(profile_dict)
+        for dep in graph.dependencies[name]:
+            payload = finished.get(dep) or {}
+            if "error" in payload:
+                continue
+            try:
+                view.update(graph.agents[dep].contribute(payload))
+            except Exception:
+                pass
+        return view
+
+    def _agent_fingerprint(self, agent, profile_dict: Dict[str, Any]) -> Optional[str]:
+        """Key from the agent's projected inputs (None if the agent can't be fingerprinted)."""
+        projection = getattr(agent, "cache_projection", None)
+        if projection is None:
+            return None
+        try:
+            raw = json.dumps(projection(profile_dict), sort_keys=True, default=str)
+        except Exception:
+            return None
+        return f"{agent.name}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def _reuse_agent_result(
+        self, agent, fingerprint: Optional[str], session: Optional[SessionManager]
+    ) -> Optional[Dict[str, Any]]:
+        """Output from the session's previous turn or the per-agent cache, if the inputs match exactly."""
+        if fingerprint is None:
+            return None
+        if session is not None:
+            payload = session.recall_agent(agent.name, fingerprint)
+            if payload is not None:
+                return payload
+        if self._agent_cache is not None:
+            payload = self._agent_cache.get(fingerprint)
+            if payload is not None:
+                if session is not None:
+                    session.remember_agent(agent.name, fingerprint, payload)
+                return payload
+        return None
+
+    def _store_agent_result(
+        self,
+        agent,
+        fingerprint: Optional[str],
+        payload: Any,
+        session: Optional[SessionManager],
+        profile_dict: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if fingerprint is None or not isinstance(payload, dict) or "error" in payload:
+            return
+        if self._agent_cache is not None:
+            self._agent_cache.set(fingerprint, payload)
+        if session is not None:
+            session.remember_agent(agent.name, fingerprint, payload)
+        if self._semantic_cache is not None and profile_dict is not None:
+            try:
+                self._semantic_cache.store(agent.name, agent.cache_projection(profile_dict), payload)
+            except Exception:
+                pass
+
+    def _semantic_reuse(self, agent, fingerprint: Optional[str], profile_dict: Dict[str, Any]):
+        """Earlier output for near-identical inputs (semantic cache), or None."""
+        if self._semantic_cache is None or fingerprint is None:
+            return None
+        try:
+            return self._semantic_cache.lookup(agent.name, agent.cache_projection(profile_dict))
+        except Exception:
+            return None
+
+    def _run_agent(
+        self, agent, profile_dict: Dict[str, Any], session: Optional[SessionManager] = None
+    ) -> Dict[str, Any]:
+        """Run one agent, capturing failures as an error payload."""
+        fingerprint = self._agent_fingerprint(agent, profile_dict)
+        reused = self._reuse_agent_result(agent, fingerprint, session)
+        if reused is None:
+            reused = self._semantic_reuse(agent, fingerprint, profile_dict)
+        if reused is not None:
+            return reused
+        try:
+            with agent_scope(agent.name):
+                payload = agent.handle(profile_dict)
+        except Exception as e:
+            return {"error": str(e)}
+        self._store_agent_result(agent, fingerprint, payload, session, profile_dict)
+        return payload
+
+    async def _arun_pipeline(
+        self, profile: StudentProfile, key: str, session: Optional[SessionManager] = None
+    ) -> Dict[str, Any]:
+        """Async twin of ``_run_pipeline`` (same deadline, degradation and caching rules)."""
+        cached = self._cache.get(key) if key in self._cache else None
+        if cached is not None:
+            cached_copy = dict(cached)
+            cached_copy["cached"] = True
+            return cached_copy
+        
+        request_deadline = time.monotonic() + self._deadline if self._deadline else None
+        profile_dict = profile.model_dump()
+        results: Dict[str, Any] = {"student": profile_dict, "agents": {}}
+        
+        graph = self.agent_graph()
+        agent_results = await self._aexecute_graph(graph, profile_dict, deadline=request_deadline, session=session)
+        for name in graph.order:
+            results["agents"][name] = agent_results[name]
+        degraded = [name for name in graph.order if agent_results[name].get("degraded")]
+        
+        summarize = self.config.get("orchestrator", {}).get("summarizer", False)
+        if summarize and self._defer_summary:
+            if degraded:
+                results["degraded"] = list(degraded)
+            # The same concurrent Future as ``run`` hands out: single-flight shares this result with
+            # thread callers, so an asyncio Task here would break ``wait_for_summary``
+            results["summary_future"] = self._future_from_task(
+                asyncio.ensure_future(self._afinish_summary(dict(results), key, degraded))
+            )
+            return results
+        if summarize:
+            summary, on_time = await self._asummarize_within(results, request_deadline)
+            if not on_time:
+                degraded.append("summary")
             if summary:
                 results["summary"] = summary
                 self._export_summary(results)
-        self._cache[key] = (now, results)
-        return results
+        return self._store_result(key, results, degraded)
 
-    def _summarize(self, results: Dict[str, Any]) -> str:
-        """Generate comprehensive LLM summary using structured prompt template."""
+    async def _afinish_summary(self, results: Dict[str, Any], key: str, degraded: List[str]) -> str:
+        """Async ``_finish_summary``."""
+        deadline = time.monotonic() + self._summary_budget if self._deadline else None
+        summary, on_time = await self._asummarize_within(results, deadline)
+        if not on_time:
+            degraded = degraded + ["summary"]
+        results["summary"] = summary
+        self._export_summary(results)
+        self._store_result(key, results, degraded)
+        return summary
+
+    async def _aexecute_graph(
+        self,
+        graph: AgentGraph,
+        profile_dict: Dict[str, Any],
+        deadline: Optional[float] = None,
+        session: Optional[SessionManager] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Async ``_execute_graph``: one task per agent, started once its dependencies finish."""
+        finished: Dict[str, Dict[str, Any]] = {}
+        running: Dict[asyncio.Task, str] = {}
+        
+        def launch_ready():
+            in_flight = set(running.values())
+            for name in graph.ready(list(finished)):
+                if name in in_flight:
+                    continue
+                view = self._agent_view(graph, name, profile_dict, finished)
+                agent_deadline = self._agent_deadline(deadline)
+                if agent_deadline is not None and agent_deadline <= time.monotonic():
+                    finished[name] = self._degraded_payload(graph.agents[name], view)
+                    continue
+                task = asyncio.ensure_future(self._arun_agent(graph.agents[name], view, agent_deadline, session))
+                running[task] = name
+        
+        launch_ready()
+        while running:
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                finished[running.pop(task)] = task.result()
+            launch_ready()
+        return finished
+
+    async def _arun_agent(
+        self,
+        agent,
+        profile_dict: Dict[str, Any],
+        agent_deadline: Optional[float] = None,
+        session: Optional[SessionManager] = None,
+    ) -> Dict[str, Any]:
+        """Await one agent, bounded by ``agent_deadline``; failures become an error payload."""
+        fingerprint = self._agent_fingerprint(agent, profile_dict)
+        reused = self._reuse_agent_result(agent, fingerprint, session)
+        if reused is None and self._semantic_cache is not None:
+            # Embedding calls are blocking SDK calls
+            reused = await asyncio.to_thread(self._semantic_reuse, agent, fingerprint, profile_dict)
+        if reused is not None:
+            return reused
+        ahandle = getattr(agent, "ahandle", None)
+        timeout = None if agent_deadline is None else max(0.0, agent_deadline - time.monotonic())
+        try:
+            # The task (or worker thread) running the agent inherits the scope
+            with agent_scope(agent.name):
+                if ahandle is not None:
+                    call = ahandle(profile_dict)
+                else:
+                    call = asyncio.to_thread(agent.handle, profile_dict)
+                payload = await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            return self._degraded_payload(agent, profile_dict)
+        except Exception as e:
+            return {"error": str(e)}
+        if self._semantic_cache is not None:
+            await asyncio.to_thread(self._store_agent_result, agent, fingerprint, payload, session, profile_dict)
+        else:
+            self._store_agent_result(agent, fingerprint, payload, session, profile_dict)
+        return payload
+
+    async def _asummarize_within(
+        self, results: Dict[str, Any], deadline: Optional[float]
+    ) -> Tuple[str, bool]:
+        """Async ``_summarize_within``."""
+        if deadline is None:
+            return await self._asummarize(results), True
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            try:
+                return await asyncio.wait_for(self._asummarize(results), remaining), True
+            except asyncio.TimeoutError:
+                pass
+        return "(LLM summary unavailable - fill in manually)", False
+
+    def _summary_prompt(self, results: Dict[str, Any]) -> str:
+        """Structured summary prompt (simple fallback prompt if the template is missing)."""
         # Extract student profile
         student = results.get("student", {})
         
@@ -126,7 +832,7 @@ class Orchestrator:
         agents_data = results.get("agents", {})
         
         try:
-            prompt = load_prompt(
+            return load_prompt(
                 "orchestrator_summary",
                 student_name=student.get("name", "Student"),
                 interests=", ".join(student.get("interests") or []),
@@ -142,46 +848,51 @@ class Orchestrator:
                 interview_data=json.dumps(agents_data.get("interview_prep", {}), indent=2),
                 learning_data=json.dumps(agents_data.get("learning_path", {}), indent=2),
             )
-            
-            pass
-            summary = self.genai.summarize(prompt)
-            
-            if summary:
-                pass
-                return summary
-            else:
-                pass
-                return "(LLM summary unavailable - fill in manually)"
-            
         except FileNotFoundError:
             # Fallback to simple prompt if template not found
-            pass
-            fallback_prompt = (
+            return (
                 "Summarize guidance for the student based on: "
                 f"{agents_data.get('career_guidance', {})} and programs "
                 f"{agents_data.get('institutional_data', {})}. Focus on actionable next steps."
             )
-            summary = self.genai.summarize(fallback_prompt)
-            return summary or "(LLM summary unavailable - fill in manually)"
+
+    def _summarize(self, results: Dict[str, Any]) -> str:
+        """Generate comprehensive LLM summary using structured prompt template."""
+        try:
+            with agent_scope("summary"):
+                summary = self.genai.summarize(self._summary_prompt(results))
         except Exception:
-            pass
-            return "(LLM summary unavailable - fill in manually)"
+            summary = None
+        return summary or "(LLM summary unavailable - fill in manually)"
+
+    async def _asummarize(self, results: Dict[str, Any]) -> str:
+        """Async variant of ``_summarize``."""
+        try:
+            with agent_scope("summary"):
+                summary = await self.genai.asummarize(self._summary_prompt(results))
+        except Exception:
+            summary = None
+        return summary or "(LLM summary unavailable - fill in manually)"
 
     def _export_summary(self, results: Dict[str, Any]) -> None:
+        """Queue the markdown export on the background writer (never blocks the request)."""
         if "summary" not in results:
             return
         ts = int(time.time())
         path = os.path.join(self._export_dir, f"summary_{ts}.md")
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(f"# Counseling Summary\n\n{results['summary']}\n\n")
-                f.write("## Key Program Suggestions\n")
-                prog_section = results["agents"].get("institutional_data", {}).get("program_suggestions", [])
-                for item in prog_section:
-                    prog = item.get("program", {}) if isinstance(item, dict) else item
-                    name = prog.get("program", "Unknown")
-                    inst = prog.get("institution", "?")
-                    score = item.get("score") if isinstance(item, dict) else None
-                    f.write(f"- **{name}** ({inst})" + (f" score={score}" if score is not None else "") + "\n")
+            lines = [f"# Counseling Summary\n\n{results['summary']}\n\n", "## Key Program Suggestions\n"]
+            prog_section = results["agents"].get("institutional_data", {}).get("program_suggestions", [])
+            for item in prog_section:
+                prog = item.get("program", {}) if isinstance(item, dict) else item
+                name = prog.get("program", "Unknown")
+                inst = prog.get("institution", "?")
+                score = item.get("score") if isinstance(item, dict) else None
+                lines.append(f"- **{name}** ({inst})" + (f" score={score}" if score is not None else "") + "\n")
         except Exception:
-            pass
+            return
+        self._exports.write_text(path, "".join(lines))
+
+    def flush_exports(self, timeout: Optional[float] = None) -> bool:
+        """Wait for queued export files to be written (e.g. before a CLI run exits)."""
+        return self._exports.flush(timeout)
@@ -0,0 +1,55 @@
+"""
+Process-wide shared Orchestrator instances.
+
+Building an Orchestrator initializes the LLM client, builds a vector store and
+has every agent load (and embed) its catalog, and it starts with cold caches.
+UI sessions therefore share one instance per (config, data store, model)
+combination instead of constructing their own on every request. Orchestrator
+state touched per request (result/agent caches, single-flight table, GenAI
+model fallback) is thread-safe, so one instance can serve concurrent sessions.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict
+
+from .orchestrator import Orchestrator
+
+_instances: Dict[str, Orchestrator] = {}
+_build_locks: Dict[str, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def _instance_key(config: Dict[str, Any], data_store: Dict[str, Any]) -> str:
+    # MODEL_NAME / LLM_MODEL override the configured model inside Orchestrator.__init__
+    env_model = os.getenv("MODEL_NAME") or os.getenv("LLM_MODEL") or ""
+    raw = json.dumps({"config": config, "data": data_store, "model": env_model}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_orchestrator(config: Dict[str, Any], data_store: Dict[str, Any]) -> Orchestrator:
+    """Shared Orchestrator for this config and data store, built on first use."""
+    key = _instance_key(config, data_store)
+    with _lock:
+        orch = _instances.get(key)
+        if orch is not None:
+            return orch
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    # Build outside the global lock so other configs are not blocked; concurrent
+    # first requests for the same key wait for a single construction
+    with build_lock:
+        with _lock:
+            orch = _instances.get(key)
+        if orch is None:
+            orch = Orchestrator(config, data_store)
+            with _lock:
+                _instances[key] = orch
+    return orch
+
+
+def clear_orchestrators() -> None:
+    """Drop all shared instances (next ``get_orchestrator`` call rebuilds)."""
+    with _lock:
+        _instances.clear()
+        _build_locks.clear()
@@ -0,0 +1,179 @@
+"""
+Disk-backed result cache shared between processes.
+
+Entries live in a SQLite database in WAL mode, so several workers on the same
+host (Streamlit sessions, CLI runs, Cloud Run container restarts with a mounted
+volume) can read and write concurrently. Payloads are stored as zlib-compressed
+JSON; entries expire after a TTL and the least recently used rows are evicted
+once the entry count or the compressed byte budget is exceeded.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+
+class PersistentResultCache:
+    """SQLite (WAL) cache with TTL, size-based LRU eviction and compressed payloads."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 86400,
+        max_entries: int = 10000,
+        max_bytes: int = 256 * 1024 * 1024,
+        table: str = "results",
+        compress_level: int = 6,
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table!r}")
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.table = table
+        self.compress_level = compress_level
+        # sqlite3 connections must stay on the thread that created them
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._errors = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            " key TEXT PRIMARY KEY,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " payload BLOB NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; busy timeout lets concurrent writers from other processes queue up
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss, expired entry or read error."""
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                f"SELECT stored_at, payload FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count("_misses")
+                return None
+            stored_at, payload = row
+            if self.ttl_seconds is not None and now - stored_at >= self.ttl_seconds:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._count("_misses")
+                return None
+            value = json.loads(zlib.decompress(payload).decode("utf-8"))
+            conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        except Exception:
+            self._count("_errors")
+            self._count("_misses")
+            return None
+        self._count("_hits")
+        return value
+
+    def set(self, key: str, value: Any) -> bool:
+        """Store a JSON-serialisable value; returns False if it could not be written."""
+        try:
+            payload = zlib.compress(json.dumps(value, default=str).encode("utf-8"), self.compress_level)
+        except Exception:
+            self._count("_errors")
+            return False
+        if len(payload) > self.max_bytes:
+            return False
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, stored_at, accessed_at, size, payload)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, len(payload), sqlite3.Binary(payload)),
+            )
+            self._evict(conn, now)
+        except Exception:
+            self._count("_errors")
+            return False
+        return True
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired rows, then least recently used rows until both limits hold."""
+        if self.ttl_seconds is not None:
+            conn.execute(f"DELETE FROM {self.table} WHERE stored_at <= ?", (now - self.ttl_seconds,))
+        count, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed = 0
+        rows = conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC").fetchall()
+        for row_key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (row_key,))
+            count -= 1
+            total -= size
+            removed += 1
+        self._count("_evictions", removed)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._conn().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        except Exception:
+            self._count("_errors")
+
+    def clear(self) -> None:
+        try:
+            self._conn().execute(f"DELETE FROM {self.table}")
+        except Exception:
+            self._count("_errors")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-process counters plus the shared on-disk size."""
+        try:
+            entries, total = self._conn().execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        except Exception:
+            entries, total = None, None
+        with self._stats_lock:
+            lookups = self._hits + self._misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": total,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "errors": self._errors,
+            }
@@ -0,0 +1,213 @@
+"""
+Client-side rate limiting, retries and adaptive concurrency for LLM calls.
+
+- ``TokenBucket`` paces requests to the provisioned quota (requests per minute
+  with a small burst) so we don't send traffic that can only come back as 429.
+- ``RetryPolicy`` retries throttling and transient server errors with jittered
+  exponential backoff; anything else (bad request, auth, not found) fails fast.
+- ``AIMDController`` shrinks the shared concurrency limit multiplicatively when
+  the backend throttles and grows it by one slot per window of successes, so
+  in-flight calls settle just below what the quota sustains.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .concurrency import ConcurrencyLimiter
+
+# google.api_core exception class names for throttling / transient failures
+_THROTTLE_NAMES = {"ResourceExhausted", "TooManyRequests"}
+_TRANSIENT_NAMES = {"ServiceUnavailable", "DeadlineExceeded", "InternalServerError", "GatewayTimeout", "Aborted"}
+_THROTTLE_CODES = {429}
+_TRANSIENT_CODES = {500, 502, 503, 504}
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        if callable(value):
+            try:
+                value = value()
+            except Exception:
+                value = None
+        # api_core exposes HTTP codes as ints; grpc codes are enums with a ``value`` tuple
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_throttle(exc: BaseException) -> bool:
+    """Quota / rate-limit rejection (HTTP 429, RESOURCE_EXHAUSTED)."""
+    if type(exc).__name__ in _THROTTLE_NAMES or _status_code(exc) in _THROTTLE_CODES:
+        return True
+    text = str(exc)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text or "Quota exceeded" in text
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Throttling or a transient server/network failure worth retrying."""
+    if is_throttle(exc):
+        return True
+    if type(exc).__name__ in _TRANSIENT_NAMES or _status_code(exc) in _TRANSIENT_CODES:
+        return True
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers block (or await) until a token is available."""
+
+    def __init__(self, rate_per_second: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.rate = float(rate_per_second)
+        self.capacity = max(1, int(burst))
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self._waited = 0
+        self._wait_total = 0.0
+
+    def _reserve(self) -> float:
+        """Take a token (possibly going negative) and return how long to wait for it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            if delay > 0:
+                self._waited += 1
+                self._wait_total += delay
+            return delay
+
+    def acquire(self) -> float:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self) -> float:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_per_minute": round(self.rate * 60, 2),
+                "burst": self.capacity,
+                "paced": self._waited,
+                "paced_seconds": round(self._wait_total, 3),
+            }
+
+
+class RetryPolicy:
+    """Jittered exponential backoff ("full jitter") for retryable errors."""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._throttled = 0
+        self._gave_up = 0
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        """Count the failure and decide whether attempt ``attempt`` (0-based) gets another try."""
+        with self._lock:
+            if is_throttle(exc):
+                self._throttled += 1
+            if not is_retryable(exc):
+                return False
+            if attempt >= self.max_retries:
+                self._gave_up += 1
+                return False
+            self._retries += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_retries": self.max_retries,
+                "retries": self._retries,
+                "throttled": self._throttled,
+                "gave_up": self._gave_up,
+            }
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease control of a ConcurrencyLimiter's size."""
+
+    def __init__(
+        self,
+        limiter: ConcurrencyLimiter,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        decrease_factor: float = 0.5,
+        cooldown_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limiter = limiter
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit or limiter.max_in_flight))
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._successes = 0
+        self._last_decrease = float("-inf")
+        self._decreases = 0
+        self._increases = 0
+
+    def on_success(self) -> None:
+        with self._lock:
+            limit = self.limiter.max_in_flight
+            if limit >= self.max_limit:
+                return
+            self._successes += 1
+            # +1 slot per "window" of successes at the current limit
+            if self._successes >= limit:
+                self._successes = 0
+                self._increases += 1
+                self.limiter.set_limit(limit + 1)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            now = self._clock()
+            # One cut per burst: a wave of 429s from the same overload counts once
+            if now - self._last_decrease < self.cooldown_seconds:
+                return
+            self._last_decrease = now
+            self._successes = 0
+            self._decreases += 1
+            new_limit = max(self.min_limit, int(self.limiter.max_in_flight * self.decrease_factor))
+            self.limiter.set_limit(new_limit)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limiter.max_in_flight,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "increases": self._increases,
+                "decreases": self._decreases,
+            }
+
+
+_shared: Dict[str, Any] = {}
+_shared_lock = threading.Lock()
+
+
+def shared(name: str, factory: Callable[[], Any]) -> Any:
+    """Process-wide instance for ``name`` (quota is per project, not per client)."""
+    with _shared_lock:
+        instance = _shared.get(name)
+        if instance is None:
+            instance = _shared[name] = factory()
+        return instance
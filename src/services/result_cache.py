@@ -0,0 +1,158 @@
+"""
+Bounded in-memory result cache.
+
+Entries expire after a TTL, and the cache is capped both by entry count and by
+an approximate byte budget (size of the JSON-encoded value). When either cap is
+exceeded the least recently used entries are evicted. An optional background
+thread sweeps expired entries so idle instances do not hold stale payloads.
+"""
+import json
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached value in bytes."""
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe LRU + TTL cache with entry and byte limits."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 120,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._clock = clock
+        self._lock = threading.RLock()
+        # key -> (stored_at, size_bytes, value); order is least -> most recently used
+        self._entries: OrderedDict[str, Tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._rejected = 0
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if sweep_interval and sweep_interval > 0:
+            self._start_sweeper(sweep_interval)
+
+    def _start_sweeper(self, interval: float) -> None:
+        # The thread only holds a weak reference so an unused cache can still be collected
+        ref = weakref.ref(self)
+        stop = self._stop
+
+        def _loop():
+            while not stop.wait(interval):
+                cache = ref()
+                if cache is None:
+                    return
+                cache.sweep()
+                del cache
+
+        self._sweeper = threading.Thread(target=_loop, name="result-cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - stored_at >= self.ttl_seconds
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if self._expired(entry[0], self._clock()):
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def set(self, key: str, value: Any) -> bool:
+        """Store a value; returns False when it alone exceeds the byte budget."""
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self._rejected += 1
+                return False
+            self._entries[key] = (self._clock(), size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def sweep(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        with self._lock:
+            now = self._clock()
+            stale = [key for key, (stored_at, _, _) in self._entries.items() if self._expired(stored_at, now)]
+            for key in stale:
+                self._remove(key)
+            self._expirations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def close(self) -> None:
+        """Stop the background sweeper (if any)."""
+        self._stop.set()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry[0], self._clock())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "rejected": self._rejected,
+            }
@@ -0,0 +1,148 @@
+"""
+Semantic (near-duplicate) cache for agent outputs.
+
+UI profiles cluster heavily: many students pick the same interests and differ
+only slightly in strengths. After an exact per-agent cache miss, the agent's
+projected inputs are embedded and compared with earlier inputs for the same
+agent; when the cosine similarity clears that agent's threshold the earlier
+output is reused instead of making a fresh LLM call.
+
+Only list-valued fields (interests, strengths, upstream program titles) are
+compared by similarity. Scalar fields such as target level or budget must match
+exactly, so a neighbour is never reused across categories. Every decision is
+appended to a JSONL audit log when one is configured.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .embedding_client import EmbeddingClient
+from .export_writer import default_writer
+
+
+class SemanticCache:
+    """Per-agent nearest-neighbour reuse of outputs, gated by cosine similarity."""
+
+    def __init__(
+        self,
+        embedder: Any,
+        thresholds: Optional[Dict[str, float]] = None,
+        default_threshold: Optional[float] = None,
+        max_entries_per_agent: int = 512,
+        ttl_seconds: Optional[float] = 3600,
+        audit_log: Optional[str] = None,
+    ):
+        self.embedder = embedder
+        self.thresholds = dict(thresholds or {})
+        self.default_threshold = default_threshold
+        self.max_entries_per_agent = max(1, int(max_entries_per_agent))
+        self.ttl_seconds = ttl_seconds
+        self.audit_log = audit_log
+        self._lock = threading.Lock()
+        # agent -> exact-match bucket (scalar fields) -> entries (stored_at, embedding, text, payload)
+        self._entries: Dict[str, Dict[str, Deque[Tuple[float, List[float], str, Dict[str, Any]]]]] = {}
+        self._lookups = 0
+        self._reuses = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["SemanticCache"]:
+        """Build from ``orchestrator.semantic_cache`` (None when disabled or embeddings aren't semantic)."""
+        if not cfg or not cfg.get("enabled", False):
+            return None
+        embedder = EmbeddingClient()
+        # The offline hash fallback is not semantic; similarity on it would be noise
+        if not embedder.is_semantic:
+            return None
+        return cls(
+            embedder,
+            thresholds=cfg.get("thresholds"),
+            default_threshold=cfg.get("default_threshold"),
+            max_entries_per_agent=cfg.get("max_entries_per_agent", 512),
+            ttl_seconds=cfg.get("ttl_seconds", 3600),
+            audit_log=cfg.get("audit_log"),
+        )
+
+    def threshold(self, agent_name: str) -> Optional[float]:
+        return self.thresholds.get(agent_name, self.default_threshold)
+
+    @staticmethod
+    def _split(projection: Dict[str, Any]) -> Tuple[str, str]:
+        """(exact bucket key from scalar fields, text of list fields to embed)."""
+        scalars = {k: v for k, v in projection.items() if not isinstance(v, list)}
+        bucket = hashlib.sha256(json.dumps(scalars, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        text = "; ".join(
+            f"{k}: {', '.join(str(item) for item in v)}"
+            for k, v in sorted(projection.items())
+            if isinstance(v, list)
+        )
+        return bucket, text
+
+    def lookup(self, agent_name: str, projection: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Closest earlier output for similar inputs, or None."""
+        threshold = self.threshold(agent_name)
+        if threshold is None:
+            return None
+        bucket, text = self._split(projection)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries.get(agent_name, {}).get(bucket)
+            candidates = list(entries) if entries else []
+        candidates = [c for c in candidates if self.ttl_seconds is None or now - c[0] < self.ttl_seconds]
+        best, best_score = None, 0.0
+        if candidates and text:
+            query = self.embedder.embed([text])[0]
+            for entry in candidates:
+                score = self.embedder.cosine(query, entry[1])
+                if score > best_score:
+                    best, best_score = entry, score
+        reused = best is not None and best_score >= threshold
+        with self._lock:
+            self._lookups += 1
+            if reused:
+                self._reuses += 1
+        self._audit({
+            "ts": time.time(),
+            "agent": agent_name,
+            "decision": "reuse" if reused else "miss",
+            "similarity": round(best_score, 4),
+            "threshold": threshold,
+            "query": text,
+            "matched": best[2] if best is not None else None,
+        })
+        return best[3] if reused else None
+
+    def store(self, agent_name: str, projection: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        if self.threshold(agent_name) is None:
+            return
+        bucket, text = self._split(projection)
+        if not text:
+            return
+        embedding = self.embedder.embed([text])[0]
+        with self._lock:
+            buckets = self._entries.setdefault(agent_name, {})
+            entries = buckets.setdefault(bucket, deque())
+            entries.append((time.monotonic(), embedding, text, payload))
+            # Cap per agent across buckets by dropping the oldest entries
+            total = sum(len(e) for e in buckets.values())
+            while total > self.max_entries_per_agent:
+                oldest_key = min(buckets, key=lambda k: buckets[k][0][0] if buckets[k] else float("inf"))
+                buckets[oldest_key].popleft()
+                if not buckets[oldest_key]:
+                    del buckets[oldest_key]
+                total -= 1
+
+    def _audit(self, record: Dict[str, Any]) -> None:
+        if self.audit_log:
+            default_writer().append_text(self.audit_log, json.dumps(record, default=str) + "\n")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "lookups": self._lookups,
+                "reuses": self._reuses,
+                "reuse_rate": round(self._reuses / self._lookups, 4) if self._lookups else 0.0,
+                "entries": {agent: sum(len(e) for e in b.values()) for agent, b in self._entries.items()},
+            }
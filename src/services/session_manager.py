@@ -1,9 +1,16 @@
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from src.models.profile import StudentProfile
 
 class SessionManager:
     def __init__(self):
         self._history: List[Dict[str, Any]] = []
+        # Latest output per agent with the fingerprint of the inputs that produced it,
+        # so a refined profile only reruns the agents whose inputs changed
+        self._agent_memory: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._reused = 0
+        self._refreshed = 0
 
     def add_turn(self, profile: StudentProfile, result: Dict[str, Any]):
         self._history.append({"profile": profile.model_dump(), "result": result})
@@ -21,5 +28,26 @@ class SessionManager:
             profile.budget_category = "low"
         return profile
 
+    def recall_agent(self, agent_name: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Previous output of ``agent_name`` if it was produced from the same inputs."""
+        with self._lock:
+            remembered = self._agent_memory.get(agent_name)
+            if remembered is not None and remembered[0] == fingerprint:
+                self._reused += 1
+                return remembered[1]
+            return None
+
+    def remember_agent(self, agent_name: str, fingerprint: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            remembered = self._agent_memory.get(agent_name)
+            if remembered is None or remembered[0] != fingerprint:
+                self._refreshed += 1
+            self._agent_memory[agent_name] = (fingerprint, payload)
+
+    def reuse_stats(self) -> Dict[str, int]:
+        """How many agent runs were served from earlier turns vs. produced fresh this session."""
+        with self._lock:
+            return {"reused": self._reused, "refreshed": self._refreshed}
+
     def history(self) -> List[Dict[str, Any]]:
         return list(self._history)
@@ -0,0 +1,61 @@
+"""
+Import-time report for CLI startup (``python main.py --profile-startup ...``).
+
+The command is re-run in a child interpreter with ``-X importtime``, so CPython
+itself times every import, including the SDKs a backend loads lazily on first
+use. The child's own output passes through unchanged. Afterwards, the slowest
+modules are listed by cumulative time (the module plus everything it imported)
+and by self time.
+"""
+import subprocess
+import sys
+from typing import Iterable, List, NamedTuple, Sequence
+
+_PREFIX = "import time:"
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # 0 = imported directly by the program, not by another module
+
+
+def parse_importtime(lines: Iterable[str]) -> List[ImportTiming]:
+    """Entries from ``-X importtime`` output; other lines (and the header) are ignored."""
+    timings: List[ImportTiming] = []
+    for line in lines:
+        if not line.startswith(_PREFIX):
+            continue
+        parts = line[len(_PREFIX):].split("|", 2)
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2][1:]  # drop the separator's space; what remains is two spaces per nesting level
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        timings.append(ImportTiming(name.strip(), int(parts[0]), int(parts[1]), depth))
+    return timings
+
+
+def format_report(timings: Sequence[ImportTiming], top: int = 15) -> str:
+    total_ms = sum(t.cumulative_us for t in timings if t.depth == 0) / 1000
+    lines = [f"Startup imports: {len(timings)} modules, {total_ms:.1f} ms"]
+    for title, key in (("cumulative", lambda t: t.cumulative_us), ("self", lambda t: t.self_us)):
+        lines.append(f"Slowest by {title} time:")
+        for t in sorted(timings, key=key, reverse=True)[:top]:
+            lines.append(f"  {key(t) / 1000:9.1f} ms  {t.module}")
+    return "\n".join(lines)
+
+
+def run_profiled(script: str, argv: Sequence[str], top: int = 15) -> int:
+    """Run ``script`` with ``argv`` under ``-X importtime``, print the report to stderr, return its exit code."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", script, *argv],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    lines = proc.stderr.splitlines()
+    for line in lines:
+        if not line.startswith(_PREFIX):
+            print(line, file=sys.stderr)
+    print(format_report(parse_importtime(lines), top), file=sys.stderr)
+    return proc.returncode
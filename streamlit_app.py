@@ -4,7 +4,8 @@ import streamlit as st
 from pathlib import Path
 from datetime import datetime
 import uuid
-from src.services.orchestrator import Orchestrator
+from src.services.orchestrator_factory import get_orchestrator
+from src.services.session_manager import SessionManager
 from src.models.profile import StudentProfile
 from main import load_config, load_programs
 
@@ -493,19 +494,6 @@ if run_btn:
             budget_category=budget_cat,
         )
         
-        with st.spinner("🤖 AI agents analyzing your profile with live data..."):
-            orch = Orchestrator(config, st.session_state["data_store"])
-            result = orch.run(profile)
-            
-            # Save to history for admin panel
-            try:
-                save_request_history(profile, result)
-            except Exception as e:
-                # Don't break user flow if logging fails
-                st.warning(f"⚠️ History logging failed: {e}")
-        
-        st.success("✅ Analysis complete!")
-        
         # Display agent outputs in organized tabs - Only 3 core agents
         st.subheader("📊 AI Counselor Analysis Results")
         
@@ -521,21 +509,83 @@ if run_btn:
             "financial_aid": 2
         }
         
-        for agent_name, payload in result["agents"].items():
-            tab_idx = agent_mapping.get(agent_name)
-            if tab_idx is None:
-                continue  # Skip agents not in 3-agent system
-            
+        # One placeholder per tab so each renders as soon as its agent finishes
+        placeholders = {}
+        for agent_name, tab_idx in agent_mapping.items():
             with agent_tabs[tab_idx]:
-                display_func = agent_display_functions.get(agent_name)
-                if display_func:
-                    display_func(payload)
-                else:
-                    st.json(payload)
+                placeholders[agent_name] = st.empty()
+                placeholders[agent_name].info("⏳ Waiting for the AI counselor...")
+        
+        # The summary is rendered in place once it arrives, after the agent tabs are filled
+        st.subheader("📝 AI-Generated Guidance Summary")
+        summary_placeholder = st.empty()
+        summary_placeholder.info("⏳ The summary will appear once the AI counselor has reviewed all results...")
         
-        if "summary" in result:
-            st.subheader("📝 AI-Generated Guidance Summary")
-            st.markdown(result["summary"])
+        result = {"student": profile.model_dump(), "agents": {}}
+        with st.spinner("🤖 AI agents analyzing your profile with live data..."):
+            # Shared, warm instance: no per-click LLM client / vector store / catalog setup
+            orch = get_orchestrator(config, st.session_state["data_store"])
+            # One SessionManager per browser session: re-running with a tweaked profile
+            # only recomputes the agents whose inputs changed
+            if "counsel_session" not in st.session_state:
+                st.session_state["counsel_session"] = SessionManager()
+            session = st.session_state["counsel_session"]
+            streamed_summary = ""
+            partials = {}
+            for agent_name, payload in orch.run_iter(profile, session=session):
+                if agent_name == "summary_chunk":
+                    # Render the summary as it is generated instead of after the full response
+                    streamed_summary += payload
+                    summary_placeholder.markdown(streamed_summary + " ▌")
+                    continue
+                if agent_name == "agent_partial":
+                    # First recommendation(s) while the agent's LLM answer is still streaming
+                    partial_agent, item = payload
+                    partial_placeholder = placeholders.get(partial_agent)
+                    if partial_placeholder is not None and isinstance(item, dict):
+                        partials.setdefault(partial_agent, []).append(item)
+                        with partial_placeholder.container():
+                            st.caption("⏳ Still generating - first recommendations:")
+                            for early in partials[partial_agent]:
+                                st.markdown(f"**{early.get('title', '')}** - {early.get('institution', '')}")
+                                st.write(early.get("fit_reasoning", ""))
+                    continue
+                if agent_name == "summary":
+                    result["summary"] = payload
+                    summary_placeholder.markdown(payload)
+                    continue
+                result["agents"][agent_name] = payload
+                
+                placeholder = placeholders.get(agent_name)
+                if placeholder is None:
+                    continue  # Skip agents not in 3-agent system
+                
+                with placeholder.container():
+                    if payload.get("degraded"):
+                        st.warning("⏱️ The AI counselor took too long - showing quick matches instead.")
+                    display_func = agent_display_functions.get(agent_name)
+                    if display_func:
+                        display_func(payload)
+                    else:
+                        st.json(payload)
+            
+            for agent_name, placeholder in placeholders.items():
+                if agent_name not in result["agents"]:
+                    placeholder.info("This agent is not enabled.")
+            
+            session.add_turn(profile, result)
+            
+            # Save to history for admin panel
+            try:
+                save_request_history(profile, result)
+            except Exception as e:
+                # Don't break user flow if logging fails
+                st.warning(f"⚠️ History logging failed: {e}")
+        
+        if "summary" not in result:
+            summary_placeholder.info("Summary is disabled.")
+        
+        st.success("✅ Analysis complete!")
         
         # Program ranking table
         if "institutional_data" in result["agents"]:
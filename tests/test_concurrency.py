@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+from src.services.concurrency import ConcurrencyLimiter
+
+
+def test_threads_and_coroutines_share_the_cap():
+    limiter = ConcurrencyLimiter(2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def enter():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+
+    def leave():
+        with lock:
+            active.pop()
+
+    def sync_call():
+        with limiter.slot():
+            enter()
+            time.sleep(0.05)
+            leave()
+
+    async def async_call():
+        async with limiter.aslot():
+            enter()
+            await asyncio.sleep(0.05)
+            leave()
+
+    async def coroutines():
+        await asyncio.gather(*(async_call() for _ in range(3)))
+
+    threads = [threading.Thread(target=sync_call) for _ in range(3)]
+    threads.append(threading.Thread(target=lambda: asyncio.run(coroutines())))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) == 2
+    stats = limiter.stats()
+    assert stats["acquired"] == 6 and stats["in_flight"] == 0 and stats["waiting"] == 0
+    assert stats["queued"] >= 4 and stats["max_wait_ms"] > 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = ConcurrencyLimiter(1)
+
+    async def scenario():
+        await limiter.aacquire()
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        limiter.release()
+        await asyncio.gather(waiter, return_exceptions=True)
+        # The slot is free again for the next caller
+        await asyncio.wait_for(limiter.aacquire(), 1)
+        limiter.release()
+
+    asyncio.run(scenario())
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.acquire(timeout=0.1)
@@ -0,0 +1,112 @@
+from src.services import genai_client as gc
+from src.services.context_cache import CacheablePrompt, ContextCache
+from src.services.genai_client import GenAIClient
+
+PREFIX = "Static counselling instructions. " * 200
+
+
+class _Model:
+    def __init__(self, name):
+        self.name = name
+        self.prompts = []
+
+    def generate_content(self, contents, **kwargs):
+        self.prompts.append(contents)
+        return type("Resp", (), {"text": f"{self.name} answered"})()
+
+
+def test_cacheable_prompt_is_the_full_string():
+    prompt = CacheablePrompt("prefix|", "suffix")
+    assert prompt == "prefix|suffix" and isinstance(prompt, str)
+    assert (prompt.prefix, prompt.suffix) == ("prefix|", "suffix")
+
+
+def test_local_provider_simulates_hits_and_skips_small_prefixes():
+    cache = ContextCache(provider="local", min_prefix_tokens=100)
+    create = lambda prefix, ttl: (_ for _ in ()).throw(AssertionError("no remote cache in local mode"))
+    assert cache.handle_for("vertex", "m", PREFIX, create) is not None
+    assert cache.handle_for("vertex", "m", PREFIX, create) is not None
+    assert cache.handle_for("vertex", "m", "short", create) is None
+    stats = cache.stats()
+    assert (stats["created"], stats["hits"], stats["too_small"]) == (1, 1, 1)
+
+
+def test_failed_creation_is_not_retried_until_backoff():
+    now = [0.0]
+    calls = []
+
+    def create(prefix, ttl):
+        calls.append(prefix)
+        raise RuntimeError("400 cached content is too small")
+
+    cache = ContextCache(provider="auto", min_prefix_tokens=0, retry_seconds=60, clock=lambda: now[0])
+    assert cache.handle_for("gemini", "m", PREFIX, create) is None
+    assert cache.handle_for("gemini", "m", PREFIX, create) is None
+    assert len(calls) == 1
+    now[0] = 61
+    cache.handle_for("gemini", "m", PREFIX, create)
+    assert len(calls) == 2
+
+
+def test_vertex_calls_send_only_the_suffix_to_the_cached_model(monkeypatch):
+    monkeypatch.setattr(gc, "vertexai_init", None)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    client = GenAIClient(model="good-model")
+    client._client = _Model("good-model")
+    client.backend = "vertex"
+    client._context_cache = ContextCache(provider="auto", min_prefix_tokens=100)
+    cached_model = _Model("cached")
+    created = []
+    monkeypatch.setattr(
+        client, "_create_vertex_cache", lambda name, prefix, ttl: created.append(name) or cached_model
+    )
+    for suffix in ("profile A", "profile B"):
+        assert client.summarize(CacheablePrompt(PREFIX, suffix)) == "cached answered"
+    assert cached_model.prompts == ["profile A", "profile B"]
+    assert created == ["good-model"]
+    assert client.context_cache_stats()["hits"] == 1
+    # Plain prompts are unaffected
+    assert client.summarize("plain prompt") == "good-model answered"
+
+
+def _agent_prompts():
+    from src.agents.career_guidance_agent import CareerGuidanceAgent
+    from src.agents.financial_aid_agent import FinancialAidAgent
+    from src.agents.institutional_data_agent import InstitutionalDataAgent
+
+    # Prompt builders only; skip the agents' data and vector store loading
+    build = lambda cls, method, *args: getattr(cls.__new__(cls), method)(*args)
+    return {
+        "counselor_reasoning": build(InstitutionalDataAgent, "_build_counselor_prompt", [], ["AI"], [], "degree", [], "low"),
+        "key_skills": build(CareerGuidanceAgent, "_build_career_prompt", ["AI"], [], "degree", [], []),
+        "application_difficulty": build(FinancialAidAgent, "_build_aid_prompt", [], "low", "Singapore Citizen", "degree", ["AI"], []),
+    }
+
+
+def test_each_agent_prompt_carries_only_its_own_schema():
+    prompts = _agent_prompts()
+    for own_key, prompt in prompts.items():
+        assert isinstance(prompt, CacheablePrompt) and own_key in prompt.prefix
+        assert not any(key in prompt for key in prompts if key != own_key)
+
+
+def test_prefixes_below_the_threshold_are_sent_whole_and_prefix_first(monkeypatch):
+    import yaml
+
+    with open("config.yaml", encoding="utf-8") as f:
+        min_tokens = yaml.safe_load(f)["genai"]["context_cache"]["min_prefix_tokens"]
+    monkeypatch.setattr(gc, "vertexai_init", None)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    client = GenAIClient(model="good-model")
+    client._client = _Model("good-model")
+    client.backend = "vertex"
+    client._context_cache = ContextCache(provider="auto", min_prefix_tokens=min_tokens)
+    monkeypatch.setattr(
+        client, "_create_vertex_cache", lambda *args: (_ for _ in ()).throw(AssertionError("prefix too small to cache"))
+    )
+    prompts = list(_agent_prompts().values())
+    for prompt in prompts:
+        client.summarize(prompt, use_cache=False)
+    # No explicit cache: the provider sees the unchanged prompt, static part first
+    assert client._client.prompts == prompts
+    assert client.context_cache_stats()["too_small"] == 3
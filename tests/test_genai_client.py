@@ -0,0 +1,249 @@
+import threading
+
+from src.services import genai_client as gc
+from src.services.circuit_breaker import BreakerRegistry
+from src.services.genai_client import GenAIClient
+
+
+class _FakeModel:
+    """Stands in for vertexai GenerativeModel; only ``good-model`` answers."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, prompt):
+        if self.name != "good-model":
+            raise RuntimeError("404 model not found")
+        return type("Resp", (), {"text": f"{self.name}: {prompt}"})()
+
+
+def _vertex_client(monkeypatch, model="bad-model"):
+    # No real SDK initialisation: build an unconfigured client, then attach the fake model
+    monkeypatch.setattr(gc, "vertexai_init", None)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    client = GenAIClient(model=model)
+    monkeypatch.setattr(gc, "GenerativeModel", _FakeModel)
+    monkeypatch.setenv("ALT_MODELS", "other-bad,good-model")
+    client._client = _FakeModel(model)
+    client.backend = "vertex"
+    # Fresh model health per test (the default registry is process-wide)
+    client._breakers = BreakerRegistry(failure_threshold=1, reset_seconds=60)
+    return client
+
+
+def test_concurrent_fallback_switches_model_once(monkeypatch):
+    client = _vertex_client(monkeypatch)
+    outputs = []
+    threads = [threading.Thread(target=lambda i=i: outputs.append(client.summarize(f"q{i}"))) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(outputs) == sorted(f"good-model: q{i}" for i in range(8))
+    assert client.model == "good-model"
+    assert client._client.name == "good-model"
+
+
+class _CountingModel(_FakeModel):
+    calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        type(self).calls += 1
+        return type("Resp", (), {"text": f"answer {type(self).calls}"})()
+
+
+def test_response_cache_hits_bypass_and_disk(monkeypatch, tmp_path):
+    monkeypatch.setattr(gc, "vertexai_init", None)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    options = {"response_cache": {"enabled": True, "persistent": True, "path": str(tmp_path / "llm.sqlite3")}}
+
+    def make_client():
+        client = GenAIClient(model="good-model", options=options)
+        client._client = _CountingModel("good-model")
+        client.backend = "vertex"
+        return client
+
+    _CountingModel.calls = 0
+    client = make_client()
+    assert client.summarize("same prompt") == "answer 1"
+    assert client.summarize("same prompt") == "answer 1"
+    assert _CountingModel.calls == 1
+    # Bypass goes to the model and refreshes the cached answer
+    assert client.summarize("same prompt", use_cache=False) == "answer 2"
+    assert client.summarize("same prompt") == "answer 2"
+    stats = client.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (2, 1, 1)
+    # A new process-level client is served from the disk tier
+    assert make_client().summarize("same prompt") == "answer 2"
+    assert _CountingModel.calls == 2
+    client.generation_config = {"temperature": 0.9}
+    assert client.summarize("same prompt") == "answer 3"
+
+
+class _AsyncStandIn(_FakeModel):
+    """Local async backend: answers after a short delay and tracks peak concurrency."""
+
+    active = 0
+    peak = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        import asyncio
+        cls = type(self)
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        await asyncio.sleep(0.02)
+        cls.active -= 1
+        return type("Resp", (), {"text": f"async {prompt}"})()
+
+
+def test_asummarize_is_bounded_by_the_limiter(monkeypatch):
+    import asyncio
+    from src.services.concurrency import ConcurrencyLimiter
+
+    client = _vertex_client(monkeypatch, model="good-model")
+    client._client = _AsyncStandIn("good-model")
+    client._limiter = ConcurrencyLimiter(2)
+
+    async def burst():
+        return await asyncio.gather(*(client.asummarize(f"q{i}") for i in range(6)))
+
+    assert asyncio.run(burst()) == [f"async q{i}" for i in range(6)]
+    assert _AsyncStandIn.peak == 2
+    assert client.limiter_stats()["queued"] == 4
+
+
+class _TrackedModel(_FakeModel):
+    attempts = []
+
+    def generate_content(self, prompt, **kwargs):
+        type(self).attempts.append(self.name)
+        return super().generate_content(prompt)
+
+
+def test_open_breaker_skips_failing_models(monkeypatch):
+    client = _vertex_client(monkeypatch, model="good-model")
+    monkeypatch.setattr(gc, "GenerativeModel", _TrackedModel)
+    monkeypatch.setenv("ALT_MODELS", "other-bad,good-model")
+    client._client = _TrackedModel("bad-model")
+    client.model = "bad-model"
+    _TrackedModel.attempts = []
+    # Keep the failing primary: the promotion is undone so only the breaker helps
+    monkeypatch.setattr(client, "_promote", lambda *args: None)
+    assert client.summarize("one", use_cache=False) == "good-model: one"
+    assert client.summarize("two", use_cache=False) == "good-model: two"
+    assert _TrackedModel.attempts == ["bad-model", "other-bad", "good-model", "good-model"]
+    health = client.model_health()
+    assert health["vertex/bad-model"]["state"] == "open"
+    assert health["vertex/good-model"]["state"] == "closed"
+
+
+class _ThrottledModel(_FakeModel):
+    failures = 2
+
+    def generate_content(self, prompt, **kwargs):
+        cls = type(self)
+        if cls.failures:
+            cls.failures -= 1
+            raise RuntimeError("429 RESOURCE_EXHAUSTED: Quota exceeded")
+        return super().generate_content(prompt)
+
+
+def test_quota_errors_are_retried_with_backoff(monkeypatch):
+    from src.services.concurrency import ConcurrencyLimiter
+    from src.services.rate_limit import AIMDController, RetryPolicy
+
+    client = _vertex_client(monkeypatch, model="good-model")
+    monkeypatch.setenv("ALT_MODELS", "good-model")
+    client._client = _ThrottledModel("good-model")
+    client._retry = RetryPolicy(max_retries=3, base_delay=0.001)
+    client._limiter = ConcurrencyLimiter(4)
+    client._aimd = AIMDController(client._limiter, cooldown_seconds=0)
+    assert client.summarize("q") == "good-model: q"
+    stats = client.rate_limit_stats()
+    assert stats["retry"]["retries"] == 2
+    # Halved twice (4 -> 2 -> 1), then one slot back after the success
+    assert stats["adaptive_concurrency"]["decreases"] == 2
+    assert stats["adaptive_concurrency"]["limit"] == 2
+
+
+class _StreamingModel(_FakeModel):
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if self.name != "good-model":
+            raise RuntimeError("404 model not found")
+        return iter([type("Chunk", (), {"text": word})() for word in ("Study ", "data ", "science.")])
+
+
+def test_summarize_stream_falls_back_before_first_chunk(monkeypatch):
+    client = _vertex_client(monkeypatch)
+    monkeypatch.setattr(gc, "GenerativeModel", _StreamingModel)
+    client._client = _StreamingModel("bad-model")
+    client._response_cache = gc.LLMResponseCache.from_config({"enabled": True})
+    assert list(client.summarize_stream("q")) == ["Study ", "data ", "science."]
+    assert client.model == "good-model"
+    assert client.model_health()["vertex/bad-model"]["state"] == "open"
+    # A completed stream is cached (keyed by the now-primary model) and replayed as one chunk
+    assert list(client.summarize_stream("q")) == ["Study ", "data ", "science."]
+    assert list(client.summarize_stream("q")) == ["Study data science."]
+    assert client.limiter_stats()["in_flight"] == 0
+
+
+class _MeteredModel(_FakeModel):
+    def generate_content(self, prompt, **kwargs):
+        if self.name != "good-model":
+            raise RuntimeError("404 model not found")
+        usage = type("Usage", (), {"prompt_token_count": 12, "candidates_token_count": 30})()
+        return type("Resp", (), {"text": "metered", "usage_metadata": usage})()
+
+
+def test_usage_is_tracked_per_agent_and_model(monkeypatch):
+    from src.services.llm_usage import UsageTracker, agent_scope
+
+    client = _vertex_client(monkeypatch)
+    monkeypatch.setattr(gc, "GenerativeModel", _MeteredModel)
+    client._client = _MeteredModel("bad-model")
+    client._usage = UsageTracker()
+    with agent_scope("career_guidance"):
+        assert client.summarize("q") == "metered"
+    client._client = _FakeModel("good-model")
+    client.model = "good-model"
+    with agent_scope("summary"):
+        client.summarize("no usage metadata here")
+    stats = client.usage_stats()
+    career = stats["by_agent"]["career_guidance"]
+    assert (career["calls"], career["prompt_tokens"], career["output_tokens"]) == (1, 12, 30)
+    # bad-model -> other-bad -> good-model
+    assert career["fallback_hops"] == 2
+    summary = stats["by_agent"]["summary"]
+    assert summary["estimated_calls"] == 1 and summary["prompt_tokens"] > 0
+    assert stats["by_model"]["good-model"]["calls"] == 2
+
+
+def test_hedge_win_keeps_primary_and_its_limiter_slot(monkeypatch):
+    import time
+    from src.services.concurrency import ConcurrencyLimiter
+    from src.services.hedging import Hedger
+
+    release = threading.Event()
+
+    class _SlowPrimary(_FakeModel):
+        def generate_content(self, prompt, **kwargs):
+            if self.name == "slow-model":
+                release.wait(5)
+            return type("Resp", (), {"text": f"{self.name}: {prompt}"})()
+
+    client = _vertex_client(monkeypatch, model="slow-model")
+    monkeypatch.setattr(gc, "GenerativeModel", _SlowPrimary)
+    monkeypatch.setenv("ALT_MODELS", "good-model")
+    client._client = _SlowPrimary("slow-model")
+    client._limiter = ConcurrencyLimiter(4)
+    client._hedger = Hedger(delay_seconds=0.01)
+    assert client.summarize("q", use_cache=False) == "good-model: q"
+    # The backup won one race; the configured model stays primary
+    assert client.model == "slow-model" and client._client.name == "slow-model"
+    # The abandoned primary request still holds its slot
+    assert client.limiter_stats()["in_flight"] == 1
+    release.set()
+    deadline = time.monotonic() + 5
+    while client.limiter_stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.limiter_stats()["in_flight"] == 0
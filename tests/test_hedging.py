@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+from src.services.hedging import Hedger
+
+
+def test_backup_wins_when_primary_is_slow():
+    hedger = Hedger(delay_seconds=0.05)
+    finished = []
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "primary"
+
+    # The primary is still blocked, so only the backup can have answered
+    assert hedger.run(slow, lambda: "backup", on_hedge_done=lambda: finished.append(True)) == "backup"
+    release.set()
+    assert hedger.run(lambda: "fast", lambda: "backup") == "fast"
+    stats = hedger.stats()
+    assert (stats["requests"], stats["hedged"], stats["hedge_wins"]) == (2, 1, 1)
+    assert stats["hedge_rate"] == 0.5 and stats["win_rate"] == 1.0
+    assert finished == [True]
+
+
+def test_empty_first_answer_waits_for_the_other():
+    hedger = Hedger(delay_seconds=0.01)
+
+    def slow_primary():
+        time.sleep(0.1)
+        return "primary"
+
+    assert hedger.run(slow_primary, lambda: None) == "primary"
+    assert hedger.stats()["hedge_wins"] == 0
+
+
+def test_no_hedge_without_quota_or_warm_window():
+    hedger = Hedger(delay_seconds=0.01)
+    calls = []
+
+    def slow():
+        time.sleep(0.05)
+        return "primary"
+
+    assert hedger.run(slow, lambda: calls.append("backup"), can_hedge=lambda: False) == "primary"
+    assert calls == []
+    # Rolling-p95 mode does not hedge until min_samples latencies are known
+    rolling = Hedger(min_samples=3)
+    assert rolling.threshold() is None
+    for _ in range(3):
+        rolling.run(lambda: "ok", lambda: "backup")
+    assert rolling.threshold() == rolling.min_delay_seconds
+    assert rolling.stats()["hedged"] == 0
+
+
+def test_async_race_cancels_loser():
+    hedger = Hedger(delay_seconds=0.02)
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "primary"
+
+    async def backup():
+        return "backup"
+
+    assert asyncio.run(hedger.arun(slow, backup)) == "backup"
+    assert cancelled == [True]
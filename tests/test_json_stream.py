@@ -0,0 +1,49 @@
+from src.services.json_stream import JSONArrayStream, iter_json_array, parse_json_array
+
+
+def test_elements_are_yielded_as_they_complete():
+    parser = JSONArrayStream()
+    assert parser.feed('```json\n[{"name": "A", "note": "uses [brackets], \\"quotes\\""}') == [
+        {"name": "A", "note": 'uses [brackets], "quotes"'}
+    ]
+    assert parser.feed(', {"name": "B", "tags": ["x",') == []
+    assert parser.feed(' "y"]}]\n```\nHope this helps!') == [{"name": "B", "tags": ["x", "y"]}]
+    assert parser.complete and not parser.truncated
+
+
+def test_truncated_array_keeps_valid_prefix_and_skips_bad_elements():
+    text = '[{"a": 1}, {"a": oops}, 3, "s", {"a": 2}, {"a": 3, "b": "cut of'
+    assert parse_json_array(text) == [{"a": 1}, 3, "s", {"a": 2}]
+    chunks = [text[i:i + 5] for i in range(0, len(text), 5)]
+    assert list(iter_json_array(chunks)) == [{"a": 1}, 3, "s", {"a": 2}]
+    assert parse_json_array("no json here") == []
+    assert parse_json_array(None) == []
+
+
+def test_counselor_streams_only_when_partials_are_consumed():
+    from src.agents.base import AgentContext, partial_listener
+    from src.agents.institutional_data_agent import InstitutionalDataAgent
+
+    class GenAI:
+        def __init__(self):
+            self.calls = []
+
+        def summarize(self, prompt):
+            self.calls.append("summarize")
+            return "[]"
+
+        def summarize_stream(self, prompt):
+            self.calls.append("stream")
+            yield "[]"
+
+    genai = GenAI()
+    agent = InstitutionalDataAgent(AgentContext({}, {}, genai_client=genai))
+    request = {"prompt": "p", "programs_for_analysis": [], "target_level": "diploma"}
+    assert agent._ask_counselor(request) == "[]"
+    token = partial_listener.set(lambda name, item: None)
+    try:
+        # The streamed text comes back whole, so both paths finish the same way
+        assert agent._ask_counselor(request) == "[]"
+    finally:
+        partial_listener.reset(token)
+    assert genai.calls == ["summarize", "stream"]
@@ -0,0 +1,59 @@
+import time
+
+from src.services import genai_client as gc
+from src.services.export_writer import default_writer
+from src.services.genai_client import GenAIClient
+from src.services.llm_replay import LatencyModel, ReplayBackend
+
+
+class _Model:
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, prompt, **kwargs):
+        return type("Resp", (), {"text": f"real answer to {prompt}"})()
+
+
+def test_record_then_replay_offline(monkeypatch, tmp_path):
+    monkeypatch.delenv("LLM_REPLAY", raising=False)
+    monkeypatch.delenv("LLM_CASSETTE", raising=False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(gc, "vertexai_init", None)
+    cassette = str(tmp_path / "cassette.jsonl")
+
+    recorder = GenAIClient(model="good-model", options={"replay": {"mode": "record", "cassette": cassette}})
+    recorder._client = _Model("good-model")
+    recorder.backend = "vertex"
+    assert recorder.summarize("q1") == "real answer to q1"
+    assert recorder.replay_stats()["recorded"] == 1
+    assert default_writer().flush(timeout=5)
+
+    options = {"replay": {"mode": "replay", "cassette": cassette, "latency": {"distribution": "fixed", "ms": 50}}}
+    replayer = GenAIClient(model="good-model", options=options)
+    assert replayer.backend == "replay"
+    start = time.monotonic()
+    assert replayer.summarize("q1") == "real answer to q1"
+    assert time.monotonic() - start >= 0.05
+    assert list(replayer.summarize_stream("q1")) == ["real answer to q1"]
+    assert replayer.summarize("never recorded") is None
+    stats = replayer.replay_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    # A response cache in front of replay would skip the simulated latency on repeats
+    cached = GenAIClient(model="good-model", options={**options, "response_cache": {"enabled": True}})
+    assert cached.summarize("q1") == cached.summarize("q1") == "real answer to q1"
+    assert cached.replay_stats()["hits"] == 4
+    assert cached.cache_stats()["hits"] == 0
+
+
+def test_env_selects_mode_and_latency_distributions(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_REPLAY", "replay")
+    monkeypatch.setenv("LLM_CASSETTE", str(tmp_path / "env.jsonl"))
+    backend = ReplayBackend.from_config({"mode": "record"})
+    assert backend.mode == "replay" and backend.path.endswith("env.jsonl")
+    monkeypatch.delenv("LLM_REPLAY")
+    assert ReplayBackend.from_config({}) is None
+
+    assert LatencyModel("recorded", scale=0.5).sample(200) == 0.1
+    assert LatencyModel("none").sample(200) == 0.0
+    samples = [LatencyModel("lognormal", median_ms=100, sigma=0.5, seed=1).sample() for _ in range(3)]
+    assert all(s > 0 for s in samples)
@@ -1,3 +1,4 @@
+from src.agents.base import BaseAgent
 from src.services.orchestrator import Orchestrator
 from src.models.profile import StudentProfile
 
@@ -22,3 +23,388 @@ def test_orchestrator_basic():
     assert "institutional_data" in result["agents"]
     assert len(result["agents"]["institutional_data"]["program_suggestions"]) >= 1
     assert result["agents"]["career_guidance"]["career_pathways"][0]["suggested_path"]
+
+
+class _SleepyAgent:
+    def __init__(self, name, delay, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+
+    def handle(self, profile):
+        import time
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return {"agent": self.name}
+
+
+class _RendezvousAgent(_SleepyAgent):
+    """Waits at ``barrier`` until every agent sharing it is running; breaks it if they run one at a time."""
+
+    def __init__(self, name, barrier, fail=False):
+        super().__init__(name, 0, fail)
+        self.barrier = barrier
+
+    def handle(self, profile):
+        self.barrier.wait()
+        return super().handle(profile)
+
+
+def test_concurrent_agents_run_in_parallel():
+    import threading
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False, "concurrent_agents": True}}
+    orch = Orchestrator(cfg, {"programs": []})
+    barrier = threading.Barrier(3, timeout=5)
+    orch.agents = [_RendezvousAgent("a", barrier), _RendezvousAgent("b", barrier), _RendezvousAgent("c", barrier, fail=True)]
+    profile = StudentProfile(name="Par", interests=["AI"])
+    result = orch.run(profile)
+    assert list(result["agents"]) == ["a", "b", "c"]
+    assert result["agents"]["a"] == {"agent": "a"}
+    assert result["agents"]["c"] == {"error": "c failed"}
+
+
+class _ProgramsAgent(_SleepyAgent):
+    provides = ("program_suggestions",)
+
+    def contribute(self, payload):
+        return {"program_suggestions": ["P1"]}
+
+
+class _CareerAgent(_SleepyAgent):
+    consumes = ("programs",)
+
+    def handle(self, profile):
+        return {"seen": profile.get("program_suggestions")}
+
+
+def test_agent_graph_feeds_dependencies():
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False}}
+    orch = Orchestrator(cfg, {"programs": []})
+    orch.agents = [_CareerAgent("career", 0), _ProgramsAgent("programs", 0.1), _SleepyAgent("aid", 0.1)]
+    result = orch.run(StudentProfile(name="Dag", interests=["AI"]))
+    assert list(result["agents"]) == ["career", "programs", "aid"]
+    assert result["agents"]["career"] == {"seen": ["P1"]}
+    graph = orch.describe_agent_graph()
+    assert graph["levels"] == [["programs", "aid"], ["career"]]
+    assert ["programs", "career"] in graph["edges"]
+
+
+class _CountingAgent(BaseAgent):
+    """Counts ``handle`` calls; ``fields`` are the profile keys it depends on."""
+
+    def __init__(self, name, fields):
+        super().__init__(None)
+        self.name = name
+        self.cache_fields = fields
+        self.calls = 0
+
+    def handle(self, profile):
+        self.calls += 1
+        return {"calls": self.calls}
+
+
+def test_agent_cache_reuses_unaffected_agents():
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False}}
+    orch = Orchestrator(cfg, {"programs": []})
+    career = _CountingAgent("career", ("interests",))
+    aid = _CountingAgent("aid", ("budget_category",))
+    orch.agents = [career, aid]
+    orch.run(StudentProfile(name="A", interests=["AI", "Data"], budget_category="medium"))
+    orch.run(StudentProfile(name="A", interests=["data", "ai"], budget_category="low"))
+    assert career.calls == 1, "Interest order/case changes should reuse the cached agent result"
+    assert aid.calls == 2
+    assert orch.cache_stats()["agents"]["hits"] == 1
+
+
+def test_run_iter_streams_in_completion_order():
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False}}
+    orch = Orchestrator(cfg, {"programs": []})
+    import threading
+    fast_done = threading.Event()
+
+    class GatedAgent(_SleepyAgent):
+        # Can only finish once "fast" has been streamed to the caller
+        def handle(self, profile):
+            assert fast_done.wait(5)
+            return super().handle(profile)
+
+    orch.agents = [GatedAgent("slow", 0), _SleepyAgent("fast", 0)]
+    profile = StudentProfile(name="Stream", interests=["AI"])
+    events = []
+    for name, payload in orch.run_iter(profile):
+        events.append((name, payload))
+        if name == "fast":
+            fast_done.set()
+    assert [name for name, _ in events] == ["fast", "slow"]
+    # Second call is served from cache and replayed in enabled order
+    assert [name for name, _ in orch.run_iter(profile)] == ["slow", "fast"]
+
+
+def test_run_many_deduplicates_and_keeps_input_order():
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False}}
+    orch = Orchestrator(cfg, {"programs": []})
+    import threading
+    # Only completes if the three distinct profiles are in flight together
+    orch.agents = [_RendezvousAgent("a", threading.Barrier(3, timeout=5))]
+    profiles = [StudentProfile(name=f"S{i % 3}", interests=["AI"]) for i in range(6)]
+    results = orch.run_many(profiles, max_concurrency=3)
+    assert [r["student"]["name"] for r in results] == [p.name for p in profiles]
+    assert all(r["agents"]["a"] == {"agent": "a"} for r in results)
+    assert sum(1 for r in results if r.get("cached")) == 3
+    assert all(isinstance(r["latency_ms"], int) for r in results)
+    assert "latency_ms" not in orch.run(profiles[0])
+
+
+def test_deadline_returns_degraded_fallback():
+    import threading
+
+    release = threading.Event()
+    finished = []
+
+    class SlowLLMAgent(_SleepyAgent):
+        def handle(self, profile):
+            release.wait(5)
+            finished.append(self.name)
+            return {"agent": self.name}
+
+        def fallback(self, profile):
+            return {"agent": self.name, "data_source": "fallback"}
+
+    cfg = {"agents": {"enabled": []}, "orchestrator": {
+        "summarizer": False, "use_vector_store": False,
+        "deadline_seconds": 0.5, "fallback_reserve_seconds": 0.1,
+    }}
+    orch = Orchestrator(cfg, {"programs": []})
+    orch.agents = [SlowLLMAgent("slow", 0), _SleepyAgent("fast", 0.05)]
+    result = orch.run(StudentProfile(name="Late", interests=["AI"]))
+    # The run returned while the slow agent was still blocked
+    assert finished == []
+    release.set()
+    assert result["agents"]["slow"]["data_source"] == "fallback"
+    assert result["agents"]["slow"]["degraded"] is True
+    assert result["agents"]["fast"] == {"agent": "fast"}
+    assert result["degraded"] == ["slow"]
+    assert not orch.run(StudentProfile(name="Late", interests=["AI"])).get("cached")
+
+
+class _AsyncAgent(_RendezvousAgent):
+    async def ahandle(self, profile):
+        import asyncio
+        await asyncio.to_thread(self.barrier.wait)
+        return {"agent": self.name, "async": True}
+
+
+def test_arun_awaits_agents_concurrently():
+    import asyncio
+    import threading
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False}}
+    orch = Orchestrator(cfg, {"programs": []})
+    # Async-native agents and sync-only agents (run in the executor) mix in one graph
+    barrier = threading.Barrier(3, timeout=5)
+    orch.agents = [
+        _AsyncAgent("a", barrier), _AsyncAgent("b", barrier), _RendezvousAgent("c", barrier),
+        _SleepyAgent("d", 0, fail=True),
+    ]
+    result = asyncio.run(orch.arun(StudentProfile(name="Async", interests=["AI"])))
+    assert list(result["agents"]) == ["a", "b", "c", "d"]
+    assert result["agents"]["a"] == {"agent": "a", "async": True}
+    assert result["agents"]["c"] == {"agent": "c"}
+    assert result["agents"]["d"] == {"error": "d failed"}
+    again = asyncio.run(orch.arun(StudentProfile(name="Async", interests=["AI"])))
+    assert again["cached"] is True
+
+
+def test_arun_attributes_llm_usage_of_sync_only_agents(monkeypatch):
+    import asyncio
+    from src.services import genai_client as gc
+    from src.services.genai_client import GenAIClient
+    from src.services.llm_usage import UsageTracker
+
+    class Model:
+        def generate_content(self, prompt, **kwargs):
+            usage = type("Usage", (), {"prompt_token_count": 7, "candidates_token_count": 3})()
+            return type("Resp", (), {"text": "ok", "usage_metadata": usage})()
+
+    class SyncLLMAgent(BaseAgent):
+        # No ahandle override: arun goes through BaseAgent.ahandle's worker thread
+        def handle(self, profile):
+            return {"text": self.context.genai_client.summarize("q")}
+
+    monkeypatch.setattr(gc, "vertexai_init", None)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    client = GenAIClient(model="m")
+    client._client, client.backend, client._usage = Model(), "vertex", UsageTracker()
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False}}
+    orch = Orchestrator(cfg, {"programs": []})
+    orch.genai = client
+    agent = SyncLLMAgent(type("Ctx", (), {"genai_client": client})())
+    agent.name = "sync_llm"
+    orch.agents = [agent]
+    result = asyncio.run(orch.arun(StudentProfile(name="Usage", interests=["AI"])))
+    assert result["agents"]["sync_llm"] == {"text": "ok"}
+    usage = orch.llm_usage()["by_agent"]["sync_llm"]
+    assert (usage["calls"], usage["prompt_tokens"], usage["output_tokens"]) == (1, 7, 3)
+
+
+def test_session_reruns_only_agents_with_changed_inputs():
+    from src.services.session_manager import SessionManager
+
+    # Agent cache off: reuse has to come from the session's previous turn
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False, "agent_cache": False}}
+    orch = Orchestrator(cfg, {"programs": []})
+    career = _CountingAgent("career", ("interests",))
+    aid = _CountingAgent("aid", ("budget_category",))
+    orch.agents = [career, aid]
+    session = SessionManager()
+    profile = StudentProfile(name="S", interests=["AI"], budget_category="medium")
+    orch.run(profile, session=session)
+    profile = session.refine_profile(profile, "my budget is low")
+    result = orch.run(profile, session=session)
+    assert career.calls == 1
+    assert aid.calls == 2
+    assert result["agents"] == {"career": {"calls": 1}, "aid": {"calls": 2}}
+    assert session.reuse_stats() == {"reused": 1, "refreshed": 3}
+    # Without a session nothing is reused
+    orch.run(StudentProfile(name="S", interests=["AI"], budget_category="high"))
+    assert career.calls == 2
+
+
+def test_deferred_summary_returns_before_llm(tmp_path):
+    import threading
+
+    release = threading.Event()
+
+    class SlowGenAI:
+        def summarize(self, prompt):
+            release.wait(5)
+            return "Deferred summary"
+
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": True, "use_vector_store": False, "deferred_summary": True}}
+    orch = Orchestrator(cfg, {"programs": []})
+    orch.genai = SlowGenAI()
+    orch._export_dir = str(tmp_path)
+    orch.agents = [_SleepyAgent("a", 0)]
+    profile = StudentProfile(name="Later", interests=["AI"])
+    result = orch.run(profile)
+    assert "summary" not in result
+    release.set()
+    assert Orchestrator.wait_for_summary(result, timeout=5) == "Deferred summary"
+    # The completed result (with summary) is what gets cached
+    assert orch.run(profile)["summary"] == "Deferred summary"
+    assert orch.flush_exports(timeout=5)
+    assert len(list(tmp_path.glob("summary_*.md"))) == 1
+
+
+def test_arun_deferred_summary_is_a_concurrent_future(tmp_path):
+    import asyncio
+    from concurrent.futures import Future
+
+    class AsyncGenAI:
+        async def asummarize(self, prompt):
+            return "Async summary"
+
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": True, "use_vector_store": False, "deferred_summary": True}}
+    orch = Orchestrator(cfg, {"programs": []})
+    orch.genai = AsyncGenAI()
+    orch._export_dir = str(tmp_path)
+    orch.agents = [_SleepyAgent("a", 0)]
+
+    async def scenario():
+        result = await orch.arun(StudentProfile(name="Later", interests=["AI"]))
+        assert isinstance(result["summary_future"], Future)
+        # Thread callers sharing the result can block on it; coroutines await it
+        from_thread = asyncio.to_thread(Orchestrator.wait_for_summary, result, 5)
+        return await asyncio.gather(Orchestrator.await_summary(result), from_thread)
+
+    assert asyncio.run(scenario()) == ["Async summary", "Async summary"]
+    assert orch.flush_exports(timeout=5)
+
+
+def test_run_iter_streams_summary_chunks(tmp_path):
+    class StreamingGenAI:
+        def summarize_stream(self, prompt):
+            yield from ("Focus ", "on ", "data.")
+
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": True, "use_vector_store": False, "stream_summary": True}}
+    orch = Orchestrator(cfg, {"programs": []})
+    orch.genai = StreamingGenAI()
+    orch._export_dir = str(tmp_path)
+    orch.agents = [_SleepyAgent("a", 0)]
+    events = list(orch.run_iter(StudentProfile(name="Live", interests=["AI"])))
+    assert [p for n, p in events if n == "summary_chunk"] == ["Focus ", "on ", "data."]
+    assert events[-1] == ("summary", "Focus on data.")
+    assert orch.flush_exports(timeout=5)
+
+
+def test_run_iter_forwards_partial_agent_output():
+    class StreamingAgent(_SleepyAgent):
+        def handle(self, profile):
+            BaseAgent.emit_partial(self, {"title": "first"})
+            return {"programs": [{"title": "first"}, {"title": "second"}]}
+
+    orch = Orchestrator(CONFIG, {"programs": PROGRAMS})
+    orch.agents = [StreamingAgent("programs", 0)]
+    events = list(orch.run_iter(StudentProfile(name="Early", interests=["AI"])))
+    assert events[0] == ("agent_partial", ("programs", {"title": "first"}))
+    assert events[1][0] == "programs"
+
+
+def test_shared_orchestrator_per_config():
+    from src.services.orchestrator_factory import get_orchestrator, clear_orchestrators
+    import threading
+
+    cfg = {"agents": {"enabled": []}, "orchestrator": {"summarizer": False, "use_vector_store": False}}
+    clear_orchestrators()
+    built = []
+    threads = [threading.Thread(target=lambda: built.append(get_orchestrator(cfg, {"programs": []}))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(o) for o in built}) == 1
+    other = get_orchestrator({**cfg, "orchestrator": {**cfg["orchestrator"], "max_workers": 2}}, {"programs": []})
+    assert other is not built[0]
+    clear_orchestrators()
+
+
+def test_aid_cache_key_includes_constraints():
+    from src.agents.base import AgentContext
+    from src.agents.financial_aid_agent import FinancialAidAgent
+
+    agent = FinancialAidAgent(AgentContext({}, {}))
+    base = {"interests": ["AI"], "budget_category": "low", "constraints": []}
+    working = {**base, "constraints": ["Must study part-time while working"]}
+    assert agent.cache_projection(base) != agent.cache_projection(working)
+
+
+def test_agent_pool_is_bounded_and_fallbacks_are_capped():
+    import threading
+
+    release = threading.Event()
+    started = []
+
+    class StuckAgent(_SleepyAgent):
+        def handle(self, profile):
+            started.append(self.name)
+            release.wait(5)
+            return {"agent": self.name}
+
+        def fallback(self, profile):
+            if self.name == "slow_fallback":
+                release.wait(5)
+            return {"agent": self.name, "data_source": "fallback"}
+
+    cfg = {"agents": {"enabled": []}, "orchestrator": {
+        "summarizer": False, "use_vector_store": False, "agent_pool_size": 1,
+        "deadline_seconds": 0.3, "fallback_reserve_seconds": 0.1,
+    }}
+    orch = Orchestrator(cfg, {"programs": []})
+    orch.agents = [StuckAgent("first", 0), StuckAgent("slow_fallback", 0)]
+    result = orch.run(StudentProfile(name="Busy", interests=["AI"]))
+    release.set()
+    # One worker: the second agent never started, and its blocking fallback was cut off
+    assert started == ["first"]
+    assert result["agents"]["first"]["data_source"] == "fallback"
+    assert result["agents"]["slow_fallback"]["degraded"] is True
+    assert "data_source" not in result["agents"]["slow_fallback"]
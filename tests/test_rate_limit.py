@@ -0,0 +1,67 @@
+from src.services.concurrency import ConcurrencyLimiter
+from src.services.rate_limit import AIMDController, RetryPolicy, TokenBucket, is_retryable, is_throttle
+
+
+class ResourceExhausted(Exception):
+    """Same class name as google.api_core's 429 exception."""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_error_classification():
+    assert is_throttle(ResourceExhausted("quota"))
+    assert is_throttle(RuntimeError("429 Too Many Requests"))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError("400 invalid argument"))
+
+
+def test_token_bucket_paces_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_second=2, burst=2, clock=clock)
+    assert bucket._reserve() == 0 and bucket._reserve() == 0
+    assert bucket._reserve() == 0.5
+    clock.now = 1.5
+    assert bucket._reserve() == 0
+    assert bucket.stats()["paced"] == 1
+
+
+def test_retry_policy_only_retries_retryable_errors():
+    policy = RetryPolicy(max_retries=2, base_delay=0.01)
+    assert policy.should_retry(ResourceExhausted(), 0)
+    assert policy.should_retry(ResourceExhausted(), 1)
+    assert not policy.should_retry(ResourceExhausted(), 2)
+    assert not policy.should_retry(ValueError("bad prompt"), 0)
+    assert policy.stats() == {"max_retries": 2, "retries": 2, "throttled": 3, "gave_up": 1}
+    assert 0 <= policy.delay(5) <= 0.32
+
+
+def test_aimd_halves_on_throttle_and_grows_back():
+    clock = FakeClock()
+    limiter = ConcurrencyLimiter(8)
+    aimd = AIMDController(limiter, min_limit=1, max_limit=8, cooldown_seconds=1, clock=clock)
+    aimd.on_throttle()
+    aimd.on_throttle()  # same burst: ignored
+    assert limiter.max_in_flight == 4
+    clock.now = 2
+    aimd.on_throttle()
+    assert limiter.max_in_flight == 2
+    for _ in range(2 + 3):
+        aimd.on_success()
+    assert limiter.max_in_flight == 4
+    assert aimd.stats()["decreases"] == 2
+
+
+def test_shrunk_limiter_retires_slots_as_calls_finish():
+    limiter = ConcurrencyLimiter(2)
+    assert limiter.acquire(timeout=0) and limiter.acquire(timeout=0)
+    limiter.set_limit(1)
+    limiter.release()
+    assert not limiter.acquire(timeout=0)
+    limiter.release()
+    assert limiter.acquire(timeout=0)
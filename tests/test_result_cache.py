@@ -0,0 +1,71 @@
+from src.services.result_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_by_entry_count():
+    cache = ResultCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # a becomes most recently used
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+
+def test_byte_budget_and_oversized_values():
+    cache = ResultCache(ttl_seconds=60, max_entries=100, max_bytes=40)
+    cache.set("a", "x" * 25)
+    cache.set("b", "y" * 25)
+    assert len(cache) == 1 and "b" in cache
+    assert cache.set("huge", "z" * 100) is False
+    assert cache.stats()["rejected"] == 1
+
+
+def test_ttl_expiry_and_sweep():
+    clock = FakeClock()
+    cache = ResultCache(ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    clock.now = 5
+    assert cache.get("a") == 1
+    clock.now = 11
+    assert cache.sweep() == 2
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 2
+
+
+def test_persistent_cache_shared_between_instances(tmp_path):
+    from src.services.persistent_cache import PersistentResultCache
+    path = str(tmp_path / "results.sqlite3")
+    writer = PersistentResultCache(path, ttl_seconds=60)
+    reader = PersistentResultCache(path, ttl_seconds=60)  # stands in for a second worker process
+    payload = {"agents": {"institutional_data": {"programs": ["x" * 200] * 20}}}
+    assert writer.set("k", payload)
+    assert reader.get("k") == payload
+    assert reader.get("missing") is None
+    stats = reader.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["bytes"] < len(str(payload))  # payload is stored compressed
+
+
+def test_persistent_cache_ttl_and_lru_eviction(tmp_path):
+    from src.services.persistent_cache import PersistentResultCache
+    cache = PersistentResultCache(str(tmp_path / "c.sqlite3"), ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    expired = PersistentResultCache(str(tmp_path / "c.sqlite3"), ttl_seconds=0)
+    assert expired.get("a") is None
@@ -0,0 +1,48 @@
+import json
+
+from src.services.embedding_client import EmbeddingClient
+from src.services.export_writer import default_writer
+from src.services.semantic_cache import SemanticCache
+
+VOCAB = ["computer", "science", "ai", "data", "analytics", "math", "python", "art", "design", "history"]
+
+
+class _BagOfWords:
+    """Deterministic embedder: word counts over a tiny vocabulary."""
+
+    is_semantic = True
+    cosine = staticmethod(EmbeddingClient.cosine)
+
+    def embed(self, texts):
+        return [[t.replace(",", " ").replace(";", " ").split().count(w) for w in VOCAB] for t in texts]
+
+
+PROJECTION = {"interests": ["computer science ai", "data analytics"], "strengths": ["math", "python"], "budget_category": "low"}
+
+
+def test_reuses_near_duplicate_within_same_scalars(tmp_path):
+    audit = tmp_path / "audit.jsonl"
+    cache = SemanticCache(_BagOfWords(), thresholds={"career": 0.9}, audit_log=str(audit))
+    cache.store("career", PROJECTION, {"career_suggestions": ["AI Engineer"]})
+
+    similar = dict(PROJECTION, strengths=["math", "python", "data"])
+    assert cache.lookup("career", similar) == {"career_suggestions": ["AI Engineer"]}
+    # Different budget: never reused, however similar the interests are
+    assert cache.lookup("career", dict(PROJECTION, budget_category="high")) is None
+    assert cache.lookup("career", dict(PROJECTION, interests=["art", "design", "history"])) is None
+    # Agents without a threshold are not semantically cached
+    assert cache.lookup("aid", PROJECTION) is None
+
+    assert cache.stats()["reuses"] == 1
+    assert default_writer().flush(timeout=5)
+    decisions = [json.loads(line)["decision"] for line in audit.read_text().splitlines()]
+    assert decisions == ["reuse", "miss", "miss"]
+
+
+def test_entries_are_capped_per_agent():
+    cache = SemanticCache(_BagOfWords(), default_threshold=0.99, max_entries_per_agent=2)
+    for budget in ("low", "medium", "high"):
+        cache.store("career", dict(PROJECTION, budget_category=budget), {"budget": budget})
+    assert cache.stats()["entries"] == {"career": 2}
+    assert cache.lookup("career", dict(PROJECTION, budget_category="low")) is None
+    assert cache.lookup("career", dict(PROJECTION, budget_category="high")) == {"budget": "high"}
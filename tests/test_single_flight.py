@@ -0,0 +1,44 @@
+import asyncio
+import threading
+import time
+
+from src.services.single_flight import SingleFlight
+
+
+def test_concurrent_thread_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"value": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r[0] == {"value": 42} for r in results)
+    assert sum(1 for _, shared in results if shared) == 4
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_async_callers_coalesce_and_propagate_errors():
+    flight = SingleFlight()
+    calls = []
+
+    async def boom():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("llm down")
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("k", boom) for _ in range(3)), return_exceptions=True)
+
+    outcomes = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(o, ValueError) for o in outcomes)
+    assert flight.stats()["coalesced"] == 2
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.services import genai_client as gc
+from src.services.startup_profile import format_report, parse_importtime
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2500 |       2620 | src.services.rate_limit
+import time:       900 |        900 |     google.protobuf
+import time:     41000 |      41900 |   vertexai
+not an import line
+import time:     80000 |     124520 | src.services.genai_client
+"""
+
+
+def test_parse_importtime_reads_depth_and_times():
+    timings = parse_importtime(SAMPLE.splitlines())
+    assert [t.module for t in timings] == [
+        "_io", "src.services.rate_limit", "google.protobuf", "vertexai", "src.services.genai_client",
+    ]
+    assert [t.depth for t in timings] == [1, 0, 2, 1, 0]
+    assert timings[3].self_us == 41000 and timings[3].cumulative_us == 41900
+
+
+def test_report_lists_slowest_imports_first():
+    report = format_report(parse_importtime(SAMPLE.splitlines()), top=2)
+    assert report.splitlines()[0] == "Startup imports: 5 modules, 127.1 ms"
+    cumulative = report.split("Slowest by self time:")[0]
+    assert cumulative.index("src.services.genai_client") < cumulative.index("vertexai")
+    assert "_io" not in report
+
+
+CONNECT = """
+import sys
+from src.services.genai_client import GenAIClient
+client = GenAIClient(model="m")
+print("vertexai" in sys.modules, end=" ")
+client._active()
+print("vertexai" in sys.modules, client.backend)
+"""
+
+
+def _connect_in_subprocess(tmp_path, **env):
+    # A throwaway vertexai package shows whether (and when) the SDK gets imported
+    sdk = tmp_path / "vertexai"
+    sdk.mkdir(exist_ok=True)
+    (sdk / "__init__.py").write_text("def init(**kwargs):\n    pass\n")
+    (sdk / "generative_models.py").write_text("class GenerativeModel:\n    def __init__(self, name):\n        self.name = name\n")
+    unset = ("PROJECT_ID", "K_SERVICE", "LLM_REPLAY", "USE_VERTEX")
+    clean = {k: v for k, v in os.environ.items() if not k.startswith(("GOOGLE_", "GCP_", "CLOUDSDK_")) and k not in unset}
+    clean.update(PYTHONPATH=str(tmp_path), HOME=str(tmp_path), **env)
+    out = subprocess.run([sys.executable, "-c", CONNECT], cwd=ROOT, env=clean, capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+
+def test_sdk_is_imported_on_first_call_unless_vertex_is_opted_out(tmp_path):
+    # Constructing the client is free; the first call imports and initialises Vertex, even with no
+    # credentials in the environment (on GCE / GKE / Cloud Run they come from the metadata server)
+    assert _connect_in_subprocess(tmp_path) == ["False", "True", "vertex"]
+    # USE_VERTEX=0: Vertex is never imported
+    assert _connect_in_subprocess(tmp_path, USE_VERTEX="0") == ["False", "False", "None"]
+
+
+def test_skipping_vertex_is_logged(monkeypatch, caplog):
+    import logging
+
+    monkeypatch.setenv("USE_VERTEX", "0")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_REPLAY", raising=False)
+    client = gc.GenAIClient(model="m")
+    with caplog.at_level(logging.INFO, logger=gc.__name__):
+        client._active()
+    assert client.backend is None
+    assert "Vertex AI skipped (USE_VERTEX=0)" in caplog.text
+
+
+def test_sdk_loader_keeps_patched_globals(monkeypatch):
+    sentinel = object()
+    monkeypatch.setattr(gc, "vertexai_init", None)
+    monkeypatch.setattr(gc, "GenerativeModel", sentinel)
+    assert gc._vertex_sdk() == (None, sentinel)